@@ -1 +1,39 @@
-# Register your models here.
+from django.contrib import admin
+
+from .models import Event, PuzzleStats
+
+
+@admin.register(Event)
+class EventAdmin(admin.ModelAdmin):
+    """
+    Read-only admin for browsing ingested events.
+    """
+
+    list_display = ("kind", "session_id", "user", "puzzle_date", "occurred_at")
+    list_filter = ("kind", "puzzle_date")
+    search_fields = ("session_id",)
+    ordering = ("-occurred_at",)
+    date_hierarchy = "occurred_at"
+
+    def has_add_permission(self, request):  # type: ignore[no-untyped-def]
+        return False
+
+    def has_change_permission(self, request, obj=None):  # type: ignore[no-untyped-def]
+        return False
+
+
+@admin.register(PuzzleStats)
+class PuzzleStatsAdmin(admin.ModelAdmin):
+    """
+    Read-only admin for the per-puzzle statistics rollup.
+    """
+
+    list_display = ("puzzle_date", "players", "solves", "total_guesses", "updated_at")
+    ordering = ("-puzzle_date",)
+    date_hierarchy = "puzzle_date"
+
+    def has_add_permission(self, request):  # type: ignore[no-untyped-def]
+        return False
+
+    def has_change_permission(self, request, obj=None):  # type: ignore[no-untyped-def]
+        return False
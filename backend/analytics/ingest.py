@@ -0,0 +1,238 @@
+"""
+Batched, append-only ingestion of analytics events.
+
+Writing one row per event inside the request caps throughput at one INSERT
+round trip per event. Instead, requests hand validated events to a
+per-process `EventBuffer`, which writes them in bulk once ``flush_size``
+events have accumulated or ``flush_interval`` seconds have passed (a daemon
+thread covers quiet periods). On PostgreSQL the batch is streamed with
+``COPY``; other databases use ``bulk_create``.
+
+The buffer is bounded: when ``max_size`` events are already waiting (the
+database can't keep up), `add()` raises `BufferFull` so the endpoint can
+ask clients to back off instead of growing memory without limit.
+"""
+
+import atexit
+import csv
+import io
+import json
+import logging
+import threading
+import time
+from collections.abc import Callable, Sequence
+
+from django.conf import settings
+from django.db import connection
+
+from .models import Event
+
+logger = logging.getLogger(__name__)
+
+COPY_COLUMNS = (
+    "kind",
+    "session_id",
+    "user_id",
+    "puzzle_date",
+    "properties",
+    "occurred_at",
+    "received_at",
+)
+
+
+class BufferFull(Exception):
+    """Raised when the buffer cannot accept more events."""
+
+
+def bulk_create_events(events: Sequence[Event]) -> None:
+    """
+    Write events with multi-row INSERTs.
+    """
+    Event.objects.bulk_create(events, batch_size=1000)
+
+
+def copy_events(events: Sequence[Event]) -> None:
+    """
+    Stream events into PostgreSQL with COPY.
+    """
+    stream = io.StringIO()
+    writer = csv.writer(stream)
+    for event in events:
+        writer.writerow(
+            (
+                event.kind,
+                event.session_id,
+                "" if event.user_id is None else event.user_id,
+                "" if event.puzzle_date is None else event.puzzle_date.isoformat(),
+                json.dumps(event.properties),
+                event.occurred_at.isoformat(),
+                event.received_at.isoformat(),
+            )
+        )
+    stream.seek(0)
+    columns = ", ".join(COPY_COLUMNS)
+    with connection.cursor() as cursor:
+        # Empty unquoted CSV fields are read as NULL, except for the
+        # non-nullable text columns
+        cursor.cursor.copy_expert(
+            f"COPY {Event._meta.db_table} ({columns}) FROM STDIN "
+            "WITH (FORMAT csv, FORCE_NOT_NULL (kind, session_id))",
+            stream,
+        )
+
+
+def write_events(events: Sequence[Event]) -> None:
+    """
+    Persist a batch of events using the fastest path for the database.
+    """
+    if connection.vendor == "postgresql" and getattr(
+        settings, "ANALYTICS_USE_COPY", True
+    ):
+        copy_events(events)
+    else:
+        bulk_create_events(events)
+
+
+class EventBuffer:
+    """
+    Thread-safe, bounded in-process buffer of events awaiting a bulk write.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_size: int = 50_000,
+        flush_size: int = 1000,
+        flush_interval: float = 2.0,
+        writer: Callable[[Sequence[Event]], None] = write_events,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_size = max_size
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.writer = writer
+        self.clock = clock
+        self._events: list[Event] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = clock()
+        self._timer: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def add(self, events: Sequence[Event]) -> None:
+        """
+        Queue events, flushing when a size or time threshold is reached.
+        Raises BufferFull if the events don't fit.
+        """
+        with self._lock:
+            if len(self._events) + len(events) > self.max_size:
+                raise BufferFull(
+                    f"{len(self._events)} events are already waiting to be written."
+                )
+            self._events.extend(events)
+            due = (
+                len(self._events) >= self.flush_size
+                or self.clock() - self._last_flush >= self.flush_interval
+            )
+        if due:
+            self.flush(block=False)
+
+    def flush(self, block: bool = True) -> int:
+        """
+        Write all queued events and return how many were written.
+        With ``block=False`` return immediately if another flush is running;
+        its caller will pick up whatever is queued next time.
+        """
+        if not self._flush_lock.acquire(blocking=block):
+            return 0
+        try:
+            with self._lock:
+                events, self._events = self._events, []
+                self._last_flush = self.clock()
+            if not events:
+                return 0
+            try:
+                self.writer(events)
+            except Exception:
+                logger.exception("Failed to write %d analytics events", len(events))
+                with self._lock:
+                    # Keep the events for the next flush if there is room
+                    room = max(self.max_size - len(self._events), 0)
+                    self._events[:0] = events[:room]
+                    dropped = len(events) - room
+                if dropped > 0:
+                    logger.error("Dropped %d analytics events", dropped)
+                return 0
+            return len(events)
+        finally:
+            self._flush_lock.release()
+
+    def start(self) -> None:
+        """
+        Start the background thread flushing on ``flush_interval``.
+        """
+        if self._timer is not None:
+            return
+        self._stopped.clear()
+        self._timer = threading.Thread(
+            target=self._run, name="analytics-flush", daemon=True
+        )
+        self._timer.start()
+
+    def stop(self) -> None:
+        """
+        Stop the background thread and write what is left.
+        """
+        self._stopped.set()
+        if self._timer is not None:
+            self._timer.join()
+            self._timer = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+            finally:
+                connection.close()
+
+
+_buffer: EventBuffer | None = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer() -> EventBuffer:
+    """
+    Return the process-wide event buffer, starting it on first use.
+    """
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                buffer = EventBuffer(
+                    max_size=getattr(settings, "ANALYTICS_BUFFER_MAX_SIZE", 50_000),
+                    flush_size=getattr(settings, "ANALYTICS_BUFFER_FLUSH_SIZE", 1000),
+                    flush_interval=getattr(
+                        settings, "ANALYTICS_BUFFER_FLUSH_INTERVAL", 2.0
+                    ),
+                )
+                if getattr(settings, "ANALYTICS_BUFFER_BACKGROUND_FLUSH", True):
+                    buffer.start()
+                atexit.register(buffer.stop)
+                _buffer = buffer
+    return _buffer
+
+
+def reset_buffer() -> None:
+    """
+    Stop and forget the process-wide buffer, writing what is queued.
+    """
+    global _buffer
+    with _buffer_lock:
+        if _buffer is not None:
+            atexit.unregister(_buffer.stop)
+            _buffer.stop()
+            _buffer = None
@@ -0,0 +1,40 @@
+"""
+Recompute the quiz statistics rollups from the attempt rows.
+
+The rollups are maintained incrementally as attempts finish; run this to
+repair them after a bug, a manual data fix or a restore, e.g.::
+
+    python manage.py rebuild_puzzle_stats --since 2025-01-01
+"""
+
+import datetime
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from analytics import rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute puzzle, guess-count and daily statistics from attempts."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--since",
+            help="Only rebuild puzzles and days from this date on (YYYY-MM-DD).",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        since = None
+        if options["since"]:
+            try:
+                since = datetime.date.fromisoformat(options["since"])
+            except ValueError as exc:
+                raise CommandError(f"Invalid --since: {exc}") from exc
+
+        puzzles, days = rollups.rebuild(since)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt statistics for {puzzles} puzzles and {days} days."
+            )
+        )
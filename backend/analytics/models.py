@@ -1 +1,139 @@
-# Create your models here.
+from typing import Any
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class Event(models.Model):
+    """
+    A client-reported gameplay event (guess, session, share, ...).
+
+    Events are append-only: they are written in batches by the ingestion
+    buffer and never updated afterwards.
+    """
+
+    class Kind(models.TextChoices):
+        SESSION_START = "session_start", _("Session start")
+        SESSION_END = "session_end", _("Session end")
+        GUESS = "guess", _("Guess")
+        PUZZLE_COMPLETED = "puzzle_completed", _("Puzzle completed")
+        SHARE = "share", _("Share")
+
+    kind: models.CharField = models.CharField(
+        _("kind"), max_length=32, choices=Kind.choices
+    )
+    session_id: models.CharField = models.CharField(
+        _("session ID"), max_length=64, blank=True
+    )
+    user: models.ForeignKey[Any, Any] = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        db_constraint=False,
+        verbose_name=_("user"),
+    )
+    user_id: int | None
+    puzzle_date: models.DateField = models.DateField(
+        _("puzzle date"), null=True, blank=True
+    )
+    properties = models.JSONField(_("properties"), default=dict, blank=True)
+    occurred_at: models.DateTimeField = models.DateTimeField(_("occurred at"))
+    received_at: models.DateTimeField = models.DateTimeField(
+        _("received at"), default=timezone.now
+    )
+
+    class Meta:
+        verbose_name = _("event")
+        verbose_name_plural = _("events")
+        db_table = "analytics_events"
+        indexes = [
+            models.Index(fields=["puzzle_date", "kind"], name="event_puzzle_kind_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.kind} @ {self.occurred_at:%Y-%m-%d %H:%M:%S}"
+
+
+class PuzzleStats(models.Model):
+    """
+    Running totals of completed attempts per daily puzzle.
+
+    Maintained incrementally by `analytics.rollups`; rebuild with
+    ``manage.py rebuild_puzzle_stats`` if they drift.
+    """
+
+    puzzle_date: models.DateField = models.DateField(_("puzzle date"), unique=True)
+    players: models.PositiveIntegerField = models.PositiveIntegerField(
+        _("players"), default=0
+    )
+    solves: models.PositiveIntegerField = models.PositiveIntegerField(
+        _("solves"), default=0
+    )
+    total_guesses: models.PositiveIntegerField = models.PositiveIntegerField(
+        _("total guesses"), default=0
+    )
+    updated_at: models.DateTimeField = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("puzzle stats")
+        verbose_name_plural = _("puzzle stats")
+        db_table = "analytics_puzzle_stats"
+
+    def __str__(self) -> str:
+        return f"{self.puzzle_date}: {self.solves}/{self.players}"
+
+
+class GuessBucket(models.Model):
+    """
+    Number of players who finished a puzzle with a given number of guesses.
+    Failed attempts are counted in bucket 0.
+    """
+
+    puzzle_date: models.DateField = models.DateField(_("puzzle date"))
+    guesses: models.PositiveSmallIntegerField = models.PositiveSmallIntegerField(
+        _("guesses")
+    )
+    players: models.PositiveIntegerField = models.PositiveIntegerField(
+        _("players"), default=0
+    )
+
+    class Meta:
+        verbose_name = _("guess bucket")
+        verbose_name_plural = _("guess buckets")
+        db_table = "analytics_guess_buckets"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["puzzle_date", "guesses"], name="unique_guess_bucket"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.puzzle_date} in {self.guesses}: {self.players}"
+
+
+class DailyStats(models.Model):
+    """
+    Completed attempts per calendar day (UTC), across all puzzles played
+    that day.
+    """
+
+    date: models.DateField = models.DateField(_("date"), unique=True)
+    completions: models.PositiveIntegerField = models.PositiveIntegerField(
+        _("completions"), default=0
+    )
+    solves: models.PositiveIntegerField = models.PositiveIntegerField(
+        _("solves"), default=0
+    )
+    updated_at: models.DateTimeField = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("daily stats")
+        verbose_name_plural = _("daily stats")
+        db_table = "analytics_daily_stats"
+
+    def __str__(self) -> str:
+        return f"{self.date}: {self.completions}"
@@ -0,0 +1,196 @@
+"""
+Incrementally maintained quiz statistics.
+
+"X% solved today's puzzle" and the guess histogram are read far more often
+than attempts finish, so instead of aggregating attempt rows on every read,
+each completion bumps three small rollups:
+
+* `PuzzleStats`: players, solves and total guesses per puzzle;
+* `GuessBucket`: players per (puzzle, guess count), failures in bucket 0;
+* `DailyStats`: completions and solves per calendar day.
+
+Every bump is a single ``UPDATE ... SET n = n + 1`` (an INSERT the first
+time a row is needed), so concurrent completions never lose counts. Reads
+touch one stats row and at most ``max_guesses + 1`` buckets.
+
+`rebuild()` recomputes the rollups from the attempt rows, for repair.
+"""
+
+import datetime
+from typing import Any, NamedTuple
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailyStats, GuessBucket, PuzzleStats
+
+# Bucket counting players who ran out of guesses
+FAILED_BUCKET = 0
+
+
+class PuzzleSummary(NamedTuple):
+    """Aggregated results of a daily puzzle."""
+
+    puzzle_date: datetime.date
+    players: int
+    solves: int
+    total_guesses: int
+    distribution: dict[int, int]
+
+    @property
+    def solve_rate(self) -> float:
+        return self.solves / self.players if self.players else 0.0
+
+    @property
+    def average_guesses(self) -> float | None:
+        return round(self.total_guesses / self.players, 2) if self.players else None
+
+    @property
+    def failed(self) -> int:
+        return self.distribution.get(FAILED_BUCKET, 0)
+
+
+def bucket_for(guess_count: int, solved: bool) -> int:
+    """
+    Return the histogram bucket of a finished attempt.
+    """
+    return guess_count if solved else FAILED_BUCKET
+
+
+def increment(model: type[models.Model], lookup: dict[str, Any], **deltas: int) -> None:
+    """
+    Add ``deltas`` to the counters of the row matching ``lookup``, creating
+    it if needed.
+    """
+    changes: dict[str, Any] = {
+        field: F(field) + delta for field, delta in deltas.items()
+    }
+    if any(field.name == "updated_at" for field in model._meta.concrete_fields):
+        changes["updated_at"] = timezone.now()
+    queryset = model._default_manager.filter(**lookup)
+    if queryset.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            model._default_manager.create(**lookup, **deltas)
+    except IntegrityError:
+        # Another transaction created the row first
+        queryset.update(**changes)
+
+
+def record_completion(
+    *,
+    puzzle_date: datetime.date,
+    guess_count: int,
+    solved: bool,
+    completed_on: datetime.date,
+) -> None:
+    """
+    Count a finished attempt in the rollups.
+    Call this inside the transaction that marks the attempt completed.
+    """
+    solves = int(solved)
+    increment(
+        PuzzleStats,
+        {"puzzle_date": puzzle_date},
+        players=1,
+        solves=solves,
+        total_guesses=guess_count,
+    )
+    increment(
+        GuessBucket,
+        {"puzzle_date": puzzle_date, "guesses": bucket_for(guess_count, solved)},
+        players=1,
+    )
+    increment(DailyStats, {"date": completed_on}, completions=1, solves=solves)
+
+
+def get_summary(puzzle_date: datetime.date) -> PuzzleSummary:
+    """
+    Return the aggregated results of a puzzle; zeros if nobody finished it.
+    """
+    stats = (
+        PuzzleStats.objects.filter(puzzle_date=puzzle_date)
+        .values_list("players", "solves", "total_guesses")
+        .first()
+    )
+    if stats is None:
+        return PuzzleSummary(puzzle_date, 0, 0, 0, {})
+    distribution = dict(
+        GuessBucket.objects.filter(puzzle_date=puzzle_date, players__gt=0)
+        .order_by("guesses")
+        .values_list("guesses", "players")
+    )
+    players, solves, total_guesses = stats
+    return PuzzleSummary(puzzle_date, players, solves, total_guesses, distribution)
+
+
+def _completed_attempts() -> models.QuerySet:
+    from quizzes.models import Attempt
+
+    return Attempt.objects.filter(completed_at__isnull=False).order_by()
+
+
+def rebuild(since: datetime.date | None = None) -> tuple[int, int]:
+    """
+    Recompute the rollups from the attempt rows and return the number of
+    puzzles and days rebuilt. With ``since``, only puzzles dated and days
+    played on or after it are rebuilt.
+    """
+    attempts = _completed_attempts()
+    puzzle_attempts = attempts
+    day_attempts = attempts.annotate(day=TruncDate("completed_at"))
+    puzzles, buckets, days = (
+        PuzzleStats.objects.all(),
+        GuessBucket.objects.all(),
+        DailyStats.objects.all(),
+    )
+    if since is not None:
+        puzzle_attempts = puzzle_attempts.filter(puzzle__puzzle_date__gte=since)
+        day_attempts = day_attempts.filter(day__gte=since)
+        puzzles = puzzles.filter(puzzle_date__gte=since)
+        buckets = buckets.filter(puzzle_date__gte=since)
+        days = days.filter(date__gte=since)
+
+    solved = Count("id", filter=Q(solved=True))
+    puzzle_rows = puzzle_attempts.values("puzzle__puzzle_date").annotate(
+        players=Count("id"), solves=solved, total_guesses=Sum("guess_count")
+    )
+    bucket_rows = puzzle_attempts.values(
+        "puzzle__puzzle_date", "solved", "guess_count"
+    ).annotate(players=Count("id"))
+    day_rows = day_attempts.values("day").annotate(
+        completions=Count("id"), solves=solved
+    )
+
+    with transaction.atomic():
+        bucket_totals: dict[tuple[datetime.date, int], int] = {}
+        for row in bucket_rows:
+            bucket = bucket_for(row["guess_count"], row["solved"])
+            key = (row["puzzle__puzzle_date"], bucket)
+            bucket_totals[key] = bucket_totals.get(key, 0) + row["players"]
+        puzzles.delete()
+        buckets.delete()
+        days.delete()
+        created = PuzzleStats.objects.bulk_create(
+            PuzzleStats(
+                puzzle_date=row["puzzle__puzzle_date"],
+                players=row["players"],
+                solves=row["solves"],
+                total_guesses=row["total_guesses"] or 0,
+            )
+            for row in puzzle_rows
+        )
+        GuessBucket.objects.bulk_create(
+            GuessBucket(puzzle_date=puzzle_date, guesses=guesses, players=players)
+            for (puzzle_date, guesses), players in bucket_totals.items()
+        )
+        days_created = DailyStats.objects.bulk_create(
+            DailyStats(
+                date=row["day"], completions=row["completions"], solves=row["solves"]
+            )
+            for row in day_rows
+        )
+    return len(created), len(days_created)
@@ -0,0 +1,39 @@
+"""
+Serializers for the analytics app.
+"""
+
+from rest_framework import serializers
+
+from .models import Event
+
+
+class EventSerializer(serializers.ModelSerializer):
+    """
+    Validates a single client-reported event.
+    """
+
+    class Meta:
+        model = Event
+        fields = [
+            "kind",
+            "session_id",
+            "puzzle_date",
+            "properties",
+            "occurred_at",
+        ]
+
+
+class EventBatchSerializer(serializers.Serializer):
+    """
+    Validates a batch of events sent in one request.
+    """
+
+    events: serializers.ListSerializer = serializers.ListSerializer(
+        child=EventSerializer(), allow_empty=False, max_length=500
+    )
+
+    def to_events(self, user=None) -> list[Event]:  # type: ignore[no-untyped-def]
+        """
+        Build unsaved Event instances from the validated batch.
+        """
+        return [Event(user=user, **event) for event in self.validated_data["events"]]
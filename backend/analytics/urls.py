@@ -0,0 +1,22 @@
+"""
+URL configuration for analytics app.
+"""
+
+from django.urls import path, register_converter
+
+from quizzes.converters import IsoDateConverter
+
+from .views import EventIngestView, PuzzleStatsView
+
+app_name = "analytics"
+
+register_converter(IsoDateConverter, "isodate")
+
+urlpatterns = [
+    path("events/", EventIngestView.as_view(), name="event-ingest"),
+    path(
+        "puzzles/<isodate:puzzle_date>/stats/",
+        PuzzleStatsView.as_view(),
+        name="puzzle-stats",
+    ),
+]
@@ -1 +1,68 @@
-# Create your views here.
+"""
+API views for the analytics app.
+"""
+
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from popcornguess.routers import ReplicaReadMixin
+
+from . import rollups
+from .ingest import BufferFull, get_buffer
+from .serializers import EventBatchSerializer
+
+# Seconds clients should wait before retrying when the buffer is full
+RETRY_AFTER = 5
+
+
+class EventIngestView(APIView):
+    """
+    Accept a batch of events. Events are buffered and written in bulk,
+    so a 202 response means "queued", not "stored".
+    """
+
+    permission_classes = [AllowAny]
+
+    def post(self, request):  # type: ignore[no-untyped-def]
+        serializer = EventBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = request.user if request.user.is_authenticated else None
+        events = serializer.to_events(user=user)
+        try:
+            get_buffer().add(events)
+        except BufferFull:
+            return Response(
+                {"detail": "Event ingestion is overloaded, retry later."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": str(RETRY_AFTER)},
+            )
+        return Response({"accepted": len(events)}, status=status.HTTP_202_ACCEPTED)
+
+
+class PuzzleStatsView(ReplicaReadMixin, APIView):
+    """
+    Return how many players finished a puzzle, how many solved it and the
+    guess-count distribution, read from the incrementally updated rollups.
+    """
+
+    permission_classes = [AllowAny]
+
+    def get(self, request, puzzle_date):  # type: ignore[no-untyped-def]
+        summary = rollups.get_summary(puzzle_date)
+        return Response(
+            {
+                "date": summary.puzzle_date.isoformat(),
+                "players": summary.players,
+                "solves": summary.solves,
+                "solve_rate": round(summary.solve_rate, 4),
+                "average_guesses": summary.average_guesses,
+                "distribution": [
+                    {"guesses": guesses, "players": players}
+                    for guesses, players in summary.distribution.items()
+                    if guesses != rollups.FAILED_BUCKET
+                ],
+                "failed": summary.failed,
+            }
+        )
@@ -0,0 +1,12 @@
+"""
+Standalone performance benchmarks for the PopcornGuess backend.
+
+Benchmarks are not collected by pytest. Run them from the ``backend``
+directory, e.g.::
+
+    python -m benchmarks.bench_daily_puzzle
+
+They run against the test settings (in-memory SQLite, local-memory cache)
+unless DJANGO_SETTINGS_MODULE says otherwise, so numbers are best compared
+relative to each other rather than to production.
+"""
@@ -0,0 +1,85 @@
+"""
+Shared helpers for benchmark scripts.
+"""
+
+import os
+import statistics
+import time
+from collections.abc import Callable, Iterable
+from typing import Any
+
+
+def setup_django(settings_module: str = "popcornguess.settings_test") -> Any:
+    """
+    Configure Django and create the database schema.
+    Returns the old database config, to pass to `teardown_django`.
+    """
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+
+    import django
+
+    django.setup()
+
+    from django.test.utils import setup_databases, setup_test_environment
+
+    setup_test_environment()
+    return setup_databases(verbosity=0, interactive=False)
+
+
+def teardown_django(old_config: Any) -> None:
+    """
+    Destroy the databases created by `setup_django`.
+    """
+    from django.test.utils import teardown_databases, teardown_test_environment
+
+    teardown_databases(old_config, verbosity=0)
+    teardown_test_environment()
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """
+    Return the given percentile (0-100) of a list of samples.
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def timed(func: Callable[[], Any], repeat: int) -> list[float]:
+    """
+    Call ``func`` ``repeat`` times and return each duration in milliseconds.
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summarize(samples: list[float]) -> str:
+    """
+    Format latency samples (milliseconds) as a one-line summary.
+    """
+    if not samples:
+        return "no samples"
+    return (
+        f"n={len(samples)} mean={statistics.fmean(samples):.3f}ms "
+        f"p50={percentile(samples, 50):.3f}ms p99={percentile(samples, 99):.3f}ms "
+        f"max={max(samples):.3f}ms"
+    )
+
+
+def print_table(headers: Iterable[str], rows: Iterable[Iterable[Any]]) -> None:
+    """
+    Print rows as a plain aligned text table.
+    """
+    header = [str(h) for h in headers]
+    cells = [[str(c) for c in row] for row in rows]
+    widths = [max([len(h)] + [len(r[i]) for r in cells]) for i, h in enumerate(header)]
+    print("  ".join(h.ljust(w) for h, w in zip(header, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in cells:
+        print("  ".join(c.ljust(w) for c, w in zip(row, widths)))
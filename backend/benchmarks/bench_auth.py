@@ -0,0 +1,56 @@
+"""
+Queries and latency per authenticated request: session vs. signed token.
+
+Calls ``/api/v1/users/me/`` through the test client with a session cookie
+and with a bearer access token (warm authentication cache), counting the
+database queries each request makes.
+
+    python -m benchmarks.bench_auth [--requests 2000]
+"""
+
+import argparse
+
+from benchmarks._setup import print_table, setup_django, summarize, teardown_django
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--settings", default="popcornguess.settings_test")
+    args = parser.parse_args()
+
+    old_config = setup_django(args.settings)
+    try:
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from benchmarks._setup import timed
+        from rest_framework.test import APIClient
+
+        from users.models import User
+        from users.tokens import issue_tokens
+
+        user = User.objects.create_user(
+            email="bench@example.com", username="bench", password="benchpass123"
+        )
+        session = APIClient()
+        session.login(email="bench@example.com", password="benchpass123")
+        token = APIClient()
+        token.credentials(HTTP_AUTHORIZATION=f"Bearer {issue_tokens(user)['access']}")
+
+        rows = []
+        for name, client in (("session", session), ("bearer token", token)):
+            client.get("/api/v1/users/me/")
+            with CaptureQueriesContext(connection) as queries:
+                client.get("/api/v1/users/me/")
+            count = len(queries)
+            samples = timed(lambda: client.get("/api/v1/users/me/"), args.requests)
+            rows.append([name, count, summarize(samples)])
+
+        print_table(["authentication", "queries/request", "latency"], rows)
+    finally:
+        teardown_django(old_config)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Rollover load benchmark for the daily puzzle endpoint.
+
+Simulates the 00:00 UTC rush: the cache starts cold, then ``--requests``
+GETs (10k by default, i.e. more than a real first minute) are fired from
+``--threads`` concurrent clients as fast as possible, calling the views
+directly so middleware overhead doesn't blur the comparison. Latencies are bucketed
+in arrival order so a flat p99 across buckets shows that only the very first
+request pays for the cache miss. A naive "query + serialize per request"
+view is measured the same way for comparison.
+
+    python -m benchmarks.bench_daily_puzzle [--requests 10000] [--threads 8]
+"""
+
+import argparse
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from benchmarks._setup import percentile, print_table, setup_django, teardown_django
+
+
+def run_load(
+    handler: Callable[[], Any], total: int, threads: int
+) -> list[tuple[float, float]]:
+    """
+    Call ``handler`` ``total`` times from ``threads`` threads.
+    Returns (start offset, latency) pairs in milliseconds.
+    """
+    lock = threading.Lock()
+    remaining = [total]
+    results: list[tuple[float, float]] = []
+    barrier = threading.Barrier(threads)
+    origin = [0.0]
+
+    def worker() -> None:
+        local: list[tuple[float, float]] = []
+        barrier.wait()
+        if not origin[0]:
+            origin[0] = time.perf_counter()
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    break
+                remaining[0] -= 1
+            start = time.perf_counter()
+            handler()
+            end = time.perf_counter()
+            local.append(((start - origin[0]) * 1000, (end - start) * 1000))
+        with lock:
+            results.extend(local)
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    results.sort()
+    return results
+
+
+def report(label: str, results: list[tuple[float, float]], buckets: int) -> None:
+    """
+    Print per-bucket latency percentiles in arrival order.
+    """
+    size = max(1, len(results) // buckets)
+    rows = []
+    for index in range(0, len(results), size):
+        chunk = [latency for _, latency in results[index : index + size]]
+        rows.append(
+            [
+                f"{index}-{index + len(chunk) - 1}",
+                f"{percentile(chunk, 50):.3f}",
+                f"{percentile(chunk, 99):.3f}",
+                f"{max(chunk):.3f}",
+            ]
+        )
+    elapsed = results[-1][0] / 1000 if results else 0
+    print(f"\n{label}: {len(results)} requests in {elapsed:.2f}s")
+    print_table(["requests", "p50 ms", "p99 ms", "max ms"], rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=10_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--buckets", type=int, default=10)
+    args = parser.parse_args()
+
+    old_config = setup_django()
+    try:
+        from django.core.cache import cache
+        from django.http import JsonResponse
+        from django.test import RequestFactory
+
+        from asgiref.sync import async_to_sync
+
+        from quizzes import daily
+        from quizzes.models import DailyPuzzle
+        from quizzes.views import daily_puzzle
+
+        puzzle = DailyPuzzle.objects.create(
+            puzzle_date=daily.today(),
+            answer="The Matrix",
+            clues=[{"type": "quote", "value": f"clue {i}" * 20} for i in range(10)],
+        )
+        cache.clear()
+        factory = RequestFactory()
+        view = async_to_sync(daily_puzzle)
+
+        def materialized() -> None:
+            response = view(factory.get("/api/v1/quizzes/daily/"))
+            assert response.status_code == 200
+
+        def naive() -> None:
+            factory.get("/api/v1/quizzes/daily/")
+            row = DailyPuzzle.objects.get(puzzle_date=puzzle.puzzle_date)
+            response = JsonResponse(row.to_public_dict())
+            assert response.status_code == 200
+
+        report(
+            "Materialized + cached (cold start)",
+            run_load(materialized, args.requests, args.threads),
+            args.buckets,
+        )
+        report(
+            "Naive ORM query + serialize per request",
+            run_load(naive, args.requests, args.threads),
+            args.buckets,
+        )
+    finally:
+        teardown_django(old_config)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Per-request cost of opening database connections vs. reusing them.
+
+Replays ``--requests`` request cycles (``request_started``, one primary key
+lookup, ``request_finished``, as Django's handlers do) with connections
+closed after every request (``CONN_MAX_AGE = 0``), kept open, and kept open
+with ``CONN_HEALTH_CHECKS``. The difference between the first two is the
+connection setup each request no longer pays. Point ``DATABASE_URL`` at
+PostgreSQL (or at PgBouncer, to see what a pooler leaves of that cost); on
+the in-memory SQLite of the test settings connections are never closed and
+every mode costs the same.
+
+    python -m benchmarks.bench_db_connections --settings popcornguess.settings
+"""
+
+import argparse
+import statistics
+
+from benchmarks._setup import (
+    percentile,
+    print_table,
+    setup_django,
+    teardown_django,
+    timed,
+)
+
+MODES = [
+    ("close per request", 0, False),
+    ("persistent", 600, False),
+    ("persistent + health checks", 600, True),
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--settings", default="popcornguess.settings_test")
+    args = parser.parse_args()
+
+    old_config = setup_django(args.settings)
+    try:
+        from django.core.signals import request_finished, request_started
+        from django.db import connection
+        from django.db.backends.signals import connection_created
+
+        from users.models import User
+
+        user = User.objects.create_user(
+            email="bench@example.com", username="bench", password="x"
+        )
+        opened = [0]
+
+        def count(**kwargs: object) -> None:
+            opened[0] += 1
+
+        connection_created.connect(count)
+
+        def request_cycle() -> None:
+            request_started.send(sender=None)
+            User.objects.filter(pk=user.pk).first()
+            request_finished.send(sender=None)
+
+        rows = []
+        means = {}
+        for label, max_age, health_checks in MODES:
+            connection.close()
+            connection.settings_dict["CONN_MAX_AGE"] = max_age
+            connection.settings_dict["CONN_HEALTH_CHECKS"] = health_checks
+            opened[0] = 0
+            samples = timed(request_cycle, args.requests)
+            means[label] = statistics.fmean(samples)
+            rows.append(
+                [
+                    label,
+                    f"{means[label]:.3f}",
+                    f"{percentile(samples, 50):.3f}",
+                    f"{percentile(samples, 99):.3f}",
+                    opened[0],
+                ]
+            )
+        connection_created.disconnect(count)
+
+        print(f"{args.requests:,} requests on {connection.vendor}")
+        print_table(["mode", "mean ms", "p50 ms", "p99 ms", "connections"], rows)
+        saved = means["close per request"] - means["persistent"]
+        print(f"connection setup saved per request: {saved:.3f}ms")
+    finally:
+        teardown_django(old_config)
+
+
+if __name__ == "__main__":
+    main()
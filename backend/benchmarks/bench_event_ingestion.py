@@ -0,0 +1,87 @@
+"""
+Sustained analytics ingestion rate: buffered bulk writes vs. row-at-a-time.
+
+Feeds ``--events`` guess events in client-sized batches (``--batch``) to
+``EventBuffer`` and, for comparison, saves each event with its own INSERT as
+a naive view would. Rates include validation-free model construction and
+all database writes; run it with a PostgreSQL ``DATABASE_URL`` and
+``--settings popcornguess.settings`` to measure the COPY path.
+
+    python -m benchmarks.bench_event_ingestion [--events 50000] [--batch 20]
+"""
+
+import argparse
+import time
+
+from benchmarks._setup import print_table, setup_django, teardown_django
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=50_000)
+    parser.add_argument("--batch", type=int, default=20)
+    parser.add_argument("--flush-size", type=int, default=1000)
+    parser.add_argument("--settings", default="popcornguess.settings_test")
+    args = parser.parse_args()
+
+    old_config = setup_django(args.settings)
+    try:
+        from django.utils import timezone
+
+        from analytics.ingest import EventBuffer
+        from analytics.models import Event
+
+        def batches():  # type: ignore[no-untyped-def]
+            now = timezone.now()
+            for start in range(0, args.events, args.batch):
+                yield [
+                    Event(
+                        kind=Event.Kind.GUESS,
+                        session_id=f"session-{i % 997}",
+                        properties={"guess": "The Matrix", "attempt": i % 6},
+                        occurred_at=now,
+                    )
+                    for i in range(start, min(start + args.batch, args.events))
+                ]
+
+        rows = []
+
+        buffer = EventBuffer(
+            max_size=args.events + 1, flush_size=args.flush_size, flush_interval=60
+        )
+        start = time.perf_counter()
+        for batch in batches():
+            buffer.add(batch)
+        buffer.flush()
+        elapsed = time.perf_counter() - start
+        rows.append(
+            [
+                f"buffered (flush every {args.flush_size})",
+                Event.objects.count(),
+                f"{elapsed:.2f}",
+                f"{args.events / elapsed:,.0f}",
+            ]
+        )
+        Event.objects.all().delete()
+
+        start = time.perf_counter()
+        for batch in batches():
+            for event in batch:
+                event.save()
+        elapsed = time.perf_counter() - start
+        rows.append(
+            [
+                "row-at-a-time INSERT",
+                Event.objects.count(),
+                f"{elapsed:.2f}",
+                f"{args.events / elapsed:,.0f}",
+            ]
+        )
+
+        print_table(["strategy", "stored", "seconds", "events/sec"], rows)
+    finally:
+        teardown_django(old_config)
+
+
+if __name__ == "__main__":
+    main()
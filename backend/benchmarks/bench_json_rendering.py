@@ -0,0 +1,128 @@
+"""
+Serialization time and bytes on the wire for users list pages.
+
+Builds ``UserSerializer`` pages of 20, 100 and 1000 users and times, per
+page: serializing the rows, rendering them with DRF's ``JSONRenderer`` and
+with ``ORJSONRenderer``, and compressing the result as
+``CompressionMiddleware`` does (gzip, and Brotli at
+``COMPRESSION_BROTLI_QUALITY``). Bytes are the response body before and
+after compression.
+
+    python -m benchmarks.bench_json_rendering [--sizes 20 100 1000] [--repeat 200]
+"""
+
+import argparse
+import datetime
+
+from benchmarks._setup import (
+    percentile,
+    print_table,
+    setup_django,
+    teardown_django,
+    timed,
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--settings", default="popcornguess.settings_test")
+    args = parser.parse_args()
+
+    old_config = setup_django(args.settings)
+    try:
+        from django.conf import settings
+        from django.utils import timezone
+        from django.utils.text import compress_string
+
+        import brotli
+        from rest_framework.renderers import JSONRenderer
+
+        from popcornguess.middleware import CompressionMiddleware
+        from popcornguess.renderers import ORJSONRenderer
+        from users.models import User
+        from users.serializers import UserSerializer
+
+        now = timezone.now()
+        User.objects.bulk_create(
+            User(
+                email=f"player{i}@example.com",
+                username=f"player{i}",
+                first_name="Player",
+                last_name=f"Number {i}",
+                password="!",
+                date_joined=now - datetime.timedelta(minutes=i),
+                last_login=now,
+                current_streak=i % 30,
+                best_streak=i % 60,
+                last_played_date=now.date(),
+            )
+            for i in range(max(args.sizes))
+        )
+
+        quality = getattr(settings, "COMPRESSION_BROTLI_QUALITY", 4)
+        max_random_bytes = CompressionMiddleware.max_random_bytes
+        stock, fast = JSONRenderer(), ORJSONRenderer()
+        rows = []
+        for size in args.sizes:
+            users = list(User.objects.order_by("-date_joined")[:size])
+            repeat = max(10, args.repeat * 20 // size)
+
+            def serialize() -> object:
+                return UserSerializer(users, many=True).data
+
+            data = {"next": None, "previous": None, "results": serialize()}
+            body = stock.render(data)
+            assert fast.render(data) == body
+            gzipped = compress_string(body, max_random_bytes=max_random_bytes)
+            brotlied = brotli.compress(body, quality=quality)
+
+            samples = {
+                "serialize": timed(serialize, repeat),
+                "json": timed(lambda: stock.render(data), repeat),
+                "orjson": timed(lambda: fast.render(data), repeat),
+                "gzip": timed(
+                    lambda: compress_string(body, max_random_bytes=max_random_bytes),
+                    repeat,
+                ),
+                "br": timed(lambda: brotli.compress(body, quality=quality), repeat),
+            }
+            p50 = {name: percentile(s, 50) for name, s in samples.items()}
+            rows.append(
+                [
+                    size,
+                    f"{p50['serialize']:.3f}",
+                    f"{p50['json']:.3f}",
+                    f"{p50['orjson']:.3f}",
+                    f"{p50['json'] / p50['orjson']:.1f}x",
+                    f"{p50['gzip']:.3f}",
+                    f"{p50['br']:.3f}",
+                    len(body),
+                    len(gzipped),
+                    len(brotlied),
+                ]
+            )
+
+        print(f"p50 milliseconds; Brotli quality {quality}")
+        print_table(
+            [
+                "users",
+                "serialize",
+                "json",
+                "orjson",
+                "speedup",
+                "gzip",
+                "br",
+                "bytes",
+                "gzip bytes",
+                "br bytes",
+            ],
+            rows,
+        )
+    finally:
+        teardown_django(old_config)
+
+
+if __name__ == "__main__":
+    main()
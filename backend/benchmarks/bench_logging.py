@@ -0,0 +1,107 @@
+"""
+Request latency under heavy logging, with and without the log queue.
+
+Simulates ``--requests`` requests that each run one query and log
+``--records`` records through the project's LOGGING setup, with the file
+handler at DEBUG (so every record is written and rotated) and the console
+going to /dev/null. Reports per-request latency with logging done on the
+request thread and with it queued for the listener (`popcornguess.logs`),
+for the text and JSON formats, and the time until the listener has written
+everything.
+
+    python -m benchmarks.bench_logging [--requests 2000] [--records 20]
+"""
+
+import argparse
+import copy
+import logging
+import os
+import tempfile
+import time
+
+from benchmarks._setup import (
+    percentile,
+    print_table,
+    setup_django,
+    teardown_django,
+    timed,
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--records", type=int, default=20)
+    parser.add_argument("--settings", default="popcornguess.settings_test")
+    args = parser.parse_args()
+
+    old_config = setup_django(args.settings)
+    devnull = open(os.devnull, "w")
+    try:
+        from django.conf import settings
+        from django.test import override_settings
+        from django.utils.log import configure_logging
+
+        from popcornguess import logs
+        from users.models import User
+
+        user = User.objects.create_user(email="bench@example.com", username="bench")
+        logger = logging.getLogger("popcornguess.bench")
+
+        def request() -> None:
+            User.objects.filter(pk=user.pk).exists()
+            for number in range(args.records):
+                logger.debug(
+                    "record %d for user %s", number, user.pk, extra={"guess": "heat"}
+                )
+
+        rows = []
+        for fmt in ("text", "json"):
+            for queued in (False, True):
+                directory = tempfile.TemporaryDirectory()
+                config = copy.deepcopy(settings.LOGGING)
+                config["handlers"]["console"]["stream"] = devnull
+                config["handlers"]["file"].update(
+                    level="DEBUG",
+                    filename=os.path.join(directory.name, "django.log"),
+                )
+                if fmt == "json":
+                    config["handlers"]["console"]["formatter"] = "json"
+                    config["handlers"]["file"]["formatter"] = "json"
+                config["loggers"]["popcornguess"]["level"] = "DEBUG"
+                with override_settings(LOG_QUEUE=queued, LOG_DEBUG_SAMPLE_RATE=1.0):
+                    logs.configure(config)
+                timed(request, 100)
+
+                start = time.perf_counter()
+                samples = timed(request, args.requests)
+                served = time.perf_counter() - start
+                logs.stop_listener()
+                written = time.perf_counter() - start
+                logging.getLogger("popcornguess").handlers[0].flush()
+                directory.cleanup()
+
+                rows.append(
+                    [
+                        fmt,
+                        "queue" if queued else "inline",
+                        f"{percentile(samples, 50):.3f}",
+                        f"{percentile(samples, 99):.3f}",
+                        f"{served:.2f}",
+                        f"{written:.2f}",
+                    ]
+                )
+
+        configure_logging(settings.LOGGING_CONFIG, settings.LOGGING)
+        print(f"{args.requests} requests, {args.records} DEBUG records each")
+        print_table(
+            ["format", "logging", "p50 ms", "p99 ms", "served s", "written s"],
+            rows,
+        )
+    finally:
+        devnull.close()
+        teardown_django(old_config)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Per-request cost of the Prometheus metrics middleware.
+
+Times ``--requests`` calls of a stub view with and without
+`popcornguess.middleware.MetricsMiddleware` around it, for a view running
+no queries and one running ``--queries`` primary key lookups (each counted
+by the query wrapper), and reports the difference per request. Checks the
+bound documented in docs/DEPLOYMENT.md: at most ``BOUND_US`` for a view
+without queries, and at most ``BOUND_PCT`` of the time of one with them.
+
+    python -m benchmarks.bench_metrics_overhead [--requests 5000]
+"""
+
+import argparse
+import os
+import statistics
+
+from benchmarks._setup import (
+    percentile,
+    print_table,
+    setup_django,
+    teardown_django,
+    timed,
+)
+
+# Documented ceilings on the middleware's median cost per request
+BOUND_US = 50
+BOUND_PCT = 5
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=5)
+    parser.add_argument("--settings", default="popcornguess.settings_test")
+    args = parser.parse_args()
+
+    old_config = setup_django(args.settings)
+    try:
+        from django.http import HttpResponse
+        from django.test import RequestFactory
+        from django.urls import resolve
+
+        from popcornguess.middleware import MetricsMiddleware
+        from users.models import User
+
+        user = User.objects.create_user(email="bench@example.com", username="bench")
+        request = RequestFactory().get("/api/v1/quizzes/daily/")
+        request.resolver_match = resolve(request.path)
+        response = HttpResponse()
+
+        def no_queries(request: object) -> HttpResponse:
+            return response
+
+        def with_queries(request: object) -> HttpResponse:
+            for _ in range(args.queries):
+                User.objects.filter(pk=user.pk).exists()
+            return response
+
+        rows = []
+        overheads = []
+        for label, view in (
+            ("no queries", no_queries),
+            (f"{args.queries} queries", with_queries),
+        ):
+            middleware = MetricsMiddleware(view)
+            # Warm up label children and statement caches
+            timed(lambda: middleware(request), 100)
+            # Interleaved, so drift in the database's speed hits both alike
+            bare, wrapped = [], []
+            for _ in range(args.requests):
+                bare += timed(lambda: view(request), 1)
+                wrapped += timed(lambda: middleware(request), 1)
+            overhead = (percentile(wrapped, 50) - percentile(bare, 50)) * 1000
+            overheads.append((overhead, 100 * overhead / (percentile(bare, 50) * 1000)))
+            rows.append(
+                [
+                    label,
+                    f"{percentile(bare, 50) * 1000:.1f}",
+                    f"{percentile(wrapped, 50) * 1000:.1f}",
+                    f"{(statistics.fmean(wrapped) - statistics.fmean(bare)) * 1000:.1f}",
+                    f"{overhead:.1f}",
+                    f"{overheads[-1][1]:.1f}%" if view is with_queries else "-",
+                ]
+            )
+
+        mode = (
+            "multiprocess"
+            if os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+            else "single process"
+        )
+        print(f"{args.requests:,} requests per row, {mode}")
+        print_table(
+            [
+                "view",
+                "bare p50 us",
+                "metrics p50 us",
+                "mean overhead us",
+                "p50 overhead us",
+                "p50 overhead",
+            ],
+            rows,
+        )
+        base, with_queries_pct = overheads[0][0], overheads[1][1]
+        within = base <= BOUND_US and with_queries_pct <= BOUND_PCT
+        print(
+            f"{base:.1f}us without queries, {with_queries_pct:.1f}% with: "
+            f"{'within' if within else 'OVER'} the bound "
+            f"({BOUND_US}us, {BOUND_PCT}%)"
+        )
+    finally:
+        teardown_django(old_config)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Login throughput per core at each password hashing cost.
+
+For every hasher and cost setting (Argon2 and bcrypt are skipped when their
+libraries aren't installed), times ``--logins`` password checks on one
+thread, then on the hashing pool (`users.passwords`) with ``--workers``
+threads, and reports logins per second per core. A login is dominated by
+its password check, so these are also the ceilings for the login endpoint.
+
+    python -m benchmarks.bench_password_hashing [--logins 20] [--workers 4]
+"""
+
+import argparse
+import importlib.util
+import os
+import time
+
+from benchmarks._setup import percentile, print_table, setup_django, teardown_django
+
+PASSWORD = "correct horse battery staple"
+
+# (label, hasher, settings overrides, library needed)
+CONFIGS = [
+    (
+        "pbkdf2 260k",
+        "users.hashers.PBKDF2PasswordHasher",
+        {"PASSWORD_PBKDF2_ITERATIONS": 260000},
+        None,
+    ),
+    (
+        "pbkdf2 600k",
+        "users.hashers.PBKDF2PasswordHasher",
+        {"PASSWORD_PBKDF2_ITERATIONS": 600000},
+        None,
+    ),
+    (
+        "pbkdf2 1M",
+        "users.hashers.PBKDF2PasswordHasher",
+        {"PASSWORD_PBKDF2_ITERATIONS": 1000000},
+        None,
+    ),
+    (
+        "argon2 t=2 m=19MiB p=1",
+        "users.hashers.Argon2PasswordHasher",
+        {
+            "PASSWORD_ARGON2_TIME_COST": 2,
+            "PASSWORD_ARGON2_MEMORY_COST": 19456,
+            "PASSWORD_ARGON2_PARALLELISM": 1,
+        },
+        "argon2",
+    ),
+    (
+        "argon2 t=2 m=100MiB p=8",
+        "users.hashers.Argon2PasswordHasher",
+        {
+            "PASSWORD_ARGON2_TIME_COST": 2,
+            "PASSWORD_ARGON2_MEMORY_COST": 102400,
+            "PASSWORD_ARGON2_PARALLELISM": 8,
+        },
+        "argon2",
+    ),
+    (
+        "bcrypt 10",
+        "users.hashers.BCryptSHA256PasswordHasher",
+        {"PASSWORD_BCRYPT_ROUNDS": 10},
+        "bcrypt",
+    ),
+    (
+        "bcrypt 12",
+        "users.hashers.BCryptSHA256PasswordHasher",
+        {"PASSWORD_BCRYPT_ROUNDS": 12},
+        "bcrypt",
+    ),
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--settings", default="popcornguess.settings_test")
+    args = parser.parse_args()
+
+    old_config = setup_django(args.settings)
+    try:
+        from django.contrib.auth import hashers
+        from django.test import override_settings
+
+        from users import passwords
+
+        # The pool can't use more cores than the machine has
+        cores = min(args.workers, os.cpu_count() or 1)
+        rows = []
+        skipped = []
+        for label, hasher, overrides, library in CONFIGS:
+            if library and importlib.util.find_spec(library) is None:
+                skipped.append(label)
+                continue
+            with override_settings(PASSWORD_HASHERS=[hasher], **overrides):
+                encoded = hashers.make_password(PASSWORD)
+                samples = []
+                for _ in range(args.logins):
+                    start = time.perf_counter()
+                    hashers.check_password(PASSWORD, encoded)
+                    samples.append((time.perf_counter() - start) * 1000)
+
+                pool = passwords.HashingPool(
+                    workers=args.workers, max_pending=args.workers
+                )
+                total = args.logins * args.workers
+                start = time.perf_counter()
+                futures = [
+                    pool.submit(hashers.check_password, PASSWORD, encoded, block=True)
+                    for _ in range(total)
+                ]
+                assert all(future.result() for future in futures)
+                pooled = total / (time.perf_counter() - start)
+                pool.shutdown()
+
+            p50 = percentile(samples, 50)
+            rows.append(
+                [
+                    label,
+                    f"{p50:.1f}",
+                    f"{1000 / p50:.1f}",
+                    f"{pooled:.1f}",
+                    f"{pooled / cores:.1f}",
+                ]
+            )
+
+        print(
+            f"{args.logins} logins per thread, "
+            f"pool of {args.workers} threads on {cores} core(s)"
+        )
+        print_table(
+            [
+                "hasher",
+                "p50 ms",
+                "logins/s (1 thread)",
+                "logins/s (pool)",
+                "logins/s per core",
+            ],
+            rows,
+        )
+        if skipped:
+            print(f"skipped (library not installed): {', '.join(skipped)}")
+    finally:
+        teardown_django(old_config)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Per-request cost of the token bucket throttles.
+
+Times ``--requests`` calls of a stub DRF view with no throttles, and with
+the IP, device and user throttles (three bucket checks) against the
+in-process store and, with ``--redis-url``, against Redis. Buckets are
+large enough that no request is refused.
+
+    python -m benchmarks.bench_throttle [--requests 5000] [--redis-url URL]
+"""
+
+import argparse
+import uuid
+
+from benchmarks._setup import (
+    percentile,
+    print_table,
+    setup_django,
+    teardown_django,
+    timed,
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--redis-url", default="")
+    parser.add_argument("--settings", default="popcornguess.settings_test")
+    args = parser.parse_args()
+
+    old_config = setup_django(args.settings)
+    try:
+        from django.conf import settings
+        from django.test import override_settings
+
+        from rest_framework.response import Response
+        from rest_framework.test import APIRequestFactory, force_authenticate
+        from rest_framework.views import APIView
+
+        from popcornguess import throttling
+        from users.models import User
+
+        user = User.objects.create_user(email="bench@example.com", username="bench")
+        response = Response({})
+
+        class Bare(APIView):
+            authentication_classes: list = []
+
+            def get(self, request):  # type: ignore[no-untyped-def]
+                return response
+
+        class Throttled(Bare):
+            throttle_classes = [
+                throttling.IPThrottle,
+                throttling.DeviceThrottle,
+                throttling.UserThrottle,
+            ]
+            throttle_scope = "bench"
+
+        request = APIRequestFactory().get("/")
+        request.device_id = uuid.uuid4()  # type: ignore[attr-defined]
+        force_authenticate(request, user)
+        big = f"{args.requests * 10}/min"
+        rates = {"bench:ip": big, "bench:device": big, "bench:user": big}
+
+        stores = [("memory", "")]
+        if args.redis_url:
+            stores.append(("redis", args.redis_url))
+        rows = []
+        bare_view = Bare.as_view()
+        timed(lambda: bare_view(request), 100)
+        bare = timed(lambda: bare_view(request), args.requests)
+        rows.append(
+            [
+                "no throttles",
+                f"{percentile(bare, 50) * 1000:.1f}",
+                f"{percentile(bare, 99) * 1000:.1f}",
+                "-",
+            ]
+        )
+        for label, url in stores:
+            with override_settings(
+                THROTTLE_REDIS_URL=url,
+                REST_FRAMEWORK={
+                    **settings.REST_FRAMEWORK,
+                    "DEFAULT_THROTTLE_RATES": rates,
+                },
+            ):
+                throttling.reset_store()
+                view = Throttled.as_view()
+                timed(lambda: view(request), 100)
+                samples = timed(lambda: view(request), args.requests)
+            overhead = (percentile(samples, 50) - percentile(bare, 50)) * 1000
+            rows.append(
+                [
+                    f"3 throttles, {label}",
+                    f"{percentile(samples, 50) * 1000:.1f}",
+                    f"{percentile(samples, 99) * 1000:.1f}",
+                    f"{overhead:.1f}",
+                ]
+            )
+        throttling.reset_store()
+
+        print(f"{args.requests} requests")
+        print_table(["view", "p50 µs", "p99 µs", "overhead µs"], rows)
+    finally:
+        teardown_django(old_config)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Fuzzy title matching: trigram index vs. brute-force edit distance scan.
+
+Builds synthetic catalogues of 1k, 10k and 100k titles and times ``match()``
+for a mix of exact guesses, typos and misses. The brute-force baseline
+computes the edit distance against every title, which is what a naive
+per-request scan over a queryset amounts to (minus the database I/O).
+
+    python -m benchmarks.bench_title_matching [--sizes 1000 10000 100000]
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from benchmarks._setup import percentile, print_table
+
+WORDS = (
+    "dark night return king lord ring star war empire strike back matrix "
+    "godfather pulp fiction fight club forrest gump inception interstellar "
+    "jurassic park titanic avatar alien predator terminator rocky rambo "
+    "shining psycho vertigo casablanca goodfellas gladiator braveheart "
+    "batman superman spider man iron hulk thor captain america black widow "
+    "frozen toy story finding nemo cars up coco soul inside out monsters "
+    "breaking bad better call saul wire sopranos office friends lost "
+    "game thrones house dragon crown succession mandalorian stranger things "
+    "dune arrival blade runner heat collateral drive nightcrawler prestige"
+).split()
+
+
+CONSONANTS = "bcdfghjklmnprstvwz"
+VOWELS = "aeiouy"
+
+
+def make_vocabulary(size: int, rng: random.Random) -> list[str]:
+    """
+    Return real title words plus pseudo-words, so trigram frequencies look
+    more like a real catalogue than a handful of repeated words would.
+    """
+    words = set(WORDS)
+    while len(words) < size:
+        words.add(
+            "".join(
+                rng.choice(CONSONANTS) + rng.choice(VOWELS)
+                for _ in range(rng.randint(2, 4))
+            )
+        )
+    return sorted(words)
+
+
+def make_titles(count: int, seed: int = 7) -> list[str]:
+    """
+    Generate ``count`` distinct pseudo-titles of one to five words.
+    """
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(max(len(WORDS), count // 4), rng)
+    titles: set[str] = set()
+    while len(titles) < count:
+        words = rng.sample(vocabulary, rng.randint(1, 5))
+        titles.add(" ".join(words).title())
+    return sorted(titles)
+
+
+def make_typo(title: str, rng: random.Random) -> str:
+    """
+    Swap two adjacent letters somewhere in a title.
+    """
+    chars = list(title)
+    index = rng.randrange(1, len(chars) - 2)
+    chars[index], chars[index + 1] = chars[index + 1], chars[index]
+    return "".join(chars)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument(
+        "--brute-queries",
+        type=int,
+        default=3,
+        help="Queries for the brute-force baseline, which is much slower.",
+    )
+    args = parser.parse_args()
+
+    # Matching doesn't touch the database; settings are only needed for
+    # the threshold defaults.
+    from django.conf import settings
+
+    settings.configure()
+
+    from quizzes.matching import TitleIndex, TitleRecord, normalize_title, similarity
+
+    rows = []
+    for size in args.sizes:
+        titles = make_titles(size)
+        rng = random.Random(size)
+        start = time.perf_counter()
+        index = TitleIndex(
+            TitleRecord(i, name, rng.randint(0, 10_000))
+            for i, name in enumerate(titles)
+        )
+        build_ms = (time.perf_counter() - start) * 1000
+
+        picks = [rng.choice(titles) for _ in range(args.queries)]
+        guesses = [
+            pick if i % 3 == 0 else make_typo(pick, rng) if i % 3 == 1 else "zzz qqq"
+            for i, pick in enumerate(picks)
+        ]
+
+        indexed = []
+        hits = 0
+        for guess in guesses:
+            start = time.perf_counter()
+            result = index.match(guess)
+            indexed.append((time.perf_counter() - start) * 1000)
+            hits += result is not None
+
+        normalized = [normalize_title(title) for title in titles]
+        brute = []
+        for guess in guesses[: args.brute_queries]:
+            start = time.perf_counter()
+            query = normalize_title(guess)
+            max(normalized, key=lambda candidate: similarity(query, candidate))
+            brute.append((time.perf_counter() - start) * 1000)
+
+        rows.append(
+            [
+                size,
+                f"{build_ms:.0f}",
+                f"{statistics.fmean(indexed):.3f}",
+                f"{percentile(indexed, 99):.3f}",
+                f"{hits}/{len(guesses)}",
+                f"{statistics.fmean(brute):.1f}",
+                f"{statistics.fmean(brute) / statistics.fmean(indexed):.0f}x",
+            ]
+        )
+
+    print_table(
+        [
+            "titles",
+            "build ms",
+            "index mean ms",
+            "index p99 ms",
+            "matched",
+            "brute mean ms",
+            "speedup",
+        ],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
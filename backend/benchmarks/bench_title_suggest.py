@@ -0,0 +1,108 @@
+"""
+Per-keystroke latency of title suggestions.
+
+Types random catalogue titles one character at a time and times each
+suggestion lookup, both against the suggester directly and through the
+``/api/v1/quizzes/titles/suggest/`` view. Memoization is reset before each
+run so the first sample per prefix pays the full ranking cost.
+
+    python -m benchmarks.bench_title_suggest [--sizes 1000 10000 100000]
+"""
+
+import argparse
+import random
+import time
+
+from benchmarks._setup import percentile, print_table, setup_django, teardown_django
+from benchmarks.bench_title_matching import make_titles
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--words", type=int, default=200, help="Titles typed.")
+    args = parser.parse_args()
+
+    old_config = setup_django()
+    try:
+        from django.test import RequestFactory
+
+        from asgiref.sync import async_to_sync
+
+        from quizzes import suggest
+        from quizzes.matching import TitleRecord
+        from quizzes.views import title_suggestions
+
+        factory = RequestFactory()
+        view = async_to_sync(title_suggestions)
+        rows = []
+        for size in args.sizes:
+            titles = make_titles(size)
+            rng = random.Random(size)
+            records = [
+                TitleRecord(i, name, rng.randint(0, 10_000))
+                for i, name in enumerate(titles)
+            ]
+            start = time.perf_counter()
+            suggester = suggest.TitleSuggester(records)
+            build_ms = (time.perf_counter() - start) * 1000
+            suggest._suggester = suggester
+
+            queries = [
+                title[:length]
+                for title in rng.sample(titles, args.words)
+                for length in range(1, min(len(title), 12) + 1)
+            ]
+
+            direct = []
+            for query in queries:
+                start = time.perf_counter()
+                suggester.suggest(query)
+                direct.append((time.perf_counter() - start) * 1000)
+
+            suggester._state.memo.clear()
+            via_view = []
+            for query in queries:
+                request = factory.get("/api/v1/quizzes/titles/suggest/", {"q": query})
+                start = time.perf_counter()
+                view(request)
+                via_view.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            for i in range(100):
+                suggester.add(TitleRecord(size + i, f"New Release {i}", 1))
+            add_ms = (time.perf_counter() - start) * 1000 / 100
+
+            rows.append(
+                [
+                    size,
+                    len(queries),
+                    f"{build_ms:.0f}",
+                    f"{percentile(direct, 50):.4f}",
+                    f"{percentile(direct, 99):.4f}",
+                    f"{percentile(via_view, 50):.4f}",
+                    f"{percentile(via_view, 99):.4f}",
+                    f"{add_ms:.3f}",
+                ]
+            )
+        suggest.reset_suggester()
+
+        print_table(
+            [
+                "titles",
+                "keystrokes",
+                "build ms",
+                "p50 ms",
+                "p99 ms",
+                "view p50 ms",
+                "view p99 ms",
+                "add ms",
+            ],
+            rows,
+        )
+    finally:
+        teardown_django(old_config)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Throughput and memory of the bulk user import and export commands.
+
+Writes ``--users`` records (one million by default) to a temporary CSV or
+JSON Lines file, loads them with ``import_users``, writes them back out
+with ``export_users``, and reports rows per second and the process's peak
+RSS after each phase. The commands' own memory depends on ``--batch-size``
+and ``--chunk-size``, not on ``--users``, but the in-memory SQLite of the
+test settings lives in the same process and grows with the table; point
+``--settings`` at PostgreSQL to see flat RSS. The test settings hash with
+MD5, so this measures I/O and inserts; hashing cost is measured by
+``bench_password_hashing``.
+
+    python -m benchmarks.bench_user_import [--users 1000000] [--format jsonl]
+"""
+
+import argparse
+import csv
+import json
+import os
+import tempfile
+import time
+
+from benchmarks._setup import print_table, setup_django, teardown_django
+
+
+def write_input(path: str, fmt: str, count: int) -> None:
+    fields = ["email", "username", "first_name", "password"]
+    with open(path, "w", newline="") as stream:
+        writer = csv.writer(stream, lineterminator="\n")
+        if fmt == "csv":
+            writer.writerow(fields)
+        for n in range(count):
+            row = [f"user{n}@example.com", f"user{n}", f"User {n}", f"password-{n}"]
+            if fmt == "csv":
+                writer.writerow(row)
+            else:
+                stream.write(json.dumps(dict(zip(fields, row))) + "\n")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    parser.add_argument("--settings", default="popcornguess.settings_test")
+    args = parser.parse_args()
+
+    old_config = setup_django(args.settings)
+    try:
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        from users.bulk import peak_rss_mb
+        from users.models import User
+
+        rows = []
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, f"in.{args.format}")
+            target = os.path.join(directory, f"out.{args.format}")
+
+            def phase(label: str, func) -> None:  # type: ignore[no-untyped-def]
+                start = time.perf_counter()
+                func()
+                elapsed = time.perf_counter() - start
+                rows.append(
+                    [
+                        label,
+                        f"{elapsed:.1f}",
+                        f"{args.users / elapsed:,.0f}",
+                        f"{peak_rss_mb():.0f}",
+                    ]
+                )
+
+            rows.append(["(start)", "", "", f"{peak_rss_mb():.0f}"])
+            phase("generate", lambda: write_input(source, args.format, args.users))
+            phase(
+                "import_users",
+                lambda: call_command(
+                    "import_users",
+                    source,
+                    batch_size=args.batch_size,
+                    stdout=StringIO(),
+                ),
+            )
+            assert User.objects.count() == args.users
+            phase(
+                "export_users",
+                lambda: call_command(
+                    "export_users",
+                    target,
+                    chunk_size=args.chunk_size,
+                    stdout=StringIO(),
+                ),
+            )
+            size = os.path.getsize(source) / (1024 * 1024)
+
+        print(f"{args.users:,} users, {args.format} ({size:.0f} MiB)")
+        print_table(["phase", "seconds", "rows/s", "peak RSS MiB"], rows)
+    finally:
+        teardown_django(old_config)
+
+
+if __name__ == "__main__":
+    main()
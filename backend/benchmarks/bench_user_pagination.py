@@ -0,0 +1,111 @@
+"""
+Deep-page latency of the users list: page numbers vs. keyset cursors.
+
+Fills the ``users`` table with ``--rows`` rows (1M by default; the insert
+takes a while) and times fetching pages at increasing depths with DRF's
+``PageNumberPagination`` (``COUNT(*)`` + ``OFFSET``) and with
+``UserCursorPagination`` (one indexed range scan). Run it with a PostgreSQL
+``DATABASE_URL`` and ``--settings popcornguess.settings`` for production
+numbers.
+
+    python -m benchmarks.bench_user_pagination [--rows 1000000] [--repeat 5]
+"""
+
+import argparse
+import datetime
+
+from benchmarks._setup import (
+    percentile,
+    print_table,
+    setup_django,
+    teardown_django,
+    timed,
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument(
+        "--depths", type=int, nargs="+", default=[1, 100, 1000, 10000, 40000]
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--settings", default="popcornguess.settings_test")
+    args = parser.parse_args()
+
+    old_config = setup_django(args.settings)
+    try:
+        from django.utils import timezone
+
+        from rest_framework.pagination import PageNumberPagination
+        from rest_framework.request import Request
+        from rest_framework.test import APIRequestFactory
+
+        from users.models import User
+        from users.pagination import UserCursorPagination
+
+        start = timezone.now() - datetime.timedelta(days=365)
+        batch = []
+        for i in range(args.rows):
+            batch.append(
+                User(
+                    email=f"player{i}@example.com",
+                    username=f"player{i}",
+                    password="!",
+                    # A few users share each second, like a signup burst
+                    date_joined=start + datetime.timedelta(seconds=i // 3),
+                )
+            )
+            if len(batch) == 10_000:
+                User.objects.bulk_create(batch)
+                batch = []
+        User.objects.bulk_create(batch)
+
+        factory = APIRequestFactory()
+        ordered = User.objects.order_by("-date_joined", "-id")
+        rows = []
+        for depth in args.depths:
+            offset = (depth - 1) * args.page_size
+            if offset >= args.rows:
+                continue
+
+            numbered = PageNumberPagination()
+            numbered.page_size = args.page_size
+            page_request = Request(factory.get("/users/", {"page": depth}))
+
+            def fetch_numbered() -> None:
+                list(numbered.paginate_queryset(ordered, page_request))
+
+            keyset = UserCursorPagination()
+            cursor_request = Request(factory.get("/users/"))
+            if depth > 1:
+                # The cursor a client would hold after reading the page before
+                keyset.paginate_queryset(User.objects.all(), cursor_request)
+                keyset.page = [ordered[offset - 1]]
+                keyset.has_next = True
+                cursor_request = Request(factory.get(keyset.get_next_link()))
+
+            def fetch_keyset() -> None:
+                UserCursorPagination().paginate_queryset(
+                    User.objects.all(), cursor_request
+                )
+
+            numbered_ms = timed(fetch_numbered, args.repeat)
+            keyset_ms = timed(fetch_keyset, args.repeat)
+            rows.append(
+                [
+                    depth,
+                    f"{percentile(numbered_ms, 50):.2f}",
+                    f"{percentile(keyset_ms, 50):.2f}",
+                ]
+            )
+
+        print(f"{args.rows:,} users, {args.page_size} per page (p50 of {args.repeat})")
+        print_table(["page", "page number ms", "keyset ms"], rows)
+    finally:
+        teardown_django(old_config)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Rows per second of the users read path: UserSerializer vs. UserReadSerializer.
+
+Times fetching and serializing ``--rows`` users (1000 by default), the way
+a large list page does, with ``UserSerializer`` over model instances and
+with ``UserReadSerializer`` over ``.values()`` rows. The fetch and the
+serialization are also timed on their own.
+
+    python -m benchmarks.bench_user_serialization [--rows 1000] [--repeat 50]
+"""
+
+import argparse
+
+from benchmarks._setup import (
+    percentile,
+    print_table,
+    setup_django,
+    teardown_django,
+    timed,
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--settings", default="popcornguess.settings_test")
+    args = parser.parse_args()
+
+    old_config = setup_django(args.settings)
+    try:
+        from django.utils import timezone
+
+        from users.models import User
+        from users.serializers import UserReadSerializer, UserSerializer
+
+        now = timezone.now()
+        User.objects.bulk_create(
+            User(
+                email=f"player{i}@example.com",
+                username=f"player{i}",
+                password="!",
+                last_login=now if i % 2 else None,
+                current_streak=i % 30,
+                best_streak=i % 60,
+                last_played_date=now.date() if i % 3 else None,
+            )
+            for i in range(args.rows)
+        )
+        queryset = User.objects.order_by("-date_joined", "-id")[: args.rows]
+        users = list(queryset)
+        rows = list(UserReadSerializer.values(queryset))
+        assert UserReadSerializer(rows, many=True).data == (
+            UserSerializer(users, many=True).data
+        )
+
+        paths = {
+            "UserSerializer": {
+                "fetch": lambda: list(queryset.all()),
+                "serialize": lambda: UserSerializer(users, many=True).data,
+                "both": lambda: UserSerializer(list(queryset.all()), many=True).data,
+            },
+            "UserReadSerializer": {
+                "fetch": lambda: list(UserReadSerializer.values(queryset)),
+                "serialize": lambda: UserReadSerializer(rows, many=True).data,
+                "both": lambda: UserReadSerializer(
+                    list(UserReadSerializer.values(queryset)), many=True
+                ).data,
+            },
+        }
+        table = []
+        for label, steps in paths.items():
+            p50 = {}
+            for step, func in steps.items():
+                timed(func, 3)
+                p50[step] = percentile(timed(func, args.repeat), 50)
+            table.append(
+                [
+                    label,
+                    f"{p50['fetch']:.2f}",
+                    f"{p50['serialize']:.2f}",
+                    f"{p50['both']:.2f}",
+                    f"{args.rows / p50['both'] * 1000:,.0f}",
+                ]
+            )
+
+        print(f"{args.rows} rows, p50 milliseconds")
+        print_table(["path", "fetch", "serialize", "total", "rows/s"], table)
+    finally:
+        teardown_django(old_config)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Concurrent-connection load test of the gameplay endpoints, WSGI vs ASGI.
+
+Opens ``--connections`` keep-alive connections (1000 by default) to each
+target and has every one of them fetch ``--paths`` in a loop for
+``--duration`` seconds, then reports throughput, latency percentiles and
+errors per target. ``--slow-ms`` makes each client pause between the
+request line and its headers, like a phone on a poor network: a sync
+worker thread is held for the whole pause, an event loop task is not.
+
+The servers are started separately, with the same number of processes,
+against the same database and a warm cache (see docs/DEPLOYMENT.md):
+
+    gunicorn popcornguess.wsgi -b :8001 -w 4 -k gthread --threads 8
+    gunicorn popcornguess.asgi -b :8002 -w 4 -k uvicorn_worker.UvicornWorker
+    python -m benchmarks.load_gameplay \\
+        --target wsgi=http://127.0.0.1:8001 --target asgi=http://127.0.0.1:8002
+
+Raise the open file limit (``ulimit -n 4096``) on both sides first.
+"""
+
+import argparse
+import asyncio
+import resource
+import time
+from urllib.parse import urlsplit
+
+from benchmarks._setup import percentile, print_table
+
+DEFAULT_PATHS = [
+    "/api/v1/quizzes/daily/",
+    "/api/v1/quizzes/titles/suggest/?q=the",
+]
+
+
+class Stats:
+    """Latencies (milliseconds) and failures collected for one target."""
+
+    def __init__(self) -> None:
+        self.latencies: list[float] = []
+        self.errors = 0
+        self.statuses: dict[int, int] = {}
+
+
+async def read_response(reader: asyncio.StreamReader) -> int:
+    """
+    Read one HTTP/1.1 response and return its status code.
+    """
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    if headers.get("transfer-encoding") == "chunked":
+        while True:
+            size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    else:
+        await reader.readexactly(int(headers.get("content-length", 0)))
+    return status
+
+
+async def client(
+    host: str,
+    port: int,
+    paths: list[str],
+    deadline: float,
+    slow: float,
+    stats: Stats,
+) -> None:
+    """
+    Fetch ``paths`` in turn over one connection until ``deadline``,
+    reconnecting after errors.
+    """
+    writer = None
+    index = 0
+    while time.perf_counter() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            path = paths[index % len(paths)]
+            index += 1
+            start = time.perf_counter()
+            writer.write(f"GET {path} HTTP/1.1\r\n".encode())
+            if slow:
+                await writer.drain()
+                await asyncio.sleep(slow)
+            writer.write(f"Host: {host}\r\nAccept: application/json\r\n\r\n".encode())
+            await writer.drain()
+            status = await read_response(reader)
+            stats.latencies.append((time.perf_counter() - start) * 1000)
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+        except (OSError, ValueError, IndexError, asyncio.IncompleteReadError):
+            stats.errors += 1
+            if writer is not None:
+                writer.close()
+                writer = None
+            await asyncio.sleep(0.05)
+    if writer is not None:
+        writer.close()
+
+
+async def run_target(
+    url: str, connections: int, paths: list[str], duration: float, slow: float
+) -> tuple[Stats, float]:
+    """
+    Load one server and return its stats and the elapsed wall time.
+    """
+    parts = urlsplit(url)
+    stats = Stats()
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(
+        *(
+            client(
+                parts.hostname or "127.0.0.1",
+                parts.port or 80,
+                paths,
+                deadline,
+                slow,
+                stats,
+            )
+            for _ in range(connections)
+        )
+    )
+    return stats, time.perf_counter() - start
+
+
+def raise_file_limit(needed: int) -> None:
+    """
+    Raise the soft open file limit towards ``needed`` where allowed.
+    """
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < needed:
+        target = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--target",
+        action="append",
+        required=True,
+        metavar="LABEL=URL",
+        help="a server to load, e.g. asgi=http://127.0.0.1:8002",
+    )
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--slow-ms", type=float, default=0.0)
+    parser.add_argument("--paths", nargs="+", default=DEFAULT_PATHS)
+    args = parser.parse_args()
+
+    raise_file_limit(args.connections + 64)
+    rows = []
+    for target in args.target:
+        label, _, url = target.partition("=")
+        stats, elapsed = asyncio.run(
+            run_target(
+                url, args.connections, args.paths, args.duration, args.slow_ms / 1000
+            )
+        )
+        ok = sum(n for status, n in stats.statuses.items() if status < 400)
+        rows.append(
+            [
+                label,
+                f"{len(stats.latencies) / elapsed:,.0f}",
+                f"{percentile(stats.latencies, 50):.1f}",
+                f"{percentile(stats.latencies, 99):.1f}",
+                f"{max(stats.latencies, default=0.0):.1f}",
+                len(stats.latencies) - ok,
+                stats.errors,
+            ]
+        )
+
+    print(
+        f"{args.connections} connections for {args.duration:.0f}s, "
+        f"{args.slow_ms:.0f}ms client delay"
+    )
+    print_table(
+        ["server", "req/s", "p50 ms", "p99 ms", "max ms", "http errors", "io errors"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+#!/bin/sh
+# Production entrypoint: apply migrations, collect static files and start
+# Gunicorn with the settings in gunicorn.conf.py. Any arguments replace the
+# server command (e.g. "python manage.py shell").
+set -e
+
+export DJANGO_SETTINGS_MODULE="${DJANGO_SETTINGS_MODULE:-popcornguess.settings_production}"
+
+if [ "${RUN_MIGRATIONS:-true}" = "true" ]; then
+    python manage.py migrate --noinput
+fi
+python manage.py collectstatic --noinput --verbosity 0
+
+if [ "$#" -gt 0 ]; then
+    exec "$@"
+fi
+# Workers write their Prometheus metrics here for /metrics to add up; start
+# from an empty directory so a previous run's counters don't linger
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus}"
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+exec gunicorn --config gunicorn.conf.py
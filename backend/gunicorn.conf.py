@@ -0,0 +1,46 @@
+"""
+Gunicorn configuration, read from the working directory at startup.
+
+Every value can be overridden from the environment; see docs/DEPLOYMENT.md
+for how to size workers and database connections.
+"""
+
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+
+# 2 x cores + 1: one worker per core is busy while another waits on I/O
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count() * 2 + 1)))
+
+if os.getenv("SERVER_INTERFACE", "asgi") == "asgi":
+    wsgi_app = "popcornguess.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+else:
+    wsgi_app = "popcornguess.wsgi:application"
+    worker_class = "gthread"
+    threads = int(os.getenv("GUNICORN_THREADS", "8"))
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then so slow leaks can't build up; the jitter
+# keeps them from restarting all at once
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "10000"))
+max_requests_jitter = max_requests // 10
+
+# Trust X-Forwarded-* from the proxy in front of the container
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "*")
+
+accesslog = "-"
+errorlog = "-"
+
+
+def child_exit(server, worker):  # type: ignore[no-untyped-def]
+    # Drop a dead worker's live gauges (e.g. requests in flight) from the
+    # aggregated Prometheus metrics (see popcornguess.metrics)
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,122 @@
+"""
+Caching of serialized API responses.
+
+`cache_response` caches what a viewset method returns for a GET, keyed by
+the object it shows, the requesting user and the query string. Entries of
+an object are keyed under a version: a random token stored in the cache
+next to them. `invalidate` drops the version, which orphans every entry of
+the object at once, whatever the users and query strings they were cached
+for; they expire on their own.
+
+Models whose responses are cached must call `invalidate` whenever a row
+changes, from post_save and post_delete receivers and after queryset
+updates, which send no signals (see ``users.signals`` for the users).
+
+Lookups are counted in the ``popcornguess_cache_lookups_total`` metric as
+``cache="response:<app_label>.<model>"``.
+"""
+
+import functools
+import hashlib
+import uuid
+from collections.abc import Callable
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, transaction
+
+from rest_framework.response import Response
+
+from popcornguess import metrics
+
+KEY_PREFIX = "responses:"
+
+
+def get_timeout() -> int:
+    """
+    Return how long (in seconds) a response stays cached by default.
+    """
+    return int(getattr(settings, "RESPONSE_CACHE_TIMEOUT", 60))
+
+
+def version_key(model: type[models.Model], object_id: Any) -> str:
+    return f"{KEY_PREFIX}{model._meta.label_lower}:{object_id}:version"
+
+
+def get_version(model: type[models.Model], object_id: Any, timeout: int) -> str:
+    """
+    Return the current version of an object's entries, starting a new one
+    if it has none.
+    """
+    key = version_key(model, object_id)
+    version = cache.get(key)
+    if version is None:
+        # Never reused, so entries orphaned by `invalidate` stay orphaned
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, timeout):
+            version = cache.get(key, version)
+    return version  # type: ignore[no-any-return]
+
+
+def invalidate(model: type[models.Model], *object_ids: Any) -> None:
+    """
+    Drop the cached responses of the given objects, now and again when the
+    surrounding transaction commits: a request may cache what it read in
+    between.
+    """
+    keys = [version_key(model, object_id) for object_id in object_ids]
+    if keys:
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def response_key(view: Any, request: Any, version: str) -> str:
+    """
+    Return the cache key of a view method's response to a request.
+    """
+    user = request.user.pk if request.user.is_authenticated else "anon"
+    params = sorted(request.query_params.lists())
+    digest = hashlib.md5(repr(params).encode(), usedforsecurity=False).hexdigest()
+    return f"{KEY_PREFIX}{view.basename}:{view.action}:{version}:{user}:{digest}"
+
+
+def cache_response(
+    model: type[models.Model],
+    *,
+    object_id: Callable[[Any], Any] | None = None,
+    timeout: int | None = None,
+) -> Callable:
+    """
+    Cache the data of successful GET responses of a viewset method.
+
+    ``object_id`` takes the view and returns the id of the ``model`` row the
+    response shows (by default the URL's lookup value); the response is
+    dropped when that row is invalidated.
+    """
+
+    def decorator(method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(view: Any, request: Any, *args: Any, **kwargs: Any) -> Any:
+            if request.method not in ("GET", "HEAD"):
+                return method(view, request, *args, **kwargs)
+            if object_id is not None:
+                pk = object_id(view)
+            else:
+                pk = view.kwargs[view.lookup_url_kwarg or view.lookup_field]
+            ttl = get_timeout() if timeout is None else timeout
+            key = response_key(view, request, get_version(model, pk, ttl))
+            data = cache.get(key)
+            metrics.record_cache_lookup(
+                f"response:{model._meta.label_lower}", data is not None
+            )
+            if data is not None:
+                return Response(data)
+            response = method(view, request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, ttl)
+            return response
+
+        return wrapper
+
+    return decorator
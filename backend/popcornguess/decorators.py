@@ -0,0 +1,48 @@
+"""
+View decorators for async views.
+
+Django 4.2's `require_http_methods` wraps views in a sync function, which
+turns an async view back into a sync one; these keep the view a coroutine.
+"""
+
+import functools
+from collections.abc import Callable, Coroutine, Iterable
+from typing import Any
+
+from django.http import HttpRequest, HttpResponse, HttpResponseNotAllowed
+from django.utils.log import log_response
+
+AsyncView = Callable[..., Coroutine[Any, Any, HttpResponse]]
+
+
+def require_http_methods_async(
+    methods: Iterable[str],
+) -> Callable[[AsyncView], AsyncView]:
+    """
+    Async counterpart of `django.views.decorators.http.require_http_methods`.
+    """
+    allowed = list(methods)
+
+    def decorator(view: AsyncView) -> AsyncView:
+        @functools.wraps(view)
+        async def inner(
+            request: HttpRequest, *args: Any, **kwargs: Any
+        ) -> HttpResponse:
+            if request.method not in allowed:
+                response = HttpResponseNotAllowed(allowed)
+                log_response(
+                    "Method Not Allowed (%s): %s",
+                    request.method,
+                    request.path,
+                    response=response,
+                    request=request,
+                )
+                return response
+            return await view(request, *args, **kwargs)
+
+        return inner
+
+    return decorator
+
+
+require_safe_async = require_http_methods_async(["GET", "HEAD"])
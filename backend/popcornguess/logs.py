@@ -0,0 +1,214 @@
+"""
+Logging off the request path.
+
+With ``LOG_QUEUE`` on, `configure` (Django's ``LOGGING_CONFIG``) applies
+``LOGGING`` as usual and then gives every logger it configures a
+`QueueHandler` in place of its handlers. A log call then only snapshots
+the record and puts it on a queue; a single listener thread per process
+formats it and hands it to the original handlers, so file writes,
+rotation checks and console output never block a request.
+
+Also here:
+
+* `JSONFormatter`, one JSON object per line (``LOG_FORMAT = "json"``);
+* `SampleFilter`, which keeps a fraction of DEBUG records
+  (``LOG_DEBUG_SAMPLE_RATE``) before they are queued;
+* `RotatingFileHandler`, which creates its directory on first write
+  rather than when settings are imported.
+"""
+
+import atexit
+import copy
+import datetime
+import json
+import logging
+import logging.config
+import logging.handlers
+import os
+import queue
+import random
+import threading
+import weakref
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+from django.conf import settings
+
+# Attributes every LogRecord has; the rest were passed in ``extra``
+_RECORD_ATTRIBUTES = frozenset(
+    vars(logging.LogRecord("", 0, "", 0, "", None, None)).keys()
+) | {"message", "asctime", "handlers"}
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Format records as single-line JSON objects, including ``extra`` fields.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.datetime.fromtimestamp(
+                record.created, datetime.timezone.utc
+            ).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "process": record.process,
+            "thread": record.thread,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        return json.dumps(entry, default=str)
+
+
+class SampleFilter(logging.Filter):
+    """
+    Pass every record above ``level``, and a random ``rate`` (0-1) of the
+    rest, to keep chatty debug logging affordable.
+    """
+
+    def __init__(self, rate: float = 1.0, level: int | str = logging.DEBUG) -> None:
+        super().__init__()
+        self.rate = rate
+        self.level = logging._checkLevel(level)  # type: ignore[attr-defined]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.level or self.rate >= 1:
+            return True
+        return random.random() < self.rate
+
+
+class RotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    RotatingFileHandler that creates the log directory when it first opens
+    the file. Use with ``delay=True`` so nothing touches the disk until a
+    record is written.
+    """
+
+    def _open(self):  # type: ignore[no-untyped-def]
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+    """
+    Put records on the listener's queue, addressed to ``handlers``.
+    """
+
+    def __init__(self, log_queue: queue.Queue, handlers: Iterable[logging.Handler]):
+        super().__init__(log_queue)
+        self.handlers = tuple(handlers)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only merge the arguments (which may change once the call returns)
+        # and render the traceback here; the handlers' formatters run on
+        # the listener thread
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.handlers = self.handlers
+        return record
+
+
+class QueueListener(logging.handlers.QueueListener):
+    """
+    Hand each record to the handlers its QueueHandler addressed it to.
+    """
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+
+    def handle(self, record: logging.LogRecord) -> None:
+        for handler in record.__dict__.pop("handlers", ()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+        # Hand the GIL back between records, so a request thread never waits
+        # a whole switch interval (5ms) behind a backlog of formatting; on
+        # one core this keeps queued p99 near inline's (benchmarks.bench_logging)
+        if hasattr(os, "sched_yield"):
+            os.sched_yield()
+
+
+_queue: queue.Queue = queue.Queue(-1)
+_listener: QueueListener | None = None
+_lock = threading.Lock()
+# Handlers installed by `configure`, so a forked child can point them at
+# a fresh queue
+_queue_handlers: "weakref.WeakSet[QueueHandler]" = weakref.WeakSet()
+
+
+def start_listener() -> None:
+    """
+    Start this process's listener thread, if it isn't running.
+    """
+    global _listener
+    with _lock:
+        if _listener is None:
+            _listener = QueueListener(_queue)
+            _listener.start()
+
+
+def stop_listener() -> None:
+    """
+    Write out every queued record and stop the listener thread.
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def _restart_after_fork() -> None:
+    # Only the forking thread survives fork(): the child gets no listener,
+    # and the queue may hold the parent's records or a lock the listener
+    # held, so it starts over with a new queue and listener
+    global _queue, _listener, _lock
+    _lock = threading.Lock()
+    if _listener is None:
+        return
+    _queue = queue.Queue(-1)
+    for handler in _queue_handlers:
+        handler.queue = _queue
+    _listener = None
+    start_listener()
+
+
+atexit.register(stop_listener)
+os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def configure(config: dict[str, Any]) -> None:
+    """
+    Apply a dictConfig and, with ``LOG_QUEUE``, move the configured
+    loggers' handlers behind the queue.
+    """
+    # Write out what is queued before dictConfig closes the handlers
+    stop_listener()
+    logging.config.dictConfig(config)
+    if not getattr(settings, "LOG_QUEUE", False):
+        return
+    sample_rate = float(getattr(settings, "LOG_DEBUG_SAMPLE_RATE", 1.0))
+    names = list(config.get("loggers", {}))
+    if "root" in config:
+        names.append("")
+    for name in names:
+        logger = logging.getLogger(name)
+        handlers = [h for h in logger.handlers if not isinstance(h, QueueHandler)]
+        if not handlers:
+            continue
+        queue_handler = QueueHandler(_queue, handlers)
+        if sample_rate < 1:
+            queue_handler.addFilter(SampleFilter(sample_rate))
+        _queue_handlers.add(queue_handler)
+        logger.handlers = [queue_handler]
+    start_listener()
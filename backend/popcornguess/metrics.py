@@ -0,0 +1,146 @@
+"""
+Prometheus metrics, served at ``/metrics``.
+
+`middleware.MetricsMiddleware` records, per view (URL name):
+
+* ``popcornguess_http_request_duration_seconds``: latency histogram, also
+  by method and status code;
+* ``popcornguess_http_requests_in_flight``: requests being served;
+* ``popcornguess_http_request_db_queries`` and
+  ``popcornguess_http_request_db_seconds_total``: SQL queries per request
+  and time spent in them (see `queries`).
+
+The apps add cache lookups by cache and result (for hit ratios), guesses
+and completed puzzles, whose rates are the gameplay throughput.
+
+Each Gunicorn worker is a separate process with its own counters. Setting
+``PROMETHEUS_MULTIPROC_DIR`` (to an empty directory, before the workers
+start) makes them write their values there, and ``/metrics`` adds them up
+across workers.
+"""
+
+import os
+from typing import Any
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_safe
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Label for requests that matched no URL, so stray paths can't create
+# unbounded label values
+UNMATCHED = "<unmatched>"
+METHODS = frozenset(["GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"])
+
+REQUEST_LATENCY = Histogram(
+    "popcornguess_http_request_duration_seconds",
+    "Time to serve a request, through the whole middleware stack.",
+    ["view", "method", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "popcornguess_http_requests_in_flight",
+    "Requests currently being served.",
+    multiprocess_mode="livesum",
+)
+REQUEST_DB_QUERIES = Histogram(
+    "popcornguess_http_request_db_queries",
+    "SQL queries run per request.",
+    ["view"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+REQUEST_DB_SECONDS = Counter(
+    "popcornguess_http_request_db_seconds",
+    "Time spent waiting on SQL queries.",
+    ["view"],
+)
+CACHE_LOOKUPS = Counter(
+    "popcornguess_cache_lookups",
+    "Cache lookups, by cache and whether they hit.",
+    ["cache", "result"],
+)
+GUESSES = Counter(
+    "popcornguess_guesses",
+    "Guesses checked against the title catalogue, by whether they matched.",
+    ["result"],
+)
+COMPLETIONS = Counter(
+    "popcornguess_puzzle_completions",
+    "Daily puzzle attempts finished, by whether they were solved.",
+    ["solved"],
+)
+
+
+# Labelled children by (view, method, status); labels() takes a lock and
+# builds a key on every call, which would dominate the per-request cost
+_request_children: dict[tuple[str, str, str], tuple[Any, Any, Any]] = {}
+
+
+def request_children(view: str, method: str, status: str) -> tuple[Any, Any, Any]:
+    """
+    Return the (latency, db queries, db seconds) children for a request.
+    """
+    key = (view, method, status)
+    children = _request_children.get(key)
+    if children is None:
+        children = _request_children.setdefault(
+            key,
+            (
+                REQUEST_LATENCY.labels(view, method, status),
+                REQUEST_DB_QUERIES.labels(view),
+                REQUEST_DB_SECONDS.labels(view),
+            ),
+        )
+    return children
+
+
+def view_label(request: HttpRequest) -> str:
+    match = request.resolver_match
+    return match.view_name if match is not None else UNMATCHED
+
+
+def method_label(request: HttpRequest) -> str:
+    return request.method if request.method in METHODS else "other"  # type: ignore[return-value]
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def get_registry() -> CollectorRegistry:
+    """
+    Return the registry to export: this process's metrics, or with
+    ``PROMETHEUS_MULTIPROC_DIR`` set, every worker's added up.
+    """
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)  # type: ignore[no-untyped-call]
+    return registry
+
+
+@require_safe
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    """
+    Serve the metrics in Prometheus' text format. When ``METRICS_TOKEN`` is
+    set, scrapers must send it as ``Authorization: Bearer <token>``.
+    """
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if token and not constant_time_compare(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST
+    )
@@ -0,0 +1,330 @@
+"""
+Project-wide middleware.
+
+All middleware here is both sync and async capable, so it doesn't force the
+async gameplay views onto a thread under ASGI.
+"""
+
+import logging
+import re
+import secrets
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Any
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+
+import brotli
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from . import metrics, queries, routers
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Track database routing per request and keep clients that just wrote
+    reading from the primary for ``DATABASE_PRIMARY_STICKY_SECONDS``.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(
+        self,
+        get_response: Callable[[HttpRequest], HttpResponse | Awaitable[HttpResponse]],
+    ) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state, token = routers.start_request(request)
+        try:
+            response: HttpResponse = self.get_response(request)  # type: ignore[assignment]
+        finally:
+            routers.finish_request(token)
+        return self.process_response(state, response)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        state, token = routers.start_request(request)
+        try:
+            response = await self.get_response(request)  # type: ignore[misc]
+        finally:
+            routers.finish_request(token)
+        return self.process_response(state, response)
+
+    def process_response(
+        self, state: routers.RoutingState, response: HttpResponse
+    ) -> HttpResponse:
+        if state.wrote and routers.get_replicas():
+            response.set_cookie(
+                routers.STICKY_COOKIE_NAME,
+                "1",
+                max_age=getattr(settings, "DATABASE_PRIMARY_STICKY_SECONDS", 5),
+                secure=settings.SESSION_COOKIE_SECURE,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+
+class QueryBudgetMiddleware:
+    """
+    Count the SQL queries each request runs and the time spent in them.
+
+    Requests that run more queries than their view's budget (see
+    `queries.get_budget`) are logged with their most repeated statement,
+    usually the N+1 to fix. With ``QUERY_SERVER_TIMING`` (on when DEBUG),
+    responses carry the figures in a ``Server-Timing`` header, which
+    browser developer tools display.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(
+        self,
+        get_response: Callable[[HttpRequest], HttpResponse | Awaitable[HttpResponse]],
+    ) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with queries.collect() as stats:
+            response: HttpResponse = self.get_response(request)  # type: ignore[assignment]
+        return self.process_response(request, stats, response)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        with queries.collect() as stats:
+            response = await self.get_response(request)  # type: ignore[misc]
+        return self.process_response(request, stats, response)
+
+    def process_response(
+        self, request: HttpRequest, stats: queries.QueryStats, response: HttpResponse
+    ) -> HttpResponse:
+        if getattr(settings, "QUERY_SERVER_TIMING", False):
+            timing = stats.server_timing()
+            if response.has_header("Server-Timing"):
+                timing = f"{response['Server-Timing']}, {timing}"
+            response["Server-Timing"] = timing
+
+        match = request.resolver_match
+        view_name = match.view_name if match else None
+        budget = queries.get_budget(view_name)
+        if stats.count > budget:
+            sql, repeats = stats.most_repeated()  # type: ignore[misc]
+            logger.warning(
+                "%s %s (%s) ran %d queries in %.1fms, budget is %d; "
+                "most repeated (%dx): %s",
+                request.method,
+                request.path,
+                view_name,
+                stats.count,
+                stats.duration * 1000,
+                budget,
+                repeats,
+                sql,
+            )
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Record request latency, requests in flight and SQL queries per view for
+    Prometheus (see `metrics`). Goes first in MIDDLEWARE, so the latency
+    covers the whole stack.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(
+        self,
+        get_response: Callable[[HttpRequest], HttpResponse | Awaitable[HttpResponse]],
+    ) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        metrics.REQUESTS_IN_FLIGHT.inc()
+        try:
+            with queries.collect() as stats:
+                response: HttpResponse = self.get_response(  # type: ignore[assignment]
+                    request
+                )
+        finally:
+            metrics.REQUESTS_IN_FLIGHT.dec()
+        self.observe(request, response, stats, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        start = time.perf_counter()
+        metrics.REQUESTS_IN_FLIGHT.inc()
+        try:
+            with queries.collect() as stats:
+                response = await self.get_response(request)  # type: ignore[misc]
+        finally:
+            metrics.REQUESTS_IN_FLIGHT.dec()
+        self.observe(request, response, stats, time.perf_counter() - start)
+        return response
+
+    def observe(
+        self,
+        request: HttpRequest,
+        response: HttpResponse,
+        stats: queries.QueryStats,
+        duration: float,
+    ) -> None:
+        latency, db_queries, db_seconds = metrics.request_children(
+            metrics.view_label(request),
+            metrics.method_label(request),
+            str(response.status_code),
+        )
+        latency.observe(duration)
+        db_queries.observe(stats.count)
+        db_seconds.inc(stats.duration)
+
+
+accepts_gzip = re.compile(r"\bgzip\b")
+accepts_brotli = re.compile(r"\bbr\b")
+
+
+def brotli_padding(size: int) -> bytes:
+    """
+    Return Brotli metadata blocks (RFC 7932, section 9.2) skipping ``size``
+    bytes in all, which decoders ignore. The stream must be byte-aligned
+    where they go, as it is after a flush.
+    """
+    padding = b""
+    while size > 0:
+        length = min(size, 256)
+        # ISLAST = 0, MNIBBLES = 0 (coded 3), MSKIPBYTES = 1, MSKIPLEN - 1;
+        # 14 bits, zero-filled to the byte boundary
+        header = (3 << 1) | (1 << 4) | ((length - 1) << 6)
+        padding += header.to_bytes(2, "little") + b"a" * length
+        size -= length
+    return padding
+
+
+def compress_brotli(data: bytes, *, quality: int, max_random_bytes: int) -> bytes:
+    """
+    Brotli-compress ``data``, padded with up to ``max_random_bytes - 1``
+    ignored bytes against BREACH, as Django pads gzip.
+    """
+    compressor = brotli.Compressor(quality=quality)
+    return (
+        compressor.process(data)
+        + compressor.flush()
+        + brotli_padding(secrets.randbelow(max_random_bytes))
+        + compressor.finish()
+    )
+
+
+class CompressionMiddleware:
+    """
+    Compress responses of at least ``COMPRESSION_MIN_SIZE`` bytes, with
+    Brotli when the client accepts it and gzip otherwise. Streaming
+    responses are gzipped as they stream.
+
+    Behaves like Django's GZipMiddleware otherwise: the output (Brotli and
+    gzip) is padded to a random length against BREACH, strong ETags are made weak, a response is only
+    compressed if that makes it smaller, and responses that already have a
+    Content-Encoding (the pre-compressed puzzle bundle) are left alone.
+    Unlike it, async views' responses are compressed on the event loop
+    rather than on a thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    # Padding of the output, as in GZipMiddleware
+    max_random_bytes = 100
+
+    def __init__(
+        self,
+        get_response: Callable[[HttpRequest], HttpResponse | Awaitable[HttpResponse]],
+    ) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        response = await self.get_response(request)  # type: ignore[misc]
+        return self.process_response(request, response)
+
+    def process_response(self, request: HttpRequest, response: Any) -> Any:
+        min_size = getattr(settings, "COMPRESSION_MIN_SIZE", 500)
+        if not response.streaming and len(response.content) < min_size:
+            return response
+        if response.has_header("Content-Encoding"):
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        accept_encoding = request.headers.get("Accept-Encoding", "")
+        if not response.streaming and accepts_brotli.search(accept_encoding):
+            encoding = "br"
+            content = compress_brotli(
+                response.content,
+                quality=getattr(settings, "COMPRESSION_BROTLI_QUALITY", 4),
+                max_random_bytes=self.max_random_bytes,
+            )
+        elif accepts_gzip.search(accept_encoding):
+            encoding = "gzip"
+            if response.streaming:
+                content = None
+                self.gzip_stream(response)
+            else:
+                content = compress_string(
+                    response.content, max_random_bytes=self.max_random_bytes
+                )
+        else:
+            return response
+
+        if content is not None:
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response.headers["Content-Length"] = str(len(content))
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+    def gzip_stream(self, response: Any) -> None:
+        """
+        Gzip a streaming response's content as it is produced.
+        """
+        if response.is_async:
+            chunks = response.streaming_content
+
+            async def compressed() -> AsyncIterator[bytes]:
+                async for chunk in chunks:
+                    yield compress_string(chunk, max_random_bytes=self.max_random_bytes)
+
+            response.streaming_content = compressed()
+        else:
+            response.streaming_content = compress_sequence(
+                response.streaming_content, max_random_bytes=self.max_random_bytes
+            )
+        # The compressed size is only known once streamed
+        del response.headers["Content-Length"]
@@ -0,0 +1,61 @@
+"""
+Migration operations shared by the apps.
+"""
+
+from django.contrib.postgres.operations import NotInTransactionMixin
+from django.db import NotSupportedError
+from django.db.migrations import AddConstraint
+
+
+class AddConstraintConcurrently(NotInTransactionMixin, AddConstraint):
+    """
+    Add a unique constraint backed by an index (one on expressions such as
+    ``Lower("email")``, or with a condition) using PostgreSQL's ``CREATE
+    UNIQUE INDEX CONCURRENTLY``, so the table stays writable while the index
+    is built. Other databases get a plain AddConstraint.
+
+    Use it in place of the AddConstraint that makemigrations writes, in a
+    migration with ``atomic = False``. If the build fails (e.g. on existing
+    duplicates), PostgreSQL leaves an invalid index behind; migrating
+    backwards drops it.
+    """
+
+    atomic = False
+
+    def describe(self) -> str:
+        return "Concurrently create constraint %s on model %s" % (
+            self.constraint.name,
+            self.model_name,
+        )
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):  # type: ignore[no-untyped-def]
+        if schema_editor.connection.vendor != "postgresql":
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+            return
+        self._ensure_not_in_transaction(schema_editor)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        statement = self.constraint.create_sql(model, schema_editor)
+        if not statement.template.startswith("CREATE UNIQUE INDEX "):
+            raise NotSupportedError(
+                "Constraint %s is not backed by an index and can't be "
+                "created concurrently." % self.constraint.name
+            )
+        statement.template = statement.template.replace(
+            "CREATE UNIQUE INDEX", "CREATE UNIQUE INDEX CONCURRENTLY", 1
+        )
+        schema_editor.execute(statement, params=None)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):  # type: ignore[no-untyped-def]
+        if schema_editor.connection.vendor != "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+            return
+        self._ensure_not_in_transaction(schema_editor)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.execute(
+                schema_editor.sql_delete_index_concurrently
+                % {"name": schema_editor.quote_name(self.constraint.name)},
+                params=None,
+            )
@@ -0,0 +1,175 @@
+"""
+Keyset (cursor) pagination.
+
+`PageNumberPagination` runs a ``COUNT(*)`` per page and an ``OFFSET`` that
+makes page N cost O(N * page size). Keyset pagination instead remembers the
+ordering key of the last row served and asks for rows after it, which an
+index on the ordering columns answers in O(page size) at any depth.
+
+Unlike DRF's `CursorPagination`, which filters on the first ordering field
+only and skips ties with an offset, the whole ordering tuple is compared, so
+it must end with a unique field (usually the primary key).
+"""
+
+import base64
+import binascii
+import json
+from typing import Any, NamedTuple
+
+from django.core.exceptions import ValidationError
+from django.db.models import Model, Q, QuerySet
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class Cursor(NamedTuple):
+    """A position in the ordering; ``reverse`` pages backwards from it."""
+
+    reverse: bool
+    values: tuple[Any, ...]
+
+
+def _flip(field: str) -> str:
+    return field[1:] if field.startswith("-") else f"-{field}"
+
+
+def keyset_filter(ordering: tuple[str, ...], values: tuple[Any, ...]) -> Q:
+    """
+    Return the condition selecting rows strictly after ``values`` in
+    ``ordering``. The leading inclusive bound on the first field lets the
+    database use a range scan on the composite index.
+    """
+    after = Q()
+    for position, field in enumerate(ordering):
+        name = field.lstrip("-")
+        lookup = "lt" if field.startswith("-") else "gt"
+        condition = Q(**{f"{name}__{lookup}": values[position]})
+        for previous, value in zip(ordering[:position], values):
+            condition &= Q(**{previous.lstrip("-"): value})
+        after |= condition
+    first = ordering[0]
+    lookup = "lte" if first.startswith("-") else "gte"
+    return Q(**{f"{first.lstrip('-')}__{lookup}": values[0]}) & after
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginate by the values of ``ordering`` instead of page numbers.
+    Responses have ``next``, ``previous`` and ``results`` but no ``count``.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    ordering: tuple[str, ...] = ("-pk",)
+    invalid_cursor_message = _("Invalid cursor")
+
+    def get_page_size(self, request: Request) -> int:
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return int(self.page_size)
+        return max(1, min(size, self.max_page_size))
+
+    def paginate_queryset(  # type: ignore[override]
+        self, queryset: QuerySet, request: Request, view: Any = None
+    ) -> list[Model | dict]:
+        self.request = request
+        self.model = queryset.model
+        self.size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+
+        ordering = self.ordering
+        if cursor is not None and cursor.reverse:
+            ordering = tuple(_flip(field) for field in ordering)
+        queryset = queryset.order_by(*ordering)
+        if cursor is not None:
+            queryset = queryset.filter(keyset_filter(ordering, cursor.values))
+        rows = list(queryset[: self.size + 1])
+        has_more = len(rows) > self.size
+        rows = rows[: self.size]
+
+        if cursor is not None and cursor.reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        self.page = rows
+        return rows
+
+    def _fields(self) -> list[Any]:
+        opts = self.model._meta
+        return [
+            opts.pk if name == "pk" else opts.get_field(name)
+            for name in (field.lstrip("-") for field in self.ordering)
+        ]
+
+    def encode_cursor(self, cursor: Cursor) -> str:
+        payload = json.dumps([int(cursor.reverse), list(cursor.values)])
+        token = base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, token
+        )
+
+    def decode_cursor(self, request: Request) -> Cursor | None:
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            payload = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            reverse, raw = json.loads(payload)
+            fields = self._fields()
+            if len(raw) != len(fields):
+                raise ValueError("Wrong number of values")
+            values = tuple(field.to_python(value) for field, value in zip(fields, raw))
+        except (binascii.Error, TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return Cursor(bool(reverse), values)
+
+    def _position(self, row: Model | dict) -> tuple[Any, ...]:
+        fields = self._fields()
+        if isinstance(row, dict):
+            # A row of a .values() queryset
+            row = self.model(**{field.attname: row[field.attname] for field in fields})
+        return tuple(field.value_to_string(row) for field in fields)
+
+    def get_next_link(self) -> str | None:
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(Cursor(False, self._position(self.page[-1])))
+
+    def get_previous_link(self) -> str | None:
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(
+                self.request.build_absolute_uri(), self.cursor_query_param
+            )
+        return self.encode_cursor(Cursor(True, self._position(self.page[0])))
+
+    def get_paginated_response(self, data: Any) -> Response:
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema: dict) -> dict:
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
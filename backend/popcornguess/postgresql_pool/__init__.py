@@ -0,0 +1,4 @@
+"""
+PostgreSQL database backend keeping a pool of connections per process (see
+`popcornguess.postgresql_pool.base`).
+"""
@@ -0,0 +1,144 @@
+"""
+PostgreSQL backend reusing connections from a per-process pool.
+
+Django's persistent connections (``CONN_MAX_AGE``) belong to a thread.
+Under ASGI each request's sync code runs on a thread of its own, so they
+are never reused. With this backend, closing a connection hands it back
+to a pool shared by every thread of the process, and the next request
+takes it from there:
+
+    DATABASES["default"]["ENGINE"] = "popcornguess.postgresql_pool"
+    DATABASES["default"]["CONN_MAX_AGE"] = 0  # hand back after each request
+
+The pool keeps at most ``DB_POOL_SIZE`` idle connections per database and
+retires connections after ``DB_CONN_MAX_AGE`` seconds. It does not cap
+how many connections are open at once; put PgBouncer in front of
+PostgreSQL for that (see docs/DEPLOYMENT.md).
+"""
+
+import threading
+import time
+from typing import Any
+
+from django.conf import settings
+from django.db.backends.postgresql import base
+
+from psycopg2 import extensions
+
+
+class ConnectionPool:
+    """
+    Idle connections to one database, newest first.
+    """
+
+    def __init__(self, size: int, max_age: float | None = None) -> None:
+        self.size = size
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # (connection, when it was opened), most recently returned last
+        self._idle: list[tuple[Any, float]] = []
+
+    def __len__(self) -> int:
+        return len(self._idle)
+
+    def _expired(self, opened_at: float) -> bool:
+        return self.max_age is not None and time.monotonic() - opened_at > self.max_age
+
+    def get(self) -> tuple[Any, float] | None:
+        """
+        Take an idle connection and when it was opened, or None if there
+        is none left to reuse.
+        """
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                connection, opened_at = self._idle.pop()
+            if not connection.closed and not self._expired(opened_at):
+                return connection, opened_at
+            connection.close()
+
+    def put(self, connection: Any, opened_at: float) -> bool:
+        """
+        Keep a connection for reuse. Returns False when the pool has no
+        room for it or it is too old; the caller then closes it.
+        """
+        if connection.closed or self._expired(opened_at):
+            return False
+        with self._lock:
+            if len(self._idle) >= self.size:
+                return False
+            self._idle.append((connection, opened_at))
+            return True
+
+    def clear(self) -> None:
+        """
+        Close every idle connection.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            connection.close()
+
+
+_pools: dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias: str) -> ConnectionPool:
+    """
+    Return the process-wide pool of a database alias.
+    """
+    pool = _pools.get(alias)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(alias)
+            if pool is None:
+                pool = _pools[alias] = ConnectionPool(
+                    int(getattr(settings, "DB_POOL_SIZE", 10)),
+                    getattr(settings, "DB_CONN_MAX_AGE", 600) or None,
+                )
+    return pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    The PostgreSQL backend, taking connections from and handing them back
+    to `get_pool`. Sessions are reset as Django connects (time zone, role,
+    autocommit), and any open transaction is rolled back on hand-back.
+    """
+
+    opened_at = 0.0
+
+    def get_new_connection(self, conn_params: dict) -> Any:
+        pooled = get_pool(self.alias).get()
+        if pooled is None:
+            self.opened_at = time.monotonic()
+            return super().get_new_connection(conn_params)
+        connection, self.opened_at = pooled
+        # Connections sat idle in the pool: check them with the first query
+        # when CONN_HEALTH_CHECKS is on, as Django does for persistent ones
+        self.health_check_done = False
+        return connection
+
+    def _close(self) -> None:
+        if self.connection is None:
+            return
+        if not self.hand_back(self.connection):
+            with self.wrap_database_errors:
+                self.connection.close()
+
+    def hand_back(self, connection: Any) -> bool:
+        """
+        Roll back and pool a reusable connection. Returns whether it was
+        kept.
+        """
+        if connection.closed or self.errors_occurred:
+            return False
+        idle = extensions.TRANSACTION_STATUS_IDLE
+        try:
+            if connection.info.transaction_status != idle:
+                connection.rollback()
+        except self.Database.Error:
+            return False
+        return get_pool(self.alias).put(connection, self.opened_at)
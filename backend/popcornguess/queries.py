@@ -0,0 +1,148 @@
+"""
+Per-request SQL query accounting.
+
+Every database connection gets an execute wrapper that, inside a
+`collect()` block, counts the queries run and the time spent in them. The
+active collectors live in a context variable, so queries the ORM runs on
+another thread for an async view (``sync_to_async`` copies the context)
+are counted against the request that made them.
+
+`middleware.QueryBudgetMiddleware` collects for every request and logs
+those over their budget; tests hold views to a budget with
+`assert_query_budget`.
+"""
+
+import contextvars
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+# Budget for views without an entry in QUERY_BUDGETS
+DEFAULT_BUDGET = 20
+
+
+class QueryStats:
+    """Queries run while a `collect()` block was active."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        # Seconds spent waiting on the database
+        self.duration = 0.0
+        # Executions per SQL statement, before parameters are filled in
+        self.statements: Counter[str] = Counter()
+
+    def add(self, sql: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.statements[sql] += 1
+
+    def most_repeated(self) -> tuple[str, int] | None:
+        """
+        Return the statement run most often and how many times; one run many
+        times with different parameters is the mark of an N+1 query.
+        """
+        if not self.statements:
+            return None
+        return self.statements.most_common(1)[0]
+
+    def server_timing(self) -> str:
+        """
+        Return a ``Server-Timing`` header entry for the database time.
+        """
+        return f'db;dur={self.duration * 1000:.1f};desc="{self.count} queries"'
+
+
+_collectors: contextvars.ContextVar[tuple[QueryStats, ...]] = contextvars.ContextVar(
+    "query_collectors", default=()
+)
+
+
+def _record(
+    execute: Callable[..., Any], sql: str, params: Any, many: bool, context: Any
+) -> Any:
+    collectors = _collectors.get()
+    if not collectors:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        for stats in collectors:
+            stats.add(sql, duration)
+
+
+def install(connection: Any, **kwargs: Any) -> None:
+    """
+    Add the counting wrapper to a connection (a connection_created
+    receiver; connections keep their wrappers when they reconnect).
+    """
+    if _record not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record)
+
+
+# Connections opened from now on, on any thread
+connection_created.connect(install)
+_thread_state = threading.local()
+
+
+@contextmanager
+def collect() -> Iterator[QueryStats]:
+    """
+    Count the queries run in this block, including in nested blocks.
+    """
+    if not getattr(_thread_state, "installed", False):
+        # This thread's connections may have opened before the receiver
+        # was connected
+        for connection in connections.all(initialized_only=True):
+            install(connection)
+        _thread_state.installed = True
+    stats = QueryStats()
+    token = _collectors.set(_collectors.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _collectors.reset(token)
+
+
+def get_budget(view_name: str | None) -> int:
+    """
+    Return the query budget of a view, by URL name (e.g. ``users:user-list``).
+    """
+    budgets = getattr(settings, "QUERY_BUDGETS", {})
+    return int(
+        budgets.get(view_name, getattr(settings, "QUERY_BUDGET", DEFAULT_BUDGET))
+    )
+
+
+@contextmanager
+def assert_query_budget(
+    budget: int, *, max_repeats: int | None = None
+) -> Iterator[QueryStats]:
+    """
+    Fail with AssertionError if the block runs more than ``budget`` queries,
+    or any one statement more than ``max_repeats`` times (an N+1 query).
+    Unlike assertNumQueries, a view may come in under its budget.
+    """
+    with collect() as stats:
+        yield stats
+    problems = []
+    if stats.count > budget:
+        problems.append(f"{stats.count} queries run, budget is {budget}")
+    repeated = stats.most_repeated()
+    if max_repeats is not None and repeated and repeated[1] > max_repeats:
+        problems.append(
+            f"a statement ran {repeated[1]} times, at most {max_repeats} allowed"
+        )
+    if problems:
+        statements = "\n".join(
+            f"{count}x {sql}" for sql, count in stats.statements.most_common()
+        )
+        raise AssertionError("; ".join(problems) + ":\n" + statements)
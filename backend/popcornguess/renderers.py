@@ -0,0 +1,51 @@
+"""
+A faster drop-in for DRF's JSONRenderer (enabled by ``API_FAST_JSON``).
+
+`ORJSONRenderer` encodes with orjson, several times faster than the
+standard library on list pages, and produces the same bytes as
+JSONRenderer: values orjson doesn't know, and dates and times, go through
+DRF's encoder, and U+2028/U+2029 are escaped the same way. It hands over to
+JSONRenderer for what orjson does differently: indented output, ASCII-only
+output (``UNICODE_JSON = False``), non-compact separators
+(``COMPACT_JSON = False``), NaN output (``STRICT_JSON = False``) and
+integers beyond 64 bits. One difference remains: with ``STRICT_JSON`` on,
+NaN and infinity are rendered as ``null`` instead of raising.
+"""
+
+import orjson
+from rest_framework.renderers import JSONRenderer
+
+# U+2028 and U+2029 are valid in JSON but not in JavaScript strings
+LINE_SEPARATOR = "\u2028".encode()
+PARAGRAPH_SEPARATOR = "\u2029".encode()
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer encoding with orjson.
+    """
+
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):  # type: ignore[no-untyped-def]
+        if data is None:
+            return b""
+        if (
+            self.ensure_ascii
+            or not self.compact
+            or not self.strict
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder_class().default, option=self.options
+            )
+        except orjson.JSONEncodeError:
+            # Raises the same error as JSONRenderer for unknown types
+            return super().render(data, accepted_media_type, renderer_context)
+        if LINE_SEPARATOR in ret or PARAGRAPH_SEPARATOR in ret:
+            ret = ret.replace(LINE_SEPARATOR, b"\\u2028").replace(
+                PARAGRAPH_SEPARATOR, b"\\u2029"
+            )
+        return ret
@@ -0,0 +1,107 @@
+"""
+Primary/replica database routing.
+
+Writes always go to ``default``, the primary. Reads go to one of the
+``DATABASE_REPLICAS`` aliases only where a view has opted in with
+`ReplicaReadMixin`, and only while the data can't have changed under the
+client's feet:
+
+* once a request has written anything, the rest of it reads the primary;
+* so does anything inside a transaction on the primary;
+* after a request that wrote, `middleware.ReplicaRoutingMiddleware` gives
+  the client a cookie that keeps its reads on the primary for
+  ``DATABASE_PRIMARY_STICKY_SECONDS``, long enough for the replicas to
+  catch up with its own writes.
+
+Outside a request (management commands, shells, tests) everything reads the
+primary.
+"""
+
+import contextvars
+import random
+from typing import Any
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from rest_framework.permissions import SAFE_METHODS
+
+STICKY_COOKIE_NAME = "pg_primary"
+
+
+class RoutingState:
+    """Per-request routing flags, shared by the request's threads and tasks."""
+
+    def __init__(self, *, pinned: bool = False) -> None:
+        self.replica_reads = False
+        self.pinned = pinned
+        self.wrote = False
+
+
+_state: contextvars.ContextVar[RoutingState | None] = contextvars.ContextVar(
+    "db_routing_state", default=None
+)
+
+
+def start_request(request: Any) -> tuple[RoutingState, contextvars.Token]:
+    """
+    Give the current request a fresh routing state; pass the token to
+    `finish_request`.
+    """
+    state = RoutingState(pinned=STICKY_COOKIE_NAME in request.COOKIES)
+    return state, _state.set(state)
+
+
+def finish_request(token: contextvars.Token) -> None:
+    _state.reset(token)
+
+
+def get_replicas() -> list[str]:
+    return list(getattr(settings, "DATABASE_REPLICAS", []))
+
+
+def allow_replica_reads() -> None:
+    """
+    Let the rest of the current request read from replicas.
+    """
+    state = _state.get()
+    if state is not None:
+        state.replica_reads = True
+
+
+class PrimaryReplicaRouter:
+    """
+    Route reads to replicas where allowed (see the module docstring) and
+    everything else to the primary.
+    """
+
+    def db_for_read(self, model: Any, **hints: Any) -> str | None:
+        state = _state.get()
+        if state is None or not state.replica_reads or state.pinned:
+            return None
+        replicas = get_replicas()
+        if not replicas or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return random.choice(replicas)
+
+    def db_for_write(self, model: Any, **hints: Any) -> str | None:
+        state = _state.get()
+        if state is not None:
+            state.wrote = state.pinned = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1: Any, obj2: Any, **hints: Any) -> bool | None:
+        # Replicas hold the same data as the primary
+        return True
+
+
+class ReplicaReadMixin:
+    """
+    DRF view mixin: let safe (GET/HEAD/OPTIONS) requests read from replicas
+    once authentication and permission checks have run on the primary.
+    """
+
+    def initial(self, request: Any, *args: Any, **kwargs: Any) -> None:
+        super().initial(request, *args, **kwargs)  # type: ignore[misc]
+        if request.method in SAFE_METHODS:
+            allow_replica_reads()
@@ -48,6 +48,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "corsheaders",
     "quizzes",
@@ -56,12 +57,18 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "popcornguess.middleware.MetricsMiddleware",
+    "popcornguess.middleware.CompressionMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "popcornguess.middleware.QueryBudgetMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "popcornguess.middleware.ReplicaRoutingMiddleware",
+    "users.middleware.DeviceMiddleware",
+    "users.middleware.HashingBusyMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -90,12 +97,21 @@ WSGI_APPLICATION = "popcornguess.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# Connections are kept open for DB_CONN_MAX_AGE seconds (0 closes them after
+# every request) and checked before reuse, so a connection dropped by the
+# server or a pooler costs a reconnect rather than a failed request
+DB_CONN_MAX_AGE = int(os.getenv("DB_CONN_MAX_AGE", "600"))
+# Idle connections kept per database and process by the pooled backend
+# (popcornguess.postgresql_pool), which settings_production uses under ASGI
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+
 # Support DATABASE_URL (for Docker) or individual settings
 if os.getenv("DATABASE_URL"):
     DATABASES = {
         "default": dj_database_url.config(
             default=os.getenv("DATABASE_URL"),
-            conn_max_age=600,
+            conn_max_age=DB_CONN_MAX_AGE,
+            conn_health_checks=True,
         )
     }
 else:
@@ -107,9 +123,67 @@ else:
             "PASSWORD": os.getenv("DB_PASSWORD", "postgres"),
             "HOST": os.getenv("DB_HOST", "localhost"),
             "PORT": os.getenv("DB_PORT", "5432"),
+            "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": True,
         }
     }
 
+# Read replicas, as comma-separated database URLs. Views using
+# popcornguess.routers.ReplicaReadMixin read from them; writes, and reads
+# that must see them, stay on the primary (default).
+DATABASE_REPLICAS: list[str] = []
+for index, url in enumerate(
+    filter(None, os.getenv("DATABASE_REPLICA_URLS", "").split(",")), start=1
+):
+    alias = f"replica_{index}"
+    DATABASES[alias] = dj_database_url.parse(
+        url.strip(), conn_max_age=DB_CONN_MAX_AGE, conn_health_checks=True
+    )
+    DATABASES[alias]["TEST"] = {"MIRROR": "default"}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["popcornguess.routers.PrimaryReplicaRouter"]
+# Seconds a client keeps reading from the primary after a write, to cover
+# replication lag
+DATABASE_PRIMARY_STICKY_SECONDS = int(os.getenv("DATABASE_PRIMARY_STICKY_SECONDS", "5"))
+
+# Set to "pgbouncer" when connecting through PgBouncer in transaction pooling
+# mode: consecutive transactions may land on different server connections,
+# which breaks server-side cursors (see docs/DEPLOYMENT.md)
+DB_POOLER = os.getenv("DB_POOLER") or None
+if DB_POOLER == "pgbouncer":
+    for database in DATABASES.values():
+        database["DISABLE_SERVER_SIDE_CURSORS"] = True
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Set CACHE_URL (redis://host:port/db) in production so every worker and
+# host shares one cache: the daily puzzle, authenticated users and cached
+# responses are then computed once, and invalidations reach every process.
+# Without it each process caches in its own memory.
+CACHE_URL = os.getenv("CACHE_URL", "")
+if CACHE_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+            "KEY_PREFIX": "popcornguess",
+            "TIMEOUT": 300,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "popcornguess",
+        }
+    }
+# Redis holding the rate limit buckets (see popcornguess.throttling); unset,
+# each process limits on its own
+THROTTLE_REDIS_URL = os.getenv("THROTTLE_REDIS_URL") or CACHE_URL
+# Seconds an API response stays cached (see popcornguess.caching)
+RESPONSE_CACHE_TIMEOUT = int(os.getenv("RESPONSE_CACHE_TIMEOUT", "60"))
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -133,6 +207,28 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing (see users.hashers). New passwords use the first hasher;
+# hashes made by another hasher or at another cost are upgraded on login.
+PASSWORD_HASHERS = [
+    "users.hashers.Argon2PasswordHasher",
+    "users.hashers.BCryptSHA256PasswordHasher",
+    "users.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+]
+PASSWORD_ARGON2_TIME_COST = int(os.getenv("PASSWORD_ARGON2_TIME_COST", "2"))
+PASSWORD_ARGON2_MEMORY_COST = int(os.getenv("PASSWORD_ARGON2_MEMORY_COST", "102400"))
+# One lane per hash: the hashing pool already keeps a core busy per worker
+PASSWORD_ARGON2_PARALLELISM = int(os.getenv("PASSWORD_ARGON2_PARALLELISM", "1"))
+PASSWORD_BCRYPT_ROUNDS = int(os.getenv("PASSWORD_BCRYPT_ROUNDS", "12"))
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv("PASSWORD_PBKDF2_ITERATIONS", "600000"))
+# Hashing runs on a per-process thread pool (see users.passwords). Workers
+# default to the number of cores; requests fail fast with 503 once
+# MAX_PENDING hashes are running or queued. Argon2 needs MEMORY_COST KiB per
+# running hash.
+PASSWORD_HASHING_WORKERS = int(os.getenv("PASSWORD_HASHING_WORKERS", "0")) or None
+PASSWORD_HASHING_MAX_PENDING = int(os.getenv("PASSWORD_HASHING_MAX_PENDING", "32"))
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
 
@@ -160,6 +256,10 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # https://docs.djangoproject.com/en/4.2/topics/auth/customizing/#substituting-a-custom-user-model
 AUTH_USER_MODEL = "users.User"
 
+# Encode and decode API JSON with orjson (see popcornguess.renderers); the
+# output is the same, only faster
+API_FAST_JSON = (os.getenv("API_FAST_JSON") or "False") == "True"
+
 # REST Framework configuration
 REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
@@ -168,15 +268,40 @@ REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 20,
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
+        (
+            "popcornguess.renderers.ORJSONRenderer"
+            if API_FAST_JSON
+            else "rest_framework.renderers.JSONRenderer"
+        ),
     ],
     "DEFAULT_PARSER_CLASSES": [
-        "rest_framework.parsers.JSONParser",
+        (
+            "popcornguess.parsers.ORJSONParser"
+            if API_FAST_JSON
+            else "rest_framework.parsers.JSONParser"
+        ),
     ],
-    # Add authentication classes for future use
     "DEFAULT_AUTHENTICATION_CLASSES": [
+        "users.authentication.SignedTokenAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ],
+    # Token bucket sizes and refill rates by "<scope>:<ip|device|user>"
+    # (see popcornguess.throttling)
+    "DEFAULT_THROTTLE_RATES": {
+        "login:ip": "30/min",
+        "login:device": "10/min",
+        "register:ip": "10/hour",
+        "register:device": "5/hour",
+        "password:user": "5/min",
+        "suggest:ip": "600/min",
+        "suggest:device": "120/min",
+        "guess:ip": "300/min",
+        "guess:device": "60/min",
+        "guess:user": "60/min",
+    },
+    # Proxies in front of the server that append to X-Forwarded-For; client
+    # IPs are read from REMOTE_ADDR when 0
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES", "0")),
 }
 
 # Only enable browsable API in DEBUG mode
@@ -185,6 +310,12 @@ if DEBUG:
     assert isinstance(renderer_classes, list)  # type: ignore[misc]
     renderer_classes.append("rest_framework.renderers.BrowsableAPIRenderer")
 
+# Response compression (see popcornguess.middleware.CompressionMiddleware).
+# Smaller responses aren't worth the CPU; Brotli quality runs from 0 to 11,
+# and levels above 5 cost much more time for a few percent
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "500"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
 # CORS configuration
 CORS_ALLOWED_ORIGINS = os.getenv(
     "CORS_ALLOWED_ORIGINS", "http://localhost:3000,http://127.0.0.1:3000"
@@ -220,10 +351,18 @@ if not DEBUG:
 # Logging Configuration
 # https://docs.djangoproject.com/en/4.2/topics/logging/
 
-# Ensure logs directory exists
+# The directory is created when the first record is written to the file
 LOGS_DIR = BASE_DIR / "logs"
-LOGS_DIR.mkdir(exist_ok=True)
 
+# With LOG_QUEUE, log calls only queue the record; a listener thread per
+# process formats and writes it (see popcornguess.logs). LOG_FORMAT "json"
+# writes one JSON object per line. LOG_DEBUG_SAMPLE_RATE is the fraction
+# (0-1) of DEBUG records kept.
+LOG_QUEUE = (os.getenv("LOG_QUEUE") or "True") == "True"
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE") or 1.0)
+
+LOGGING_CONFIG = "popcornguess.logs.configure"
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -238,6 +377,9 @@ LOGGING = {
             "format": "{levelname} {message}",
             "style": "{",
         },
+        "json": {
+            "()": "popcornguess.logs.JSONFormatter",
+        },
     },
     "filters": {
         "require_debug_true": {
@@ -251,15 +393,16 @@ LOGGING = {
         "console": {
             "level": "INFO",
             "class": "logging.StreamHandler",
-            "formatter": "simple",
+            "formatter": "json" if LOG_FORMAT == "json" else "simple",
         },
         "file": {
             "level": "WARNING",
-            "class": "logging.handlers.RotatingFileHandler",
+            "class": "popcornguess.logs.RotatingFileHandler",
             "filename": LOGS_DIR / "django.log",
             "maxBytes": 1024 * 1024 * 10,  # 10 MB
             "backupCount": 5,
-            "formatter": "verbose",
+            "delay": True,
+            "formatter": "json" if LOG_FORMAT == "json" else "verbose",
         },
     },
     "loggers": {
@@ -281,6 +424,65 @@ LOGGING = {
     },
 }
 
+# Quizzes
+# Seconds a materialized daily puzzle stays in the cache
+DAILY_PUZZLE_CACHE_TIMEOUT = 60 * 60 * 48
+# Days of puzzles, from today, shipped in the puzzle bundle (see
+# quizzes.bundles)
+PUZZLE_BUNDLE_DAYS = int(os.getenv("PUZZLE_BUNDLE_DAYS", "7"))
+# Minimum similarity (0-1) for a guess to be matched to a catalogue title
+TITLE_MATCH_THRESHOLD = float(os.getenv("TITLE_MATCH_THRESHOLD", "0.75"))
+# Set to "postgres" to answer guesses through pg_trgm while the in-memory
+# title index is being built
+TITLE_MATCHER_COLD_START = os.getenv("TITLE_MATCHER_COLD_START") or None
+
+# Analytics
+# Events are buffered per process and written in bulk once FLUSH_SIZE events
+# are queued or FLUSH_INTERVAL seconds have passed. Requests are rejected
+# with 503 while MAX_SIZE events are waiting.
+ANALYTICS_BUFFER_MAX_SIZE = int(os.getenv("ANALYTICS_BUFFER_MAX_SIZE", "50000"))
+ANALYTICS_BUFFER_FLUSH_SIZE = int(os.getenv("ANALYTICS_BUFFER_FLUSH_SIZE", "1000"))
+ANALYTICS_BUFFER_FLUSH_INTERVAL = float(
+    os.getenv("ANALYTICS_BUFFER_FLUSH_INTERVAL", "2.0")
+)
+ANALYTICS_BUFFER_BACKGROUND_FLUSH = True
+# Use PostgreSQL COPY instead of multi-row INSERTs for flushes
+ANALYTICS_USE_COPY = True
+
+# API tokens (see users.tokens)
+ACCESS_TOKEN_LIFETIME = int(os.getenv("ACCESS_TOKEN_LIFETIME", str(15 * 60)))
+REFRESH_TOKEN_LIFETIME = int(
+    os.getenv("REFRESH_TOKEN_LIFETIME", str(14 * 24 * 60 * 60))
+)
+# Seconds a token-authenticated user is served from the cache
+USER_AUTH_CACHE_TIMEOUT = 60
+
+# Anonymous devices (see users.devices)
+DEVICE_COOKIE_NAME = "pg_device"
+DEVICE_COOKIE_AGE = 60 * 60 * 24 * 365 * 2  # 2 years
+# Seconds between batched last_seen updates
+DEVICE_LAST_SEEN_FLUSH_INTERVAL = 60.0
+
+# Leaderboards
+# "users.leaderboard.RedisLeaderboard" shares boards between processes;
+# the in-memory backend only suits single-process deploys
+LEADERBOARD_BACKEND = os.getenv(
+    "LEADERBOARD_BACKEND", "users.leaderboard.MemoryLeaderboard"
+)
+LEADERBOARD_REDIS_URL = os.getenv("LEADERBOARD_REDIS_URL", "redis://localhost:6379/0")
+
+# Query budgets (see popcornguess.queries)
+# Requests running more SQL queries than their view's budget are logged.
+# QUERY_BUDGETS overrides QUERY_BUDGET per URL name, e.g. "users:user-list".
+QUERY_BUDGET = int(os.getenv("QUERY_BUDGET", "20"))
+QUERY_BUDGETS: dict[str, int] = {}
+# Report each request's query count and time in a Server-Timing header
+QUERY_SERVER_TIMING = (os.getenv("QUERY_SERVER_TIMING") or str(DEBUG)) == "True"
+
+# Prometheus metrics (see popcornguess.metrics)
+# When set, /metrics requires "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
 # Email Configuration (for future use)
 # https://docs.djangoproject.com/en/4.2/topics/email/
 EMAIL_BACKEND = os.getenv(
@@ -0,0 +1,45 @@
+"""Production settings for PopcornGuess backend.
+
+Used by the container entrypoint (``docker-entrypoint.sh``); see
+docs/DEPLOYMENT.md for the server and database connection model.
+"""
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+# settings.py derives the cookie and security header settings from DEBUG
+# while it is imported
+os.environ["DEBUG"] = "False"
+
+from .settings import *  # noqa: E402, F403, F401
+from .settings import BASE_DIR, DATABASES  # noqa: E402
+
+for name in ("SECRET_KEY", "ALLOWED_HOSTS"):
+    if not os.getenv(name):
+        raise ImproperlyConfigured(f"{name} must be set in production.")
+
+STATIC_ROOT = os.getenv("STATIC_ROOT", str(BASE_DIR / "staticfiles"))
+
+# TLS is terminated by the proxy in front of the application server
+SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
+
+# Gunicorn runs several workers (WEB_CONCURRENCY), which must share the
+# leaderboards; the in-memory backend would give each its own
+LEADERBOARD_BACKEND = os.getenv(
+    "LEADERBOARD_BACKEND", "users.leaderboard.RedisLeaderboard"
+)
+
+# "asgi" (the default) or "wsgi"; must match the server the entrypoint runs
+SERVER_INTERFACE = os.getenv("SERVER_INTERFACE", "asgi")
+
+# Under ASGI, Django runs each request's sync code (sync views, and the
+# async ORM) on a thread of its own, and database connections belong to a
+# thread: a persistent connection would never be reused. PostgreSQL
+# connections are pooled per process instead, and handed back to the pool
+# at the end of each request.
+if SERVER_INTERFACE == "asgi":
+    for database in DATABASES.values():
+        if database["ENGINE"] == "django.db.backends.postgresql":
+            database["ENGINE"] = "popcornguess.postgresql_pool"
+            database["CONN_MAX_AGE"] = 0
@@ -2,13 +2,20 @@
 
 from .settings import *  # noqa: F403, F401
 
-# Use SQLite for tests
+# Use SQLite for tests. The replica is a separate database rather than a
+# test mirror, so routing tests can tell which one answered; it is only
+# read from where a test adds it to DATABASE_REPLICAS.
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": ":memory:",
-    }
+    },
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+    },
 }
+DATABASE_REPLICAS = []
 
 
 # Disable migrations for faster tests
@@ -26,7 +33,22 @@ class DisableMigrations:
 
 MIGRATION_MODULES = DisableMigrations()
 
+# Each test process caches in its own memory, whatever CACHE_URL says
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "popcornguess-test",
+    }
+}
+
+# No rate limits, except in the tests that set them
+REST_FRAMEWORK = {**REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": {}}  # noqa: F405
+THROTTLE_REDIS_URL = ""
+
 # Use faster password hasher for tests
 PASSWORD_HASHERS = [
     "django.contrib.auth.hashers.MD5PasswordHasher",
 ]
+
+# Flush analytics events from the request thread only
+ANALYTICS_BUFFER_BACKGROUND_FLUSH = False
@@ -0,0 +1,308 @@
+"""
+Rate limiting with token buckets.
+
+Each client gets a bucket per scope holding up to N tokens that refill at
+N per period (the DRF rate ``"N/period"`` in ``DEFAULT_THROTTLE_RATES``);
+a request takes one token or is refused with 429 and ``Retry-After``.
+Bursts of up to N requests pass, sustained traffic is held to the rate.
+
+Buckets live in Redis when ``THROTTLE_REDIS_URL`` is set (by default the
+shared cache's ``CACHE_URL``), so the limits hold across workers and
+hosts. A check is one round trip: a Lua script refills, takes and stores
+the bucket atomically, on Redis' clock. Without Redis, or while it is
+unreachable, each process keeps its own buckets (`MemoryBucketStore`).
+
+The throttles identify clients by IP address (`IPThrottle`), anonymous
+device (`DeviceThrottle`) or user (`UserThrottle`). A view names its
+scope in ``throttle_scope``, and each throttle looks up the rate
+``"<scope>:<ip|device|user>"``; with no rate set, it lets everything
+through. Plain Django views use the `throttle` decorator.
+"""
+
+import functools
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from typing import Any, NamedTuple
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, JsonResponse
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "throttle:"
+# Seconds to stop trying Redis after it fails
+REDIS_RETRY_INTERVAL = 5.0
+
+
+class Decision(NamedTuple):
+    allowed: bool
+    # Seconds until a token is available, when refused
+    wait: float
+
+
+def parse_rate(rate: str) -> tuple[int, float]:
+    """
+    Return (capacity, tokens per second) for a DRF rate such as ``"5/min"``.
+    """
+    count, period = rate.split("/")
+    seconds = {"s": 1, "m": 60, "h": 3600, "d": 86400}[period[0]]
+    return int(count), int(count) / seconds
+
+
+class MemoryBucketStore:
+    """
+    Token buckets in this process's memory, least recently used first out
+    once ``max_buckets`` are held.
+    """
+
+    blocking = False
+
+    def __init__(self, max_buckets: int = 100_000) -> None:
+        self.max_buckets = max_buckets
+        # key -> (tokens, monotonic time of the last update)
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: int, rate: float) -> Decision:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        return Decision(allowed, 0.0 if allowed else (1 - tokens) / rate)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+# KEYS[1]: bucket; ARGV: capacity, tokens per second. Returns
+# {allowed, tokens} with tokens as a string, as Lua numbers are truncated
+# to integers in replies.
+TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call("TIME")
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "updated")
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "updated", tostring(now))
+redis.call("EXPIRE", KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisBucketStore:
+    """
+    Token buckets in Redis, shared by every process. Falls back to
+    ``fallback`` for ``REDIS_RETRY_INTERVAL`` seconds whenever Redis fails.
+    Requires the ``redis`` package.
+    """
+
+    blocking = True
+
+    def __init__(
+        self, url: str, fallback: MemoryBucketStore, timeout: float = 0.1
+    ) -> None:
+        import redis
+
+        self.client = redis.Redis.from_url(
+            url, socket_timeout=timeout, socket_connect_timeout=timeout
+        )
+        self.script = self.client.register_script(TAKE_SCRIPT)
+        self.fallback = fallback
+        self.error = redis.RedisError
+        self.down_until = 0.0
+
+    def take(self, key: str, capacity: int, rate: float) -> Decision:
+        if time.monotonic() < self.down_until:
+            return self.fallback.take(key, capacity, rate)
+        try:
+            allowed, tokens = self.script(keys=[key], args=[capacity, rate])
+        except self.error:
+            logger.warning(
+                "Throttle store unreachable, limiting per process for %ss",
+                REDIS_RETRY_INTERVAL,
+                exc_info=True,
+            )
+            self.down_until = time.monotonic() + REDIS_RETRY_INTERVAL
+            return self.fallback.take(key, capacity, rate)
+        if allowed:
+            return Decision(True, 0.0)
+        return Decision(False, (1 - float(tokens)) / rate)
+
+
+_store: MemoryBucketStore | RedisBucketStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> MemoryBucketStore | RedisBucketStore:
+    """
+    Return the process-wide bucket store.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                url = getattr(settings, "THROTTLE_REDIS_URL", "")
+                memory = MemoryBucketStore()
+                _store = RedisBucketStore(url, memory) if url else memory
+    return _store
+
+
+def reset_store() -> None:
+    """
+    Forget the process-wide store; it is recreated on next use.
+    """
+    global _store
+    with _store_lock:
+        _store = None
+
+
+class BucketThrottle(BaseThrottle):
+    """
+    Base class: subclasses name the rate suffix in ``kind`` and identify
+    the client in `get_ident_key`.
+    """
+
+    kind = ""
+
+    def get_ident_key(self, request: Any) -> str | None:
+        """
+        Return the client's identity, or None to let the request through.
+        """
+        raise NotImplementedError
+
+    def get_rate(self, scope: str) -> str | None:
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(f"{scope}:{self.kind}")
+        return None if rate is None else str(rate)
+
+    def allow_request(self, request, view):  # type: ignore[no-untyped-def]
+        return self.check(request, getattr(view, "throttle_scope", None))
+
+    def check(self, request: Any, scope: str | None) -> bool:
+        self.wait_time = 0.0
+        rate = self.get_rate(scope) if scope else None
+        ident = self.get_ident_key(request) if rate else None
+        if ident is None:
+            return True
+        capacity, per_second = parse_rate(rate)  # type: ignore[arg-type]
+        decision = get_store().take(
+            f"{KEY_PREFIX}{scope}:{self.kind}:{ident}", capacity, per_second
+        )
+        self.wait_time = decision.wait
+        return decision.allowed
+
+    def wait(self):  # type: ignore[no-untyped-def]
+        return self.wait_time
+
+
+class IPThrottle(BucketThrottle):
+    """
+    Limit each client IP address (see ``NUM_PROXIES``).
+    """
+
+    kind = "ip"
+
+    def get_ident_key(self, request: Any) -> str | None:
+        return self.get_ident(request)  # type: ignore[no-any-return]
+
+
+class DeviceThrottle(BucketThrottle):
+    """
+    Limit each anonymous device; requests without a device cookie pass.
+    """
+
+    kind = "device"
+
+    def get_ident_key(self, request: Any) -> str | None:
+        device_id = getattr(request, "device_id", None)
+        return device_id.hex if device_id is not None else None
+
+
+class UserThrottle(BucketThrottle):
+    """
+    Limit each authenticated user; anonymous requests pass.
+    """
+
+    kind = "user"
+
+    def get_ident_key(self, request: Any) -> str | None:
+        user = request.user
+        return str(user.pk) if user.is_authenticated else None
+
+
+def throttled_response(wait: float) -> HttpResponse:
+    """
+    Return the 429 response for a refused request.
+    """
+    seconds = max(1, math.ceil(wait))
+    response = JsonResponse(
+        {"detail": f"Request was throttled. Expected available in {seconds} seconds."},
+        status=429,
+    )
+    response["Retry-After"] = str(seconds)
+    return response
+
+
+def throttle(
+    scope: str, throttle_classes: Iterable[type[BucketThrottle]]
+) -> Callable[[Callable], Callable]:
+    """
+    Apply throttles to a plain (sync or async) Django view. Async views
+    check a Redis store on a thread, off the event loop.
+    """
+    classes = list(throttle_classes)
+
+    def refusal(request: HttpRequest) -> HttpResponse | None:
+        waits = []
+        for throttle_class in classes:
+            throttle = throttle_class()
+            if not throttle.check(request, scope):
+                waits.append(throttle.wait_time)
+        return throttled_response(max(waits)) if waits else None
+
+    def decorator(view: Callable) -> Callable:
+        if iscoroutinefunction(view):
+
+            @functools.wraps(view)
+            async def async_inner(
+                request: HttpRequest, *args: Any, **kwargs: Any
+            ) -> Any:
+                if get_store().blocking:
+                    refused = await sync_to_async(refusal, thread_sensitive=False)(
+                        request
+                    )
+                else:
+                    refused = refusal(request)
+                return refused or await view(request, *args, **kwargs)
+
+            return async_inner
+
+        @functools.wraps(view)
+        def inner(request: HttpRequest, *args: Any, **kwargs: Any) -> Any:
+            return refusal(request) or view(request, *args, **kwargs)
+
+        return inner
+
+    return decorator
@@ -18,7 +18,12 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import include, path
 
+from .metrics import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/v1/", include("users.urls")),
+    path("api/v1/quizzes/", include("quizzes.urls")),
+    path("api/v1/analytics/", include("analytics.urls")),
+    path("metrics", metrics_view, name="metrics"),
 ]
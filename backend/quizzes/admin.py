@@ -1 +1,61 @@
-# Register your models here.
+from django.contrib import admin
+
+from .models import Attempt, DailyPuzzle, Guess, Title, TitleAlias
+
+
+@admin.register(DailyPuzzle)
+class DailyPuzzleAdmin(admin.ModelAdmin):
+    """
+    Admin for scheduling daily puzzles.
+    """
+
+    list_display = ("puzzle_date", "category", "answer", "materialized_at")
+    list_filter = ("category",)
+    search_fields = ("answer",)
+    ordering = ("-puzzle_date",)
+    date_hierarchy = "puzzle_date"
+    readonly_fields = ("payload_etag", "materialized_at", "created_at", "updated_at")
+
+
+class TitleAliasInline(admin.TabularInline):
+    model = TitleAlias
+    extra = 1
+
+
+@admin.register(Title)
+class TitleAdmin(admin.ModelAdmin):
+    """
+    Admin for the guessable title catalogue.
+    """
+
+    list_display = ("name", "kind", "year", "popularity")
+    list_filter = ("kind",)
+    search_fields = ("name", "aliases__name")
+    ordering = ("-popularity", "name")
+    inlines = [TitleAliasInline]
+
+
+@admin.register(Attempt)
+class AttemptAdmin(admin.ModelAdmin):
+    """
+    Admin for browsing players' attempts.
+    """
+
+    list_display = ("puzzle", "user", "guess_count", "solved", "completed_at")
+    list_filter = ("solved",)
+    list_select_related = ("puzzle", "user")
+    raw_id_fields = ("puzzle", "user")
+    ordering = ("-created_at",)
+
+
+@admin.register(Guess)
+class GuessAdmin(admin.ModelAdmin):
+    """
+    Admin for browsing the guesses of attempts.
+    """
+
+    list_display = ("attempt", "number", "text", "title", "correct", "created_at")
+    list_filter = ("correct",)
+    list_select_related = ("attempt", "title")
+    raw_id_fields = ("attempt", "title")
+    ordering = ("-created_at",)
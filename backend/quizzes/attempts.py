@@ -0,0 +1,44 @@
+"""
+Recording players' progress on daily puzzles.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from analytics import rollups
+from popcornguess import metrics
+from users import leaderboard, streaks
+
+from .models import Attempt
+
+
+def complete_attempt(attempt: Attempt, *, solved: bool) -> bool:
+    """
+    Mark an attempt finished, count it in the puzzle statistics and update
+    the player's streak and leaderboard positions.
+    ``attempt.guess_count`` must be up to date. Returns False, changing
+    nothing, if the attempt was already finished.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        # The conditional UPDATE makes completion idempotent under races
+        updated = Attempt.objects.filter(
+            pk=attempt.pk, completed_at__isnull=True
+        ).update(solved=solved, completed_at=now)
+        if not updated:
+            return False
+        rollups.record_completion(
+            puzzle_date=attempt.puzzle.puzzle_date,
+            guess_count=attempt.guess_count,
+            solved=solved,
+            completed_on=now.date(),
+        )
+        user_id = attempt.user_id
+        if user_id is not None and streaks.record_completion(
+            user_id, attempt.puzzle.puzzle_date, solved
+        ):
+            transaction.on_commit(lambda: leaderboard.sync_user(user_id))
+    metrics.COMPLETIONS.labels("true" if solved else "false").inc()
+    attempt.solved = solved
+    attempt.completed_at = now
+    return True
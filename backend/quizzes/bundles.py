@@ -0,0 +1,204 @@
+"""
+Puzzle bundles: the coming days' puzzles in one response, each locked
+until its day.
+
+Without bundles every client downloads the puzzle right after the 00:00 UTC
+rollover. A bundle holds the materialized payloads of today and the next
+``PUZZLE_BUNDLE_DAYS - 1`` days, so clients can fetch it whenever they
+like during the day; at rollover they only ask for the new day's key (a
+few bytes that cost no database or cache access).
+
+Each day's payload is deflated and encrypted with AES-256-GCM under a key
+derived from ``SECRET_KEY`` and the date (`day_key`), with the date as
+associated data. `release_key` hands out a key once its day has come. The
+GCM tag also authenticates the content: a bundle altered on the way, or
+one day's content moved to another, fails to decrypt. Answers are not in
+the bundle; guesses are checked by the guess endpoint.
+
+A bundle is addressed by its content: its version is a digest of its body,
+so it can be served as immutable from a versioned URL, and a new version
+(the next day, or an edited puzzle) gets a new URL. Bundles are built once
+per window and cached with their gzipped body.
+"""
+
+import base64
+import datetime
+import gzip
+import hashlib
+import json
+import zlib
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.crypto import salted_hmac
+
+from asgiref.sync import sync_to_async
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from popcornguess import metrics
+
+from . import daily
+from .models import DailyPuzzle
+
+CACHE_KEY_PREFIX = "quizzes:bundle:"
+KEY_SALT = "quizzes.bundles.day_key"
+# Bumped when the bundle layout changes
+FORMAT = 1
+
+
+class Bundle(NamedTuple):
+    """A built bundle as stored in the cache."""
+
+    version: str
+    body: bytes
+    gzipped: bytes
+    last_modified: int
+
+
+def get_days() -> int:
+    """
+    Return how many days (from today) a bundle covers.
+    """
+    return int(getattr(settings, "PUZZLE_BUNDLE_DAYS", 7))
+
+
+def cache_key(start: datetime.date) -> str:
+    """
+    Return the cache key of the bundle starting on a date.
+    """
+    return f"{CACHE_KEY_PREFIX}{start.isoformat()}"
+
+
+def version_cache_key(version: str) -> str:
+    """
+    Return the cache key of a bundle by version.
+    """
+    return f"{CACHE_KEY_PREFIX}version:{version}"
+
+
+def day_key(puzzle_date: datetime.date) -> bytes:
+    """
+    Return the 256-bit key that unlocks a date's puzzle.
+    """
+    return salted_hmac(KEY_SALT, puzzle_date.isoformat(), algorithm="sha256").digest()
+
+
+def release_key(puzzle_date: datetime.date) -> str | None:
+    """
+    Return a date's key (URL-safe base64), or None before the date.
+    """
+    if puzzle_date > daily.today():
+        return None
+    return base64.urlsafe_b64encode(day_key(puzzle_date)).decode()
+
+
+def seal(puzzle_date: datetime.date, payload: str) -> dict:
+    """
+    Return a day's entry: its payload, deflated and encrypted.
+    """
+    key = day_key(puzzle_date)
+    plaintext = zlib.compress(payload.encode(), 9)
+    # Derived from the content, so an unchanged day seals to the same bytes
+    # (keeping the version stable), and a nonce is never reused for
+    # different content under one key
+    nonce = hashlib.sha256(key + plaintext).digest()[:12]
+    data = AESGCM(key).encrypt(nonce, plaintext, puzzle_date.isoformat().encode())
+    return {
+        "date": puzzle_date.isoformat(),
+        "nonce": base64.urlsafe_b64encode(nonce).decode(),
+        "data": base64.urlsafe_b64encode(data).decode(),
+    }
+
+
+def unseal(entry: dict, key: str) -> str:
+    """
+    Return the payload of a day's entry, given its released key. Raises
+    ``cryptography.exceptions.InvalidTag`` for a wrong key or altered data.
+    """
+    plaintext = AESGCM(base64.urlsafe_b64decode(key)).decrypt(
+        base64.urlsafe_b64decode(entry["nonce"]),
+        base64.urlsafe_b64decode(entry["data"]),
+        entry["date"].encode(),
+    )
+    return zlib.decompress(plaintext).decode()
+
+
+def build(start: datetime.date) -> Bundle:
+    """
+    Build the bundle of the puzzles from a date on.
+    """
+    end = start + datetime.timedelta(days=get_days() - 1)
+    puzzles = DailyPuzzle.objects.filter(puzzle_date__range=(start, end)).order_by(
+        "puzzle_date"
+    )
+    days = []
+    last_modified = 0
+    for puzzle in puzzles:
+        if not puzzle.payload:
+            puzzle.refresh_payload()
+        days.append(seal(puzzle.puzzle_date, puzzle.payload))
+        assert puzzle.materialized_at is not None
+        last_modified = max(last_modified, int(puzzle.materialized_at.timestamp()))
+    body = json.dumps(
+        {"format": FORMAT, "start": start.isoformat(), "days": days},
+        separators=(",", ":"),
+    ).encode()
+    return Bundle(
+        version=hashlib.sha256(body).hexdigest()[:32],
+        body=body,
+        gzipped=gzip.compress(body, 9, mtime=0),
+        last_modified=last_modified,
+    )
+
+
+def prime(start: datetime.date) -> Bundle:
+    """
+    Build the bundle starting on a date and store it in the cache.
+    """
+    bundle = build(start)
+    cache.set_many(
+        {cache_key(start): bundle, version_cache_key(bundle.version): bundle},
+        daily.get_cache_timeout(),
+    )
+    return bundle
+
+
+async def aget_current() -> Bundle:
+    """
+    Return the bundle starting today, building it on a cache miss.
+    """
+    start = daily.today()
+    bundle = await cache.aget(cache_key(start))
+    metrics.record_cache_lookup("puzzle_bundle", bundle is not None)
+    if bundle is not None:
+        return bundle  # type: ignore[no-any-return]
+    return await sync_to_async(prime)(start)
+
+
+async def aget_version(version: str) -> Bundle | None:
+    """
+    Return a bundle by version, or None once it is neither cached nor the
+    current bundle. A cache miss (eviction, a restarted cache, another
+    node's cache) rebuilds the current bundle, so its versioned URL keeps
+    working.
+    """
+    bundle = await cache.aget(version_cache_key(version))
+    if bundle is not None:
+        return bundle  # type: ignore[no-any-return]
+    current = await aget_current()
+    return current if current.version == version else None
+
+
+def invalidate(puzzle_date: datetime.date) -> None:
+    """
+    Drop every cached bundle covering a date once the surrounding
+    transaction commits. Bundles already fetched by version stay valid:
+    they are immutable, the current bundle just gets a new version.
+    """
+    keys = [
+        cache_key(puzzle_date - datetime.timedelta(days=offset))
+        for offset in range(get_days())
+    ]
+    transaction.on_commit(lambda: cache.delete_many(keys))
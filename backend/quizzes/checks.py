@@ -0,0 +1,63 @@
+"""
+System checks for the quizzes app.
+"""
+
+from collections.abc import Sequence
+from typing import Any
+
+from django.apps import AppConfig
+from django.core import checks
+from django.db import connections
+
+
+def migrations_create_trigram_extension() -> bool:
+    """
+    Return whether a quizzes migration enables pg_trgm.
+    """
+    from django.contrib.postgres.operations import TrigramExtension
+    from django.db.migrations.loader import MigrationLoader
+
+    loader = MigrationLoader(None, ignore_no_migrations=True)
+    return any(
+        isinstance(operation, TrigramExtension)
+        for (app_label, _), migration in loader.disk_migrations.items()
+        if app_label == "quizzes"
+        for operation in migration.operations
+    )
+
+
+@checks.register(checks.Tags.database)
+def check_trigram_extension(
+    *,
+    app_configs: Sequence[AppConfig] | None = None,
+    databases: Sequence[str] | None = None,
+    **kwargs: Any,
+) -> list[checks.CheckMessage]:
+    """
+    Fail `migrate` before it reaches the GIN trigram indexes on titles and
+    aliases when PostgreSQL lacks the pg_trgm extension they need, unless
+    a quizzes migration enables it first.
+    """
+    errors: list[checks.CheckMessage] = []
+    for alias in databases or []:
+        connection = connections[alias]
+        if connection.vendor != "postgresql":
+            continue
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            if cursor.fetchone() is not None:
+                continue
+        if migrations_create_trigram_extension():
+            break
+        errors.append(
+            checks.Error(
+                f"The pg_trgm extension is not installed in database '{alias}'.",
+                hint=(
+                    "Add TrigramExtension() ahead of the trigram indexes in the "
+                    "quizzes migration, or have a superuser run CREATE EXTENSION "
+                    "pg_trgm (see docs/DEPLOYMENT.md)."
+                ),
+                id="quizzes.E001",
+            )
+        )
+    return errors
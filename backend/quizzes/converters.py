@@ -0,0 +1,19 @@
+"""
+URL path converters for the quizzes app.
+"""
+
+import datetime
+
+
+class IsoDateConverter:
+    """
+    Match an ISO 8601 calendar date (YYYY-MM-DD) and convert it to a date.
+    """
+
+    regex = r"\d{4}-\d{2}-\d{2}"
+
+    def to_python(self, value: str) -> datetime.date:
+        return datetime.date.fromisoformat(value)
+
+    def to_url(self, value: datetime.date) -> str:
+        return value.isoformat()
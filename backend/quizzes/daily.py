@@ -0,0 +1,190 @@
+"""
+Read path for the materialized daily puzzle.
+
+Every player requests the same payload right after the 00:00 UTC rollover,
+so the puzzle is serialized once (see `DailyPuzzle.refresh_payload`) and
+served from the cache framework. A cache hit costs no database query and
+no serialization; a miss costs a single indexed row read and repopulates
+the cache for every later request.
+"""
+
+import datetime
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from asgiref.sync import sync_to_async
+
+from popcornguess import metrics
+
+from .models import DailyPuzzle
+
+CACHE_KEY_PREFIX = "quizzes:daily:"
+
+# Cached in place of an entry when no puzzle exists for a date, so a missing
+# puzzle doesn't turn the rollover spike into a stampede of empty queries.
+MISSING = "missing"
+MISSING_TIMEOUT = 30
+
+
+class MaterializedPuzzle(NamedTuple):
+    """A pre-serialized puzzle as stored in the cache."""
+
+    payload: str
+    etag: str
+    last_modified: int
+
+
+class AnswerKey(NamedTuple):
+    """What checking a guess needs to know about a puzzle."""
+
+    puzzle_id: int
+    answer: str
+    max_guesses: int
+
+
+def cache_key(puzzle_date: datetime.date) -> str:
+    """
+    Return the cache key holding the materialized puzzle for a date.
+    """
+    return f"{CACHE_KEY_PREFIX}{puzzle_date.isoformat()}"
+
+
+def answer_cache_key(puzzle_date: datetime.date) -> str:
+    """
+    Return the cache key holding the answer key for a date.
+    """
+    return f"{CACHE_KEY_PREFIX}answer:{puzzle_date.isoformat()}"
+
+
+def get_cache_timeout() -> int:
+    """
+    Return how long (in seconds) a materialized puzzle stays cached.
+    """
+    return int(getattr(settings, "DAILY_PUZZLE_CACHE_TIMEOUT", 60 * 60 * 48))
+
+
+def today() -> datetime.date:
+    """
+    Return the current puzzle date. Puzzles roll over at midnight UTC.
+    """
+    return timezone.now().astimezone(datetime.timezone.utc).date()
+
+
+def seconds_until_rollover() -> int:
+    """
+    Return the number of seconds until the next puzzle goes live.
+    """
+    now = timezone.now().astimezone(datetime.timezone.utc)
+    rollover = datetime.datetime.combine(
+        now.date() + datetime.timedelta(days=1),
+        datetime.time.min,
+        tzinfo=datetime.timezone.utc,
+    )
+    return max(int((rollover - now).total_seconds()), 0)
+
+
+def to_entry(puzzle: DailyPuzzle) -> MaterializedPuzzle:
+    """
+    Build the cache entry for a puzzle whose payload is up to date.
+    """
+    assert puzzle.materialized_at is not None
+    return MaterializedPuzzle(
+        payload=puzzle.payload,
+        etag=f'"{puzzle.payload_etag}"',
+        last_modified=int(puzzle.materialized_at.timestamp()),
+    )
+
+
+def prime(puzzle: DailyPuzzle) -> MaterializedPuzzle:
+    """
+    Store a puzzle's materialized payload in the cache.
+    """
+    entry = to_entry(puzzle)
+    cache.set(cache_key(puzzle.puzzle_date), entry, get_cache_timeout())
+    return entry
+
+
+def materialize(puzzle: DailyPuzzle) -> MaterializedPuzzle:
+    """
+    Re-serialize a puzzle, persist the payload and prime the cache.
+    """
+    if puzzle.refresh_payload():
+        puzzle.save(update_fields=["payload", "payload_etag", "materialized_at"])
+    return prime(puzzle)
+
+
+def get_materialized(puzzle_date: datetime.date) -> MaterializedPuzzle | None:
+    """
+    Return the materialized puzzle for a date, or None if there is none.
+    """
+    key = cache_key(puzzle_date)
+    entry = cache.get(key)
+    metrics.record_cache_lookup("daily_puzzle", entry is not None)
+    if entry == MISSING:
+        return None
+    if entry is not None:
+        return entry  # type: ignore[no-any-return]
+
+    puzzle = DailyPuzzle.objects.filter(puzzle_date=puzzle_date).first()
+    if puzzle is None:
+        cache.set(key, MISSING, MISSING_TIMEOUT)
+        return None
+    return materialize(puzzle)
+
+
+async def aget_materialized(puzzle_date: datetime.date) -> MaterializedPuzzle | None:
+    """
+    Async version of `get_materialized`, for the async gameplay views.
+    """
+    key = cache_key(puzzle_date)
+    entry = await cache.aget(key)
+    metrics.record_cache_lookup("daily_puzzle", entry is not None)
+    if entry == MISSING:
+        return None
+    if entry is not None:
+        return entry  # type: ignore[no-any-return]
+
+    puzzle = await DailyPuzzle.objects.filter(puzzle_date=puzzle_date).afirst()
+    if puzzle is None:
+        await cache.aset(key, MISSING, MISSING_TIMEOUT)
+        return None
+    return await sync_to_async(materialize)(puzzle)
+
+
+def get_answer_key(puzzle_date: datetime.date) -> AnswerKey | None:
+    """
+    Return the answer key for a date, or None if there is no puzzle.
+    Cached like the payload, so checking a guess costs no puzzle query.
+    """
+    key = answer_cache_key(puzzle_date)
+    entry = cache.get(key)
+    metrics.record_cache_lookup("answer_key", entry is not None)
+    if entry == MISSING:
+        return None
+    if entry is not None:
+        return entry  # type: ignore[no-any-return]
+
+    row = (
+        DailyPuzzle.objects.filter(puzzle_date=puzzle_date)
+        .values_list("pk", "answer", "max_guesses")
+        .first()
+    )
+    if row is None:
+        cache.set(key, MISSING, MISSING_TIMEOUT)
+        return None
+    entry = AnswerKey(*row)
+    cache.set(key, entry, get_cache_timeout())
+    return entry
+
+
+def invalidate(puzzle_date: datetime.date) -> None:
+    """
+    Drop the cached payload and answer key for a date once the surrounding
+    transaction commits; the next read materializes them again.
+    """
+    keys = [cache_key(puzzle_date), answer_cache_key(puzzle_date)]
+    transaction.on_commit(lambda: cache.delete_many(keys))
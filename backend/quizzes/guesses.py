@@ -0,0 +1,295 @@
+"""
+The guess write path.
+
+Guesses are the busiest writes, so each one is a single transaction of two
+statements, with no reads before them:
+
+1. an upsert of the player's attempt that also counts the guess:
+   ``INSERT ... ON CONFLICT DO UPDATE SET guess_count = guess_count + 1``,
+   which only updates while the attempt is unfinished and has guesses
+   left, and returns the attempt id and the new count;
+2. an insert of the guess under the client's idempotency key,
+   ``ON CONFLICT DO NOTHING``.
+
+When statement 2 finds the key already used, the transaction is rolled
+back, and with it the count; the retry gets the original guess's outcome.
+The row lock taken by statement 1 makes concurrent submissions of the same
+key wait for each other, so exactly one of them counts.
+
+The puzzle's answer comes from the cache (`daily.get_answer_key`), and the
+guess is matched in memory (`matching.match`).
+
+Two guesses run more than the two statements:
+
+* the guess that solves the puzzle or uses the last try also completes the
+  attempt, in the same transaction (`attempts.complete_attempt`): an
+  UPDATE of the attempt, the three ``F()`` counters of the puzzle
+  statistics (each followed by an INSERT the first time in a day) and an
+  UPDATE of the player's streak, five more statements, once per attempt;
+* an anonymous device's first guess finds no device row to attach its
+  attempt to, so the row is looked up and created (two statements) and
+  the guess is written again, once per device.
+
+Both statements use ``RETURNING`` and ``ON CONFLICT`` with the partial
+unique indexes of `Attempt`, which PostgreSQL and SQLite (3.35+) support.
+"""
+
+import datetime
+import uuid
+from typing import Any, NamedTuple
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from users.models import AnonymousDevice
+
+from . import matching
+from .attempts import complete_attempt
+from .daily import AnswerKey
+from .models import Attempt, DailyPuzzle, Guess
+
+
+class PuzzleFinished(Exception):
+    """Raised for a guess at an attempt that is solved or out of guesses."""
+
+
+class DuplicateGuess(Exception):
+    """Raised inside the transaction to undo a retried guess."""
+
+
+class Player(NamedTuple):
+    """Who is guessing: a user, or else an anonymous device."""
+
+    user_id: int | None = None
+    device_id: uuid.UUID | None = None
+
+
+class GuessResult(NamedTuple):
+    """The outcome of a guess, as returned to the player."""
+
+    text: str
+    title_id: int | None
+    title_name: str | None
+    correct: bool
+    number: int
+    max_guesses: int
+    solved: bool
+    completed: bool
+    # False when replayed for a retried idempotency key
+    created: bool
+
+    @property
+    def remaining(self) -> int:
+        return 0 if self.completed else self.max_guesses - self.number
+
+
+# Bumps the count of an unfinished attempt with guesses left; without a
+# row to update, returns nothing
+_COUNT_GUESS = """
+ON CONFLICT (puzzle_id, {column}) WHERE {column} IS NOT NULL
+DO UPDATE SET guess_count = puzzle_attempts.guess_count + 1
+WHERE puzzle_attempts.completed_at IS NULL
+AND puzzle_attempts.guess_count < %s
+RETURNING id, guess_count
+"""
+
+USER_ATTEMPT_SQL = """
+INSERT INTO puzzle_attempts
+(puzzle_id, user_id, device_id, guess_count, solved, created_at)
+VALUES (%s, %s, NULL, 1, %s, %s)
+""" + _COUNT_GUESS.format(
+    column="user_id"
+)
+
+# Inserts nothing if the device has no row yet
+DEVICE_ATTEMPT_SQL = """
+INSERT INTO puzzle_attempts
+(puzzle_id, user_id, device_id, guess_count, solved, created_at)
+SELECT %s, NULL, id, 1, %s, %s FROM anonymous_devices WHERE device_id = %s
+""" + _COUNT_GUESS.format(
+    column="device_id"
+)
+
+GUESS_SQL = """
+INSERT INTO puzzle_guesses
+(attempt_id, idempotency_key, text, title_id, correct, number, created_at)
+VALUES (%s, %s, %s, %s, %s, %s, %s)
+ON CONFLICT (attempt_id, idempotency_key) DO NOTHING
+RETURNING id
+"""
+
+
+def _uuid(value: uuid.UUID) -> Any:
+    field: Any = Guess._meta.get_field("idempotency_key")
+    return field.get_db_prep_value(value, connection)
+
+
+def is_correct(text: str, match: matching.TitleMatch | None, answer: str) -> bool:
+    """
+    Return whether a guess names the answer, directly or through the
+    catalogue title it matched.
+    """
+    expected = matching.normalize_title(answer)
+    if matching.normalize_title(text) == expected:
+        return True
+    return match is not None and matching.normalize_title(match.name) == expected
+
+
+def count_guess(
+    answer_key: AnswerKey, player: Player, now: datetime.datetime
+) -> tuple[int, int] | None:
+    """
+    Run statement 1; return (attempt id, guess number), or None.
+    """
+    created_at = connection.ops.adapt_datetimefield_value(now)
+    with connection.cursor() as cursor:
+        if player.user_id is not None:
+            cursor.execute(
+                USER_ATTEMPT_SQL,
+                [
+                    answer_key.puzzle_id,
+                    player.user_id,
+                    False,
+                    created_at,
+                    answer_key.max_guesses,
+                ],
+            )
+        else:
+            cursor.execute(
+                DEVICE_ATTEMPT_SQL,
+                [
+                    answer_key.puzzle_id,
+                    False,
+                    created_at,
+                    _uuid(player.device_id),  # type: ignore[arg-type]
+                    answer_key.max_guesses,
+                ],
+            )
+        row = cursor.fetchone()
+    return (row[0], row[1]) if row else None
+
+
+def record_guess(guess: Guess, now: datetime.datetime) -> bool:
+    """
+    Run statement 2; return False if the key was used before.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            GUESS_SQL,
+            [
+                guess.attempt_id,
+                _uuid(guess.idempotency_key),
+                guess.text,
+                guess.title_id,
+                guess.correct,
+                guess.number,
+                connection.ops.adapt_datetimefield_value(now),
+            ],
+        )
+        return cursor.fetchone() is not None
+
+
+def replay(answer_key: AnswerKey, player: Player, key: uuid.UUID) -> GuessResult | None:
+    """
+    Return the outcome of an earlier guess made with this key, or None.
+    """
+    guesses = Guess.objects.select_related("attempt", "title").filter(
+        attempt__puzzle_id=answer_key.puzzle_id, idempotency_key=key
+    )
+    if player.user_id is not None:
+        guesses = guesses.filter(attempt__user_id=player.user_id)
+    else:
+        guesses = guesses.filter(attempt__device__device_id=player.device_id)
+    guess = guesses.first()
+    if guess is None:
+        return None
+    return GuessResult(
+        text=guess.text,
+        title_id=guess.title_id,
+        title_name=guess.title.name if guess.title else None,
+        correct=guess.correct,
+        number=guess.number,
+        max_guesses=answer_key.max_guesses,
+        solved=guess.attempt.solved,
+        completed=guess.attempt.is_completed,
+        created=False,
+    )
+
+
+def write_guess(
+    answer_key: AnswerKey, puzzle_date: datetime.date, player: Player, guess: Guess
+) -> Guess | None:
+    """
+    Count and record a guess in one transaction, completing the attempt if
+    it ends it. Returns the guess with its number, or None if nothing was
+    written.
+    """
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            counted = count_guess(answer_key, player, now)
+            if counted is None:
+                return None
+            guess.attempt_id, guess.number = counted
+            if not record_guess(guess, now):
+                raise DuplicateGuess
+            if guess.correct or guess.number >= answer_key.max_guesses:
+                complete_attempt(
+                    Attempt(
+                        pk=guess.attempt_id,
+                        puzzle=DailyPuzzle(
+                            pk=answer_key.puzzle_id, puzzle_date=puzzle_date
+                        ),
+                        user_id=player.user_id,
+                        guess_count=guess.number,
+                    ),
+                    solved=guess.correct,
+                )
+    except DuplicateGuess:
+        return None
+    return guess
+
+
+def submit_guess(
+    answer_key: AnswerKey,
+    puzzle_date: datetime.date,
+    player: Player,
+    text: str,
+    key: uuid.UUID,
+) -> GuessResult:
+    """
+    Check and record a guess. A retry with an idempotency key already used
+    by this player returns the first outcome without counting again.
+    Raises PuzzleFinished.
+    """
+    match = matching.match(text)
+    guess = Guess(
+        idempotency_key=key,
+        text=text,
+        title_id=match.title_id if match else None,
+        correct=is_correct(text, match, answer_key.answer),
+    )
+    written = write_guess(answer_key, puzzle_date, player, guess)
+    if written is None and player.user_id is None:
+        # A device's first guess finds no device row to attach its attempt
+        # to. Replaying first would cost that guess another read, so a retry
+        # or a finished attempt pays for the second write instead.
+        AnonymousDevice.objects.get_or_create(device_id=player.device_id)
+        written = write_guess(answer_key, puzzle_date, player, guess)
+    if written is None:
+        # A retry, or a guess at a finished attempt
+        result = replay(answer_key, player, key)
+        if result is None:
+            raise PuzzleFinished
+        return result
+    return GuessResult(
+        text=text,
+        title_id=written.title_id,
+        title_name=match.name if match else None,
+        correct=written.correct,
+        number=written.number,
+        max_guesses=answer_key.max_guesses,
+        solved=written.correct,
+        completed=written.correct or written.number >= answer_key.max_guesses,
+        created=True,
+    )
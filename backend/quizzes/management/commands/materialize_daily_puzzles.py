@@ -0,0 +1,64 @@
+"""
+Pre-serialize upcoming daily puzzles and prime the cache.
+
+Schedule this shortly before the 00:00 UTC rollover so the first wave of
+players is served straight from the cache, e.g.::
+
+    50 23 * * * python manage.py materialize_daily_puzzles --days 2
+"""
+
+import datetime
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from quizzes import daily
+from quizzes.models import DailyPuzzle
+
+
+class Command(BaseCommand):
+    help = "Materialize the payload of upcoming daily puzzles and prime the cache."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--date",
+            help="First puzzle date to materialize (YYYY-MM-DD). Defaults to today.",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=2,
+            help="Number of consecutive days to materialize (default: 2).",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["date"]:
+            try:
+                start = datetime.date.fromisoformat(options["date"])
+            except ValueError as exc:
+                raise CommandError(f"Invalid --date: {exc}") from exc
+        else:
+            start = daily.today()
+        if options["days"] < 1:
+            raise CommandError("--days must be at least 1.")
+
+        dates = [start + datetime.timedelta(days=i) for i in range(options["days"])]
+        puzzles = {
+            puzzle.puzzle_date: puzzle
+            for puzzle in DailyPuzzle.objects.filter(puzzle_date__in=dates)
+        }
+
+        for puzzle_date in dates:
+            puzzle = puzzles.get(puzzle_date)
+            if puzzle is None:
+                self.stderr.write(
+                    self.style.WARNING(f"No puzzle scheduled for {puzzle_date}.")
+                )
+                continue
+            entry = daily.materialize(puzzle)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Materialized {puzzle_date} "
+                    f"({len(entry.payload)} bytes, ETag {entry.etag})."
+                )
+            )
@@ -0,0 +1,479 @@
+"""
+Fuzzy title matching for answer validation.
+
+Scanning the whole catalogue with an edit distance per guess does not survive
+the morning spike, so titles are indexed once per process:
+
+* every title name and alias is normalized (case, accents, punctuation and a
+  leading article are ignored) into an exact-match table;
+* each normalized entry is split into trigrams and stored in an inverted
+  index. A guess only looks at entries sharing its rarest trigrams (prefix
+  filtering: an entry with trigram similarity >= t must share one of the
+  first ``n - ceil(t * n) + 1`` rarest trigrams of the guess);
+* the best few candidates are verified with an optimal-string-alignment
+  edit distance, which tolerates the typos trigrams are bad at (``matirx``).
+
+`get_matcher()` returns the process-wide matcher. With
+``TITLE_MATCHER_COLD_START = "postgres"`` the first requests of a fresh
+process are answered through PostgreSQL's ``pg_trgm`` while the in-memory
+index is built in the background.
+"""
+
+import logging
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from typing import NamedTuple, Protocol
+
+from django.conf import settings
+
+from popcornguess import metrics
+
+logger = logging.getLogger(__name__)
+
+_ARTICLES = ("the ", "a ", "an ")
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_title(value: str) -> str:
+    """
+    Normalize a title or guess for comparison.
+    "The Lord of the Rings: Return of the King" -> "lord of the rings return of
+    the king".
+    """
+    value = unicodedata.normalize("NFKD", value)
+    value = "".join(char for char in value if not unicodedata.combining(char))
+    value = value.lower().replace("&", " and ")
+    value = _NON_ALNUM.sub(" ", value).strip()
+    for article in _ARTICLES:
+        if value.startswith(article) and len(value) > len(article):
+            return value[len(article) :]
+    return value
+
+
+def trigrams(normalized: str) -> frozenset[str]:
+    """
+    Return the trigrams of a normalized string, padded like pg_trgm.
+    """
+    padded = f"  {normalized} "
+    return frozenset(padded[i : i + 3] for i in range(len(padded) - 2))
+
+
+def similarity(a: str, b: str) -> float:
+    """
+    Return 1 - OSA edit distance / length of the longer string.
+    Adjacent transpositions count as a single edit.
+    """
+    if a == b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    previous2: list[int] = []
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, char_b in enumerate(b, 1):
+            cost = 0 if char_a == char_b else 1
+            current[j] = min(
+                previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost
+            )
+            if (
+                i > 1
+                and j > 1
+                and char_a == b[j - 2]
+                and a[i - 2] == char_b
+                and previous2[j - 2] + 1 < current[j]
+            ):
+                current[j] = previous2[j - 2] + 1
+        previous2, previous = previous, current
+    return 1 - previous[-1] / max(len(a), len(b))
+
+
+class TitleMatch(NamedTuple):
+    """The best catalogue match for a guess."""
+
+    title_id: int
+    name: str
+    score: float
+
+
+class TitleRecord(NamedTuple):
+    """A catalogue entry as loaded into a matcher."""
+
+    title_id: int
+    name: str
+    popularity: int
+    aliases: tuple[str, ...] = ()
+    year: int | None = None
+
+
+class TitleMatcher(Protocol):
+    """Interface shared by matcher backends."""
+
+    def match(self, guess: str) -> TitleMatch | None: ...
+
+
+class _IndexState(NamedTuple):
+    """What readers of a `TitleIndex` look at, swapped in as one."""
+
+    # Title id -> (name, popularity)
+    titles: dict[int, tuple[str, int]]
+    # Per entry (a normalized name or alias): the text, its title id and
+    # its trigrams
+    entries: list[str]
+    entry_titles: list[int]
+    entry_grams: list[frozenset[str]]
+    # Trigram -> ids of the entries containing it
+    postings: dict[str, list[int]]
+    # Entries of removed titles, and of replaced versions of titles
+    dead: frozenset[int]
+
+
+class TitleIndex:
+    """
+    In-memory trigram index over title names and aliases.
+
+    Reads are lock-free; writers are serialized. A reader takes the current
+    state once and works on it: writers copy the titles and swap in a new
+    state, and only append to the entry lists and postings they share with
+    readers. Removed entries are tombstoned in the new state's ``dead``, and
+    skipped by its readers, until a compaction renumbers the live entries
+    into new lists.
+    """
+
+    def __init__(
+        self,
+        records: Iterable[TitleRecord] = (),
+        *,
+        threshold: float | None = None,
+        candidate_threshold: float = 0.5,
+        verify: int = 8,
+    ) -> None:
+        self.threshold = (
+            threshold
+            if threshold is not None
+            else float(getattr(settings, "TITLE_MATCH_THRESHOLD", 0.75))
+        )
+        self.candidate_threshold = candidate_threshold
+        self.verify = verify
+        self._lock = threading.Lock()
+        self._exact: dict[str, int] = {}
+        self._title_entries: dict[int, list[int]] = {}
+        self._state = _IndexState({}, [], [], [], {}, frozenset())
+        self.update(records)
+
+    def __len__(self) -> int:
+        return len(self._state.titles)
+
+    def __contains__(self, title_id: object) -> bool:
+        return title_id in self._state.titles
+
+    def add(self, record: TitleRecord) -> None:
+        """
+        Index a title, replacing any previous version of it.
+        """
+        self.update([record])
+
+    def remove(self, title_id: int) -> None:
+        """
+        Drop a title from the index.
+        """
+        self.update(removed=[title_id])
+
+    def update(
+        self, records: Iterable[TitleRecord] = (), removed: Iterable[int] = ()
+    ) -> None:
+        """
+        Index or replace titles and drop others, copying the titles once for
+        the whole batch.
+        """
+        records = list(records)
+        with self._lock:
+            state = self._state
+            titles = dict(state.titles)
+            dead: list[int] = []
+            for title_id in {record.title_id for record in records}.union(removed):
+                dead.extend(self._drop(state, titles, title_id))
+            for record in records:
+                titles[record.title_id] = (record.name, record.popularity)
+                entry_ids = self._title_entries.setdefault(record.title_id, [])
+                for variant in (record.name, *record.aliases):
+                    normalized = normalize_title(variant)
+                    if not normalized:
+                        continue
+                    current = self._exact.get(normalized)
+                    if current is None or record.popularity > titles[current][1]:
+                        self._exact[normalized] = record.title_id
+                    entry_id = len(state.entries)
+                    grams = trigrams(normalized)
+                    state.entries.append(normalized)
+                    state.entry_titles.append(record.title_id)
+                    state.entry_grams.append(grams)
+                    entry_ids.append(entry_id)
+                    for gram in grams:
+                        state.postings.setdefault(gram, []).append(entry_id)
+            state = state._replace(titles=titles, dead=state.dead.union(dead))
+            # Every save re-indexes its title, so compact once tombstones make
+            # up a fair share of the entries
+            if len(state.dead) > max(64, len(titles) // 4):
+                state = self._compact(state)
+            self._state = state
+
+    def _drop(
+        self, state: _IndexState, titles: dict[int, tuple[str, int]], title_id: int
+    ) -> list[int]:
+        """
+        Remove a title from ``titles`` and tombstone its entries; return
+        their ids.
+        """
+        if titles.pop(title_id, None) is None:
+            return []
+        entry_ids = self._title_entries.pop(title_id, [])
+        for entry_id in entry_ids:
+            if self._exact.get(state.entries[entry_id]) == title_id:
+                del self._exact[state.entries[entry_id]]
+        return entry_ids
+
+    def _compact(self, state: _IndexState) -> _IndexState:
+        """
+        Return a state holding only the live entries, renumbered.
+        """
+        renumbered: dict[int, int] = {}
+        entries: list[str] = []
+        entry_titles: list[int] = []
+        entry_grams: list[frozenset[str]] = []
+        for entry_id, title_id in enumerate(state.entry_titles):
+            if entry_id in state.dead:
+                continue
+            renumbered[entry_id] = len(entries)
+            entries.append(state.entries[entry_id])
+            entry_titles.append(title_id)
+            entry_grams.append(state.entry_grams[entry_id])
+        postings = {}
+        for gram, entry_ids in state.postings.items():
+            live = [renumbered[e] for e in entry_ids if e in renumbered]
+            if live:
+                postings[gram] = live
+        for title_id, entry_ids in self._title_entries.items():
+            self._title_entries[title_id] = [renumbered[e] for e in entry_ids]
+        return _IndexState(
+            state.titles, entries, entry_titles, entry_grams, postings, frozenset()
+        )
+
+    def candidates(self, normalized: str) -> list[tuple[float, int]]:
+        """
+        Return (trigram similarity, entry id) for the entries most likely to
+        match, best first.
+        """
+        return self._candidates(self._state, normalized)
+
+    def _candidates(
+        self, state: _IndexState, normalized: str
+    ) -> list[tuple[float, int]]:
+        grams = trigrams(normalized)
+        postings = state.postings
+        # Trigrams no title contains are usually the ones a typo produced;
+        # leaving them out keeps the prefix on trigrams that can still hit.
+        ordered = sorted(
+            (gram for gram in grams if gram in postings),
+            key=lambda gram: len(postings[gram]),
+        )
+        prefix = len(ordered) - math.ceil(self.candidate_threshold * len(ordered)) + 1
+        hits: Counter[int] = Counter()
+        for gram in ordered[:prefix]:
+            hits.update(postings[gram])
+        for entry_id in state.dead.intersection(hits):
+            del hits[entry_id]
+        size = len(grams)
+        scored = []
+        for entry_id, _ in hits.most_common(self.verify * 4):
+            entry_grams = state.entry_grams[entry_id]
+            shared = len(grams & entry_grams)
+            scored.append((shared / (size + len(entry_grams) - shared), entry_id))
+        scored.sort(reverse=True)
+        return scored[: self.verify]
+
+    def match(self, guess: str) -> TitleMatch | None:
+        """
+        Return the best matching title for a guess, or None.
+        """
+        normalized = normalize_title(guess)
+        if not normalized:
+            return None
+        state = self._state
+        titles = state.titles
+        title_id = self._exact.get(normalized, -1)
+        if title_id in titles:
+            return TitleMatch(title_id, titles[title_id][0], 1.0)
+
+        best: tuple[float, int, int] | None = None
+        for _, entry_id in self._candidates(state, normalized):
+            title_id = state.entry_titles[entry_id]
+            if title_id not in titles:
+                continue
+            entry = state.entries[entry_id]
+            # The length difference alone bounds the edit distance
+            longest = max(len(normalized), len(entry))
+            bound = 1 - abs(len(normalized) - len(entry)) / longest
+            if bound < self.threshold or (best is not None and bound < best[0]):
+                continue
+            score = similarity(normalized, entry)
+            key = (score, titles[title_id][1], title_id)
+            if score >= self.threshold and (best is None or key > best):
+                best = key
+        if best is None:
+            return None
+        return TitleMatch(best[2], titles[best[2]][0], round(best[0], 4))
+
+
+class PostgresTrigramMatcher:
+    """
+    Match guesses with PostgreSQL's pg_trgm extension.
+    Needs no warm-up, at the cost of a database round trip per guess. The
+    ``%`` operator used for filtering is served by the GIN trigram indexes
+    on ``titles.name`` and ``title_aliases.name``.
+    """
+
+    def __init__(self, threshold: float | None = None) -> None:
+        self.threshold = (
+            threshold
+            if threshold is not None
+            else float(getattr(settings, "TITLE_MATCH_TRGM_THRESHOLD", 0.4))
+        )
+
+    def match(self, guess: str) -> TitleMatch | None:
+        from django.contrib.postgres.search import TrigramSimilarity
+        from django.db.models import FloatField, Max, Q, Value
+        from django.db.models.functions import Coalesce, Greatest
+
+        from .models import Title
+
+        guess = guess.strip()
+        if not guess:
+            return None
+        title = (
+            Title.objects.filter(
+                Q(name__trigram_similar=guess) | Q(aliases__name__trigram_similar=guess)
+            )
+            .annotate(
+                score=Max(
+                    Greatest(
+                        TrigramSimilarity("name", guess),
+                        Coalesce(
+                            TrigramSimilarity("aliases__name", guess),
+                            Value(0.0),
+                            output_field=FloatField(),
+                        ),
+                    )
+                )
+            )
+            .filter(score__gte=self.threshold)
+            .order_by("-score", "-popularity")
+            .values_list("id", "name", "score")
+            .first()
+        )
+        if title is None:
+            return None
+        return TitleMatch(title[0], title[1], round(float(title[2]), 4))
+
+
+def load_records(title_ids: Iterable[int] | None = None) -> Iterator[TitleRecord]:
+    """
+    Stream the title catalogue from the database, or only some titles.
+    """
+    from .models import Title, TitleAlias
+
+    titles = Title.objects.order_by()
+    title_aliases = TitleAlias.objects.all()
+    if title_ids is not None:
+        title_ids = list(title_ids)
+        titles = titles.filter(pk__in=title_ids)
+        title_aliases = title_aliases.filter(title_id__in=title_ids)
+    aliases: dict[int, list[str]] = {}
+    for title_id, name in title_aliases.values_list("title_id", "name").iterator(
+        chunk_size=5000
+    ):
+        aliases.setdefault(title_id, []).append(name)
+    for title_id, name, popularity, year in titles.values_list(
+        "id", "name", "popularity", "year"
+    ).iterator(chunk_size=5000):
+        yield TitleRecord(
+            title_id, name, popularity, tuple(aliases.get(title_id, ())), year
+        )
+
+
+_index: TitleIndex | None = None
+_index_lock = threading.Lock()
+_building = threading.Event()
+
+
+def build_index() -> TitleIndex:
+    """
+    Build the process-wide index from the database and install it.
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            index = TitleIndex(load_records())
+            logger.info("Built title index with %d titles", len(index))
+            _index = index
+        return _index
+
+
+def _build_in_background() -> None:
+    if _building.is_set():
+        return
+    _building.set()
+
+    def target() -> None:
+        from django.db import connection
+
+        try:
+            build_index()
+        except Exception:  # pragma: no cover - logged for operators
+            logger.exception("Building the title index failed")
+        finally:
+            _building.clear()
+            connection.close()
+
+    threading.Thread(target=target, name="title-index", daemon=True).start()
+
+
+def get_index() -> TitleIndex | None:
+    """
+    Return the process-wide index if it has been built.
+    """
+    return _index
+
+
+def get_matcher() -> TitleMatcher:
+    """
+    Return the matcher to validate guesses with.
+    """
+    if _index is not None:
+        return _index
+    if getattr(settings, "TITLE_MATCHER_COLD_START", None) == "postgres":
+        _build_in_background()
+        return PostgresTrigramMatcher()
+    return build_index()
+
+
+def reset_index() -> None:
+    """
+    Forget the process-wide index; it is rebuilt on next use.
+    """
+    global _index
+    with _index_lock:
+        _index = None
+
+
+def match(guess: str) -> TitleMatch | None:
+    """
+    Return the catalogue title a guess refers to, or None.
+    """
+    result = get_matcher().match(guess)
+    metrics.GUESSES.labels("unmatched" if result is None else "matched").inc()
+    return result
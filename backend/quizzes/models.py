@@ -1 +1,282 @@
-# Create your models here.
+import hashlib
+import json
+from collections.abc import Callable
+from typing import Any
+
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class Title(models.Model):
+    """
+    A movie or TV show that players can guess.
+    """
+
+    class Kind(models.TextChoices):
+        MOVIE = "movie", _("Movie")
+        TV = "tv", _("TV show")
+
+    name: models.CharField = models.CharField(_("name"), max_length=255)
+    kind: models.CharField = models.CharField(
+        _("kind"), max_length=16, choices=Kind.choices, default=Kind.MOVIE
+    )
+    year: models.PositiveSmallIntegerField = models.PositiveSmallIntegerField(
+        _("year"), null=True, blank=True
+    )
+    # Used to rank otherwise equal matches and suggestions
+    popularity: models.PositiveIntegerField = models.PositiveIntegerField(
+        _("popularity"), default=0
+    )
+
+    class Meta:
+        verbose_name = _("title")
+        verbose_name_plural = _("titles")
+        db_table = "titles"
+        ordering = ["-popularity", "name"]
+        indexes = [
+            # Serve pg_trgm's % operator (see quizzes.matching)
+            GinIndex(
+                fields=["name"], name="titles_name_trgm", opclasses=["gin_trgm_ops"]
+            ),
+        ]
+
+    def __str__(self) -> str:
+        if self.year:
+            return f"{self.name} ({self.year})"
+        return str(self.name)
+
+
+class TitleAlias(models.Model):
+    """
+    An alternative name accepted for a title (e.g. "LOTR", a localized name).
+    """
+
+    title: models.ForeignKey[Title, Title] = models.ForeignKey(
+        Title, on_delete=models.CASCADE, related_name="aliases", verbose_name=_("title")
+    )
+    title_id: int
+    name: models.CharField = models.CharField(_("name"), max_length=255)
+
+    class Meta:
+        verbose_name = _("title alias")
+        verbose_name_plural = _("title aliases")
+        db_table = "title_aliases"
+        indexes = [
+            GinIndex(
+                fields=["name"],
+                name="title_aliases_name_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["title", "name"], name="unique_title_alias_name"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return str(self.name)
+
+
+class DailyPuzzle(models.Model):
+    """
+    The quiz served to every player on a given (UTC) day.
+
+    The public representation is materialized ahead of time into ``payload``
+    so the read path never has to serialize the puzzle per request.
+    """
+
+    class Category(models.TextChoices):
+        MOVIE = "movie", _("Movie")
+        TV = "tv", _("TV show")
+
+    puzzle_date: models.DateField = models.DateField(_("puzzle date"), unique=True)
+    category: models.CharField = models.CharField(
+        _("category"), max_length=16, choices=Category.choices, default=Category.MOVIE
+    )
+    clues = models.JSONField(_("clues"), default=list, blank=True)
+    answer: models.CharField = models.CharField(_("answer"), max_length=255)
+    max_guesses: models.PositiveSmallIntegerField = models.PositiveSmallIntegerField(
+        _("max guesses"), default=6
+    )
+
+    # Pre-serialized public representation, written by `materialize()`
+    payload: models.TextField = models.TextField(
+        _("payload"), blank=True, editable=False
+    )
+    payload_etag: models.CharField = models.CharField(
+        _("payload ETag"), max_length=64, blank=True, editable=False
+    )
+    materialized_at: models.DateTimeField = models.DateTimeField(
+        _("materialized at"), null=True, blank=True, editable=False
+    )
+
+    created_at: models.DateTimeField = models.DateTimeField(auto_now_add=True)
+    updated_at: models.DateTimeField = models.DateTimeField(auto_now=True)
+
+    # Added by Django for the choices field
+    get_category_display: Callable[[], str]
+
+    class Meta:
+        verbose_name = _("daily puzzle")
+        verbose_name_plural = _("daily puzzles")
+        db_table = "daily_puzzles"
+        ordering = ["-puzzle_date"]
+
+    def __str__(self) -> str:
+        return f"{self.puzzle_date} ({self.get_category_display()})"
+
+    def save(self, *args, **kwargs):  # type: ignore[no-untyped-def]
+        """
+        Keep the materialized payload in sync with the puzzle content.
+        """
+        update_fields = kwargs.get("update_fields")
+        if self.refresh_payload() and update_fields is not None:
+            kwargs["update_fields"] = {
+                *update_fields,
+                "payload",
+                "payload_etag",
+                "materialized_at",
+            }
+        super().save(*args, **kwargs)
+
+    def refresh_payload(self) -> bool:
+        """
+        Re-serialize the public representation into ``payload``.
+        Returns True when the payload changed. The ETag and timestamp are
+        left untouched otherwise, so conditional requests keep validating.
+        """
+        payload = json.dumps(
+            self.to_public_dict(), separators=(",", ":"), sort_keys=True
+        )
+        if payload == self.payload and self.materialized_at is not None:
+            return False
+        self.payload = payload
+        self.payload_etag = hashlib.sha256(payload.encode()).hexdigest()[:32]
+        self.materialized_at = timezone.now()
+        return True
+
+    def to_public_dict(self) -> dict:
+        """
+        Return the player-facing representation of the puzzle.
+        The answer is intentionally left out.
+        """
+        return {
+            "date": self.puzzle_date.isoformat(),
+            "category": self.category,
+            "clues": self.clues,
+            "max_guesses": self.max_guesses,
+        }
+
+
+class Attempt(models.Model):
+    """
+    A player's attempt at a daily puzzle.
+    """
+
+    puzzle: models.ForeignKey[DailyPuzzle, DailyPuzzle] = models.ForeignKey(
+        DailyPuzzle,
+        on_delete=models.CASCADE,
+        related_name="attempts",
+        verbose_name=_("puzzle"),
+    )
+    puzzle_id: int
+    user: models.ForeignKey[Any, Any] = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="puzzle_attempts",
+        verbose_name=_("user"),
+    )
+    user_id: int | None
+    device: models.ForeignKey[Any, Any] = models.ForeignKey(
+        "users.AnonymousDevice",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="attempts",
+        verbose_name=_("device"),
+    )
+    device_id: int | None
+    guess_count: models.PositiveSmallIntegerField = models.PositiveSmallIntegerField(
+        _("guess count"), default=0
+    )
+    solved: models.BooleanField = models.BooleanField(_("solved"), default=False)
+    completed_at: models.DateTimeField = models.DateTimeField(
+        _("completed at"), null=True, blank=True
+    )
+    created_at: models.DateTimeField = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("attempt")
+        verbose_name_plural = _("attempts")
+        db_table = "puzzle_attempts"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["puzzle", "user"],
+                condition=models.Q(user__isnull=False),
+                name="unique_user_attempt_per_puzzle",
+            ),
+            models.UniqueConstraint(
+                fields=["puzzle", "device"],
+                condition=models.Q(device__isnull=False),
+                name="unique_device_attempt_per_puzzle",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user_id or 'anonymous'} on {self.puzzle_id}"
+
+    @property
+    def is_completed(self) -> bool:
+        return self.completed_at is not None
+
+
+class Guess(models.Model):
+    """
+    One guess in an attempt, recorded under the client's idempotency key so
+    a retried submission is answered from here instead of counted again.
+    """
+
+    attempt: models.ForeignKey[Attempt, Attempt] = models.ForeignKey(
+        Attempt,
+        on_delete=models.CASCADE,
+        related_name="guesses",
+        verbose_name=_("attempt"),
+    )
+    attempt_id: int
+    idempotency_key: models.UUIDField = models.UUIDField(_("idempotency key"))
+    text: models.CharField = models.CharField(_("text"), max_length=255)
+    title: models.ForeignKey[Title | None, Title | None] = models.ForeignKey(
+        Title,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name=_("matched title"),
+    )
+    title_id: int | None
+    correct: models.BooleanField = models.BooleanField(_("correct"), default=False)
+    # Position in the attempt, from 1
+    number: models.PositiveSmallIntegerField = models.PositiveSmallIntegerField(
+        _("number")
+    )
+    created_at: models.DateTimeField = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("guess")
+        verbose_name_plural = _("guesses")
+        db_table = "puzzle_guesses"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["attempt", "idempotency_key"],
+                name="unique_guess_idempotency_key",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.text} ({self.attempt_id} #{self.number})"
@@ -0,0 +1,103 @@
+"""
+Signal handlers for the quizzes app.
+"""
+
+import threading
+from typing import Any
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import bundles, daily, matching, suggest
+from .models import DailyPuzzle, Title, TitleAlias
+
+MATERIALIZATION_FIELDS = frozenset({"payload", "payload_etag", "materialized_at"})
+
+# Titles changed on this thread and not re-indexed yet
+_pending = threading.local()
+
+
+@receiver(post_save, sender=DailyPuzzle)
+def invalidate_daily_puzzle_on_save(
+    sender: type[DailyPuzzle], instance: DailyPuzzle, **kwargs: Any
+) -> None:
+    """
+    Drop the cached payload and bundles when puzzle content changes.
+    Saves issued by `daily.materialize` prime the cache themselves.
+    """
+    update_fields = kwargs.get("update_fields")
+    if update_fields and MATERIALIZATION_FIELDS.issuperset(update_fields):
+        return
+    daily.invalidate(instance.puzzle_date)
+    bundles.invalidate(instance.puzzle_date)
+
+
+@receiver(post_delete, sender=DailyPuzzle)
+def invalidate_daily_puzzle_on_delete(
+    sender: type[DailyPuzzle], instance: DailyPuzzle, **kwargs: Any
+) -> None:
+    """
+    Drop the cached payload and bundles of a deleted puzzle.
+    """
+    daily.invalidate(instance.puzzle_date)
+    bundles.invalidate(instance.puzzle_date)
+
+
+def reindex_titles() -> None:
+    """
+    Refresh the titles saved or deleted on this thread in the matching
+    index and the suggester, for whichever of them is already built.
+    """
+    title_ids = getattr(_pending, "title_ids", None)
+    _pending.title_ids = None
+    index = matching.get_index()
+    suggester = suggest.peek_suggester()
+    if not title_ids or (index is None and suggester is None):
+        return
+    records = list(matching.load_records(title_ids))
+    removed = title_ids.difference(record.title_id for record in records)
+    if index is not None:
+        index.update(records, removed)
+    if suggester is not None:
+        suggester.update(records, removed)
+
+
+def schedule_reindex(title_id: int) -> None:
+    """
+    Re-index a title once the surrounding transaction commits. Titles
+    changed in one transaction (loading a catalogue) are re-indexed in one
+    batch.
+    """
+    if matching.get_index() is None and suggest.peek_suggester() is None:
+        return
+    title_ids = getattr(_pending, "title_ids", None)
+    if title_ids is None:
+        title_ids = _pending.title_ids = set()
+    title_ids.add(title_id)
+    # Every change registers a callback, so the batch is still applied when
+    # an earlier savepoint's callback was rolled back; the first one to run
+    # does the work
+    transaction.on_commit(reindex_titles)
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def reindex_title_on_change(
+    sender: type[Title], instance: Title, **kwargs: Any
+) -> None:
+    """
+    Keep the in-memory title index and suggester in sync with the catalogue.
+    """
+    schedule_reindex(instance.pk)
+
+
+@receiver(post_save, sender=TitleAlias)
+@receiver(post_delete, sender=TitleAlias)
+def reindex_title_on_alias_change(
+    sender: type[TitleAlias], instance: TitleAlias, **kwargs: Any
+) -> None:
+    """
+    Re-index a title when one of its aliases changes.
+    """
+    schedule_reindex(instance.title_id)
@@ -0,0 +1,216 @@
+"""
+Type-ahead title suggestions for the guess input.
+
+Suggestions are requested on every keystroke, so they are answered from a
+sorted array of normalized keys searched with `bisect`, built once per
+process from the title catalogue. Every title contributes its full name,
+its aliases and each word-start suffix ("rings" finds "The Lord of the
+Rings"). The top-K titles for a prefix are memoized until the catalogue
+changes, so popular prefixes ("s", "th") are not re-ranked per request.
+"""
+
+import bisect
+import heapq
+import threading
+from collections.abc import Iterable
+from typing import NamedTuple
+
+from .matching import TitleRecord, load_records, normalize_title
+
+# Highest code point, used to build the exclusive upper bound of a prefix range
+_SENTINEL = "\U0010ffff"
+
+
+class Suggestion(NamedTuple):
+    """A suggested title."""
+
+    title_id: int
+    name: str
+    year: int | None
+
+
+def suffix_keys(normalized: str) -> list[str]:
+    """
+    Return the name itself and every suffix starting at a word boundary.
+    """
+    words = normalized.split(" ")
+    return [" ".join(words[i:]) for i in range(len(words))]
+
+
+class _Snapshot(NamedTuple):
+    """Everything readers use, swapped in as one."""
+
+    # Sorted keys and the title id of each
+    keys: list[str]
+    ids: list[int]
+    # Title id -> (name, popularity, year)
+    titles: dict[int, tuple[str, int, int | None]]
+    # (prefix, limit) -> top suggestions
+    memo: dict[tuple[str, int], list[Suggestion]]
+
+
+class TitleSuggester:
+    """
+    Prefix search over title names, ranked by popularity.
+
+    Reads are lock-free. Writers are serialized and never modify what
+    readers see in place: they edit copies of the keys, ids and titles and
+    swap them in with a single assignment, so a reader always works on a
+    consistent snapshot.
+
+    Copying makes each write O(n). `update` applies a whole batch of
+    titles with one copy, and the signal handlers batch the titles saved
+    in a transaction, so loading a catalogue doesn't cost O(n) per title.
+    """
+
+    # Batches with more keys than this are merged in with a sort
+    # instead of being inserted one by one
+    insert_limit = 64
+
+    def __init__(
+        self, records: Iterable[TitleRecord] = (), *, memo_size: int = 4096
+    ) -> None:
+        self._lock = threading.Lock()
+        self._title_keys: dict[int, list[str]] = {}
+        self._memo_size = memo_size
+        self._state = _Snapshot([], [], {}, {})
+        self.update(records)
+
+    def __len__(self) -> int:
+        return len(self._state.titles)
+
+    @staticmethod
+    def _keys_for(record: TitleRecord) -> list[str]:
+        keys: set[str] = set()
+        for variant in (record.name, *record.aliases):
+            normalized = normalize_title(variant)
+            if normalized:
+                keys.update(suffix_keys(normalized))
+        return sorted(keys)
+
+    def add(self, record: TitleRecord) -> None:
+        """
+        Insert or replace a title.
+        """
+        self.update([record])
+
+    def remove(self, title_id: int) -> None:
+        """
+        Drop a title from the suggestions.
+        """
+        self.update(removed=[title_id])
+
+    def update(
+        self, records: Iterable[TitleRecord] = (), removed: Iterable[int] = ()
+    ) -> None:
+        """
+        Insert or replace titles and drop others, copying the arrays once
+        for the whole batch.
+        """
+        records = list(records)
+        with self._lock:
+            state = self._state
+            changed = {record.title_id for record in records}.union(removed)
+            titles = dict(state.titles)
+            old_keys: list[tuple[str, int]] = []
+            for title_id in changed:
+                titles.pop(title_id, None)
+                old_keys.extend(
+                    (key, title_id) for key in self._title_keys.pop(title_id, [])
+                )
+            pairs: list[tuple[str, int]] = []
+            for record in records:
+                title_keys = self._keys_for(record)
+                titles[record.title_id] = (
+                    record.name,
+                    record.popularity,
+                    record.year,
+                )
+                self._title_keys[record.title_id] = title_keys
+                pairs.extend((key, record.title_id) for key in title_keys)
+
+            if len(old_keys) + len(pairs) <= self.insert_limit:
+                keys, ids = list(state.keys), list(state.ids)
+                for key, title_id in old_keys:
+                    position = bisect.bisect_left(keys, key)
+                    while ids[position] != title_id:
+                        position += 1
+                    del keys[position]
+                    del ids[position]
+                for key, title_id in pairs:
+                    position = bisect.bisect_right(keys, key)
+                    keys.insert(position, key)
+                    ids.insert(position, title_id)
+            else:
+                kept = [
+                    pair
+                    for pair in zip(state.keys, state.ids)
+                    if pair[1] not in changed
+                ]
+                # Two sorted runs: the sort merges them in linear time
+                pairs.sort()
+                kept.extend(pairs)
+                kept.sort()
+                keys = [key for key, _ in kept]
+                ids = [title_id for _, title_id in kept]
+            self._state = _Snapshot(keys, ids, titles, {})
+
+    def suggest(self, query: str, limit: int = 10) -> list[Suggestion]:
+        """
+        Return up to ``limit`` titles with a word starting with ``query``,
+        most popular first.
+        """
+        prefix = normalize_title(query)
+        if not prefix or limit < 1:
+            return []
+        keys, ids, titles, memo = self._state
+        cached = memo.get((prefix, limit))
+        if cached is not None:
+            return cached
+
+        start = bisect.bisect_left(keys, prefix)
+        end = bisect.bisect_left(keys, prefix + _SENTINEL, start)
+        title_ids = set(ids[start:end])
+        top = heapq.nlargest(
+            limit, title_ids, key=lambda title_id: (titles[title_id][1], -title_id)
+        )
+        results = [
+            Suggestion(title_id, titles[title_id][0], titles[title_id][2])
+            for title_id in top
+        ]
+        if len(memo) >= self._memo_size:
+            memo.clear()
+        memo[(prefix, limit)] = results
+        return results
+
+
+_suggester: TitleSuggester | None = None
+_suggester_lock = threading.Lock()
+
+
+def get_suggester() -> TitleSuggester:
+    """
+    Return the process-wide suggester, building it on first use.
+    """
+    global _suggester
+    if _suggester is None:
+        with _suggester_lock:
+            if _suggester is None:
+                _suggester = TitleSuggester(load_records())
+    return _suggester
+
+
+def peek_suggester() -> TitleSuggester | None:
+    """
+    Return the process-wide suggester if it has been built.
+    """
+    return _suggester
+
+
+def reset_suggester() -> None:
+    """
+    Forget the process-wide suggester; it is rebuilt on next use.
+    """
+    global _suggester
+    with _suggester_lock:
+        _suggester = None
@@ -1,6 +1,21 @@
 """Tests for quizzes app."""
 
-from django.test import TestCase
+import datetime
+import gzip
+import json
+import threading
+import time
+import uuid
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from quizzes import daily
+from quizzes.models import DailyPuzzle
 
 
 class QuizzesTestCase(TestCase):
@@ -9,3 +24,1118 @@ class QuizzesTestCase(TestCase):
     def test_placeholder(self) -> None:
         """Placeholder test to ensure test suite runs."""
         self.assertTrue(True)
+
+
+def create_puzzle(puzzle_date: datetime.date, **kwargs) -> DailyPuzzle:  # type: ignore[no-untyped-def]
+    """Create a daily puzzle with sensible defaults."""
+    kwargs.setdefault("answer", "The Matrix")
+    kwargs.setdefault("clues", [{"type": "emoji", "value": "💊🕶️🐇"}])
+    return DailyPuzzle.objects.create(puzzle_date=puzzle_date, **kwargs)
+
+
+class DailyPuzzleModelTestCase(TestCase):
+    """Test cases for DailyPuzzle materialization."""
+
+    def test_payload_materialized_on_save(self):
+        """Test that saving a puzzle serializes its public payload."""
+        puzzle = create_puzzle(datetime.date(2025, 1, 1))
+        self.assertIn('"date":"2025-01-01"', puzzle.payload)
+        self.assertNotIn("The Matrix", puzzle.payload)
+        self.assertEqual(len(puzzle.payload_etag), 32)
+        self.assertIsNotNone(puzzle.materialized_at)
+
+    def test_etag_stable_when_content_unchanged(self):
+        """Test that re-saving an unchanged puzzle keeps its ETag."""
+        puzzle = create_puzzle(datetime.date(2025, 1, 1))
+        etag, materialized_at = puzzle.payload_etag, puzzle.materialized_at
+        puzzle.answer = "Inception"
+        puzzle.save()
+        self.assertEqual(puzzle.payload_etag, etag)
+        self.assertEqual(puzzle.materialized_at, materialized_at)
+
+    def test_etag_changes_with_content(self):
+        """Test that changing public content produces a new ETag."""
+        puzzle = create_puzzle(datetime.date(2025, 1, 1))
+        etag = puzzle.payload_etag
+        puzzle.clues = [{"type": "quote", "value": "There is no spoon."}]
+        puzzle.save(update_fields=["clues"])
+        puzzle.refresh_from_db()
+        self.assertNotEqual(puzzle.payload_etag, etag)
+        self.assertIn("There is no spoon.", puzzle.payload)
+
+
+class DailyPuzzleAPITestCase(TestCase):
+    """Test cases for the daily puzzle endpoint."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.today = daily.today()
+        self.puzzle = create_puzzle(self.today)
+        self.url = reverse("quizzes:daily-puzzle")
+
+    def test_get_daily_puzzle(self):
+        """Test fetching today's puzzle."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(response.json()["date"], self.today.isoformat())
+        self.assertNotIn("answer", response.json())
+        self.assertEqual(response["ETag"], f'"{self.puzzle.payload_etag}"')
+        self.assertIn("Last-Modified", response)
+        self.assertIn("public", response["Cache-Control"])
+
+    def test_hot_path_does_not_query_database(self):
+        """Test that a primed puzzle is served without any query."""
+        call_command("materialize_daily_puzzles", stdout=StringIO())
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_cache_miss_populates_cache(self):
+        """Test that a cache miss costs one query and fills the cache."""
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+    def test_if_none_match_returns_not_modified(self):
+        """Test conditional GET with a matching ETag."""
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+
+    def test_if_modified_since_returns_not_modified(self):
+        """Test conditional GET with an up-to-date Last-Modified."""
+        last_modified = self.client.get(self.url)["Last-Modified"]
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_stale_etag_returns_full_response(self):
+        """Test conditional GET with an outdated ETag."""
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_get_puzzle_by_date(self):
+        """Test fetching an archived puzzle by date."""
+        yesterday = self.today - datetime.timedelta(days=1)
+        create_puzzle(yesterday)
+        url = reverse("quizzes:daily-puzzle-by-date", args=[yesterday])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["date"], yesterday.isoformat())
+
+    def test_future_puzzle_not_served(self):
+        """Test that upcoming puzzles are not exposed before rollover."""
+        tomorrow = self.today + datetime.timedelta(days=1)
+        create_puzzle(tomorrow)
+        url = reverse("quizzes:daily-puzzle-by-date", args=[tomorrow])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 404)
+
+    def test_missing_puzzle_is_negatively_cached(self):
+        """Test that a missing puzzle returns 404 and is not re-queried."""
+        url = reverse("quizzes:daily-puzzle-by-date", args=[datetime.date(2000, 1, 1)])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_invalid_date_returns_404(self):
+        """Test that an impossible date does not match the route."""
+        response = self.client.get("/api/v1/quizzes/daily/2025-02-30/")
+        self.assertEqual(response.status_code, 404)
+
+    def test_update_invalidates_cache(self):
+        """Test that editing a puzzle is reflected on the next read."""
+        self.client.get(self.url)
+        self.puzzle.clues = [{"type": "quote", "value": "Whoa."}]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.puzzle.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.json()["clues"][0]["value"], "Whoa.")
+
+    def test_post_not_allowed(self):
+        """Test that the endpoint is read-only."""
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 405)
+
+
+class AsyncGameplayViewsTestCase(TestCase):
+    """Test cases for the gameplay views served through the async stack."""
+
+    def setUp(self):
+        """Set up test data."""
+        from quizzes import suggest
+        from quizzes.models import Title
+
+        cache.clear()
+        suggest.reset_suggester()
+        self.addCleanup(suggest.reset_suggester)
+        self.today = daily.today()
+        self.puzzle = create_puzzle(self.today)
+        Title.objects.create(name="Heat", year=1995, popularity=50)
+
+    def test_views_are_coroutines(self):
+        """Test that the gameplay views stay async after decoration."""
+        from asgiref.sync import iscoroutinefunction
+
+        from quizzes import views
+
+        self.assertTrue(iscoroutinefunction(views.daily_puzzle))
+        self.assertTrue(iscoroutinefunction(views.title_suggestions))
+
+    async def test_daily_puzzle(self):
+        """Test the daily puzzle through the ASGI handler."""
+        url = reverse("quizzes:daily-puzzle")
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["date"], self.today.isoformat())
+        self.assertIsNotNone(await cache.aget(daily.cache_key(self.today)))
+        response = await self.async_client.get(
+            url, headers={"If-None-Match": response["ETag"]}
+        )
+        self.assertEqual(response.status_code, 304)
+        response = await self.async_client.post(url)
+        self.assertEqual(response.status_code, 405)
+
+    async def test_missing_puzzle(self):
+        """Test that a missing puzzle is negatively cached by the async path."""
+        self.assertIsNone(await daily.aget_materialized(datetime.date(2000, 1, 1)))
+        self.assertEqual(
+            await cache.aget(daily.cache_key(datetime.date(2000, 1, 1))),
+            daily.MISSING,
+        )
+
+    async def test_suggestions_build_suggester(self):
+        """Test that the first async request builds the suggester off the loop."""
+        response = await self.async_client.get(
+            reverse("quizzes:title-suggest"), {"q": "hea"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"][0]["name"], "Heat")
+
+
+class MaterializeDailyPuzzlesCommandTestCase(TestCase):
+    """Test cases for the materialize_daily_puzzles command."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+
+    def test_materializes_and_primes_cache(self):
+        """Test that the command primes the cache for upcoming days."""
+        start = datetime.date(2025, 1, 1)
+        create_puzzle(start)
+        create_puzzle(start + datetime.timedelta(days=1))
+        out, err = StringIO(), StringIO()
+        call_command(
+            "materialize_daily_puzzles",
+            "--date",
+            "2025-01-01",
+            "--days",
+            "3",
+            stdout=out,
+            stderr=err,
+        )
+        self.assertIn("Materialized 2025-01-01", out.getvalue())
+        self.assertIn("Materialized 2025-01-02", out.getvalue())
+        self.assertIn("No puzzle scheduled for 2025-01-03", err.getvalue())
+        self.assertIsNotNone(cache.get(daily.cache_key(start)))
+
+    def test_invalid_arguments(self):
+        """Test that invalid arguments are rejected."""
+        from django.core.management.base import CommandError
+
+        with self.assertRaises(CommandError):
+            call_command("materialize_daily_puzzles", "--date", "tomorrow")
+        with self.assertRaises(CommandError):
+            call_command("materialize_daily_puzzles", "--days", "0")
+
+
+class TitleMatchingTestCase(TestCase):
+    """Test cases for the fuzzy title matcher."""
+
+    def setUp(self):
+        """Set up an index over a small catalogue."""
+        from quizzes.matching import TitleIndex, TitleRecord
+
+        self.index = TitleIndex(
+            [
+                TitleRecord(1, "The Matrix", 900),
+                TitleRecord(2, "The Matrix Reloaded", 500),
+                TitleRecord(
+                    3,
+                    "The Lord of the Rings: The Return of the King",
+                    800,
+                    ("LOTR 3", "Return of the King"),
+                ),
+                TitleRecord(4, "Amélie", 300),
+                TitleRecord(5, "Fast & Furious", 200),
+            ]
+        )
+
+    def test_normalize_title(self):
+        """Test that case, accents, punctuation and articles are ignored."""
+        from quizzes.matching import normalize_title
+
+        self.assertEqual(normalize_title("  The MATRIX! "), "matrix")
+        self.assertEqual(normalize_title("Amélie"), "amelie")
+        self.assertEqual(normalize_title("Fast & Furious"), "fast and furious")
+        self.assertEqual(normalize_title("A"), "a")
+        self.assertEqual(normalize_title("?!"), "")
+
+    def test_similarity(self):
+        """Test the edit-distance similarity."""
+        from quizzes.matching import similarity
+
+        self.assertEqual(similarity("matrix", "matrix"), 1.0)
+        self.assertEqual(similarity("", "matrix"), 0.0)
+        self.assertAlmostEqual(similarity("matirx", "matrix"), 1 - 1 / 6)
+        self.assertAlmostEqual(similarity("matrx", "matrix"), 1 - 1 / 6)
+
+    def test_exact_match(self):
+        """Test matching a title regardless of formatting."""
+        result = self.index.match("the matrix")
+        self.assertEqual(result.title_id, 1)
+        self.assertEqual(result.name, "The Matrix")
+        self.assertEqual(result.score, 1.0)
+
+    def test_alias_match(self):
+        """Test matching through an alias."""
+        self.assertEqual(self.index.match("lotr 3").title_id, 3)
+        self.assertEqual(self.index.match("Return of the King").title_id, 3)
+
+    def test_typo_match(self):
+        """Test matching guesses with typos."""
+        self.assertEqual(self.index.match("Matirx").title_id, 1)
+        self.assertEqual(self.index.match("amelie").title_id, 4)
+        self.assertEqual(self.index.match("fast and furios").title_id, 5)
+        self.assertEqual(self.index.match("matrix reloded").title_id, 2)
+
+    def test_no_match(self):
+        """Test that unrelated or empty guesses don't match."""
+        self.assertIsNone(self.index.match("Casablanca"))
+        self.assertIsNone(self.index.match("   "))
+
+    def test_add_and_remove(self):
+        """Test incremental updates of the index."""
+        from quizzes.matching import TitleRecord
+
+        self.index.add(TitleRecord(6, "Casablanca", 100))
+        self.assertEqual(self.index.match("casablanka").title_id, 6)
+        self.index.add(TitleRecord(1, "The Matrix Resurrections", 100))
+        self.assertEqual(self.index.match("matrix resurections").title_id, 1)
+        self.assertNotEqual(
+            getattr(self.index.match("the matrix"), "title_id", None), 1
+        )
+        self.index.remove(6)
+        self.assertIsNone(self.index.match("casablanca"))
+        self.assertNotIn(6, self.index)
+        self.assertEqual(len(self.index), 5)
+
+    def test_repeated_saves(self):
+        """Test that re-indexing a title over and over doesn't crowd it out."""
+        from quizzes.matching import TitleRecord
+
+        for _ in range(200):
+            self.index.add(TitleRecord(1, "The Matrix", 900))
+            self.assertEqual(self.index.match("matirx").title_id, 1)
+        # Tombstoned entries are compacted out of the postings and entries
+        state = self.index._state
+        live = sum(len(ids) for ids in self.index._title_entries.values())
+        stored = {e for ids in state.postings.values() for e in ids}
+        self.assertLessEqual(len(stored), live + 64)
+        self.assertLessEqual(len(state.entries), live + 65)
+        self.assertEqual(self.index.match("lotr 3").title_id, 3)
+
+    def test_updates_leave_readers_state_alone(self):
+        """Test that a reader's titles survive removals and compactions."""
+        from quizzes.matching import TitleRecord
+
+        state = self.index._state
+        titles = dict(state.titles)
+        self.index.remove(2)
+        for _ in range(100):
+            self.index.add(TitleRecord(1, "The Matrix", 900))
+        self.assertEqual(state.titles, titles)
+        self.assertIsNot(self.index._state.entries, state.entries)
+        self.assertEqual(self.index._candidates(state, "matrix")[0][0], 1.0)
+
+    def test_popularity_breaks_ties(self):
+        """Test that the more popular title wins an exact-name collision."""
+        from quizzes.matching import TitleRecord
+
+        self.index.add(TitleRecord(7, "Matrix", 1000))
+        self.assertEqual(self.index.match("matrix").title_id, 7)
+
+
+class TitleIndexLifecycleTestCase(TestCase):
+    """Test cases for the process-wide title index."""
+
+    def setUp(self):
+        """Set up the catalogue."""
+        from quizzes import matching
+        from quizzes.models import Title, TitleAlias
+
+        matching.reset_index()
+        self.addCleanup(matching.reset_index)
+        self.title = Title.objects.create(name="Inception", year=2010, popularity=10)
+        TitleAlias.objects.create(title=self.title, name="Dream Heist")
+
+    def test_index_built_from_database(self):
+        """Test that the first match builds the index from the catalogue."""
+        from quizzes import matching
+
+        self.assertIsNone(matching.get_index())
+        self.assertEqual(matching.match("inceptoin").title_id, self.title.pk)
+        self.assertEqual(matching.match("dream heist").title_id, self.title.pk)
+        with self.assertNumQueries(0):
+            matching.match("Inception")
+
+    def test_index_follows_catalogue_changes(self):
+        """Test that saves and deletes are reflected in a built index."""
+        from quizzes import matching
+        from quizzes.models import Title, TitleAlias
+
+        matching.build_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            tenet = Title.objects.create(name="Tenet", popularity=5)
+        self.assertEqual(matching.match("tenet").title_id, tenet.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            TitleAlias.objects.create(title=tenet, name="Palindrome Movie")
+        self.assertEqual(matching.match("palindrome movie").title_id, tenet.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            tenet.delete()
+        self.assertIsNone(matching.match("tenet"))
+
+    def test_trigram_extension_check(self):
+        """Test that migrate stops early when pg_trgm is missing."""
+        from unittest import mock
+
+        from quizzes import checks
+
+        self.assertEqual(checks.check_trigram_extension(databases=["default"]), [])
+        cursor = mock.MagicMock()
+        cursor.__enter__.return_value.fetchone.return_value = None
+        with (
+            mock.patch.object(connection, "vendor", "postgresql"),
+            mock.patch.object(connection, "cursor", return_value=cursor),
+        ):
+            errors = checks.check_trigram_extension(databases=["default"])
+            self.assertEqual([error.id for error in errors], ["quizzes.E001"])
+            with mock.patch.object(
+                checks, "migrations_create_trigram_extension", return_value=True
+            ):
+                self.assertEqual(
+                    checks.check_trigram_extension(databases=["default"]), []
+                )
+            cursor.__enter__.return_value.fetchone.return_value = (1,)
+            self.assertEqual(checks.check_trigram_extension(databases=["default"]), [])
+        self.assertEqual(checks.check_trigram_extension(), [])
+
+    def test_title_string_representation(self):
+        """Test the string representations of titles and aliases."""
+        from quizzes.models import Title
+
+        self.assertEqual(str(self.title), "Inception (2010)")
+        self.assertEqual(str(Title(name="Lost")), "Lost")
+        self.assertEqual(str(self.title.aliases.get()), "Dream Heist")
+
+    def test_postgres_cold_start_backend(self):
+        """Test that the pg_trgm backend is used while the index is cold."""
+        from unittest import mock
+
+        from django.test import override_settings
+
+        from quizzes import matching
+
+        with (
+            override_settings(TITLE_MATCHER_COLD_START="postgres"),
+            mock.patch.object(matching, "_build_in_background") as build,
+        ):
+            matcher = matching.get_matcher()
+        self.assertIsInstance(matcher, matching.PostgresTrigramMatcher)
+        build.assert_called_once()
+        self.assertIsNone(matcher.match(" "))
+
+
+class TitleSuggesterTestCase(TestCase):
+    """Test cases for the prefix suggester."""
+
+    def setUp(self):
+        """Set up a suggester over a small catalogue."""
+        from quizzes.matching import TitleRecord
+        from quizzes.suggest import TitleSuggester
+
+        self.suggester = TitleSuggester(
+            [
+                TitleRecord(1, "The Matrix", 900, year=1999),
+                TitleRecord(2, "The Matrix Reloaded", 500, year=2003),
+                TitleRecord(3, "The Lord of the Rings", 800, ("LOTR",), 2001),
+                TitleRecord(4, "Mad Max: Fury Road", 700, year=2015),
+                TitleRecord(5, "Lost", 600),
+            ]
+        )
+
+    def ids(self, query, limit=10):
+        """Return the suggested title ids for a query."""
+        return [item.title_id for item in self.suggester.suggest(query, limit)]
+
+    def test_prefix_ranked_by_popularity(self):
+        """Test that matching titles are ordered by popularity."""
+        self.assertEqual(self.ids("ma"), [1, 4, 2])
+        self.assertEqual(self.ids("matrix r"), [2])
+        self.assertEqual(self.ids("ma", limit=1), [1])
+
+    def test_word_start_and_alias_matches(self):
+        """Test matching on later words and aliases."""
+        self.assertEqual(self.ids("rings"), [3])
+        self.assertEqual(self.ids("lotr"), [3])
+        self.assertEqual(self.ids("lo"), [3, 5])
+        self.assertEqual(self.ids("fury"), [4])
+
+    def test_no_suggestions(self):
+        """Test empty and unmatched queries."""
+        self.assertEqual(self.ids(""), [])
+        self.assertEqual(self.ids("zz"), [])
+        self.assertEqual(self.ids("ma", limit=0), [])
+
+    def test_incremental_updates(self):
+        """Test adding, replacing and removing titles."""
+        from quizzes.matching import TitleRecord
+
+        self.assertEqual(self.ids("ma"), [1, 4, 2])
+        self.suggester.add(TitleRecord(6, "Mad Men", 1000))
+        self.assertEqual(self.ids("ma"), [6, 1, 4, 2])
+        self.suggester.add(TitleRecord(6, "Mad Men", 10))
+        self.assertEqual(self.ids("ma"), [1, 4, 2, 6])
+        self.suggester.remove(1)
+        self.assertEqual(self.ids("ma"), [4, 2, 6])
+        self.assertEqual(len(self.suggester), 5)
+
+    def test_updates_leave_readers_snapshot_alone(self):
+        """Test that updates swap in new arrays and titles, not edit them."""
+        from quizzes.matching import TitleRecord
+
+        state = self.suggester._state
+        before = (list(state.keys), list(state.ids), dict(state.titles))
+        self.suggester.add(TitleRecord(6, "Mad Men", 1000))
+        self.suggester.remove(1)
+        self.assertEqual((state.keys, state.ids, state.titles), before)
+        self.assertEqual(self.ids("ma"), [6, 4, 2])
+
+    def test_batch_update(self):
+        """Test that a large batch is merged in with the same result."""
+        from quizzes.matching import TitleRecord
+        from quizzes.suggest import TitleSuggester
+
+        records = [TitleRecord(10 + i, f"Matrix Sequel {i}", i) for i in range(50)]
+        one_by_one = TitleSuggester()
+        for record in records:
+            one_by_one.add(record)
+        batched = TitleSuggester()
+        batched.update(records)
+        self.assertEqual(batched._state.keys, one_by_one._state.keys)
+        self.assertEqual(
+            sorted(zip(batched._state.keys, batched._state.ids)),
+            sorted(zip(one_by_one._state.keys, one_by_one._state.ids)),
+        )
+
+        self.suggester.update(records, removed=[1, 2])
+        self.assertEqual(self.ids("matrix", limit=3), [59, 58, 57])
+        self.assertEqual(len(self.suggester), 53)
+
+    def test_suggestion_fields(self):
+        """Test the suggestion payload."""
+        suggestion = self.suggester.suggest("matrix", 1)[0]
+        self.assertEqual(suggestion.name, "The Matrix")
+        self.assertEqual(suggestion.year, 1999)
+
+
+class TitleSuggestAPITestCase(TestCase):
+    """Test cases for the title suggestion endpoint."""
+
+    def setUp(self):
+        """Set up the catalogue."""
+        from quizzes import suggest
+        from quizzes.models import Title
+
+        suggest.reset_suggester()
+        self.addCleanup(suggest.reset_suggester)
+        self.title = Title.objects.create(name="Heat", year=1995, popularity=50)
+        Title.objects.create(name="Her", year=2013, popularity=80)
+        self.url = reverse("quizzes:title-suggest")
+
+    def test_suggest(self):
+        """Test suggestions for a prefix."""
+        response = self.client.get(self.url, {"q": "he"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item["name"] for item in response.json()["results"]], ["Her", "Heat"]
+        )
+        self.assertEqual(response.json()["results"][1]["year"], 1995)
+        self.assertIn("max-age", response["Cache-Control"])
+
+    def test_suggest_without_database_queries(self):
+        """Test that a warm suggester answers without querying."""
+        self.client.get(self.url, {"q": "he"})
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, {"q": "hea"})
+        self.assertEqual(len(response.json()["results"]), 1)
+
+    def test_limit(self):
+        """Test the limit parameter and its validation."""
+        response = self.client.get(self.url, {"q": "he", "limit": "1"})
+        self.assertEqual(len(response.json()["results"]), 1)
+        response = self.client.get(self.url, {"q": "he", "limit": "lots"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_new_title_is_suggested(self):
+        """Test that catalogue changes reach a built suggester."""
+        from quizzes.models import Title
+
+        self.client.get(self.url, {"q": "he"})
+        with self.captureOnCommitCallbacks(execute=True):
+            Title.objects.create(name="Hereditary", popularity=100)
+        response = self.client.get(self.url, {"q": "here"})
+        self.assertEqual(response.json()["results"][0]["name"], "Hereditary")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.title.delete()
+        response = self.client.get(self.url, {"q": "hea"})
+        self.assertEqual(response.json()["results"], [])
+
+    def test_catalogue_load_updates_once(self):
+        """Test that titles saved in one transaction are indexed together."""
+        from unittest import mock
+
+        from quizzes import suggest
+        from quizzes.models import Title
+
+        suggester = suggest.get_suggester()
+        with (
+            mock.patch.object(suggester, "update", wraps=suggester.update) as update,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            for i in range(3):
+                Title.objects.create(name=f"Halloween {i}", popularity=i)
+        update.assert_called_once()
+        self.assertEqual(len(update.call_args.args[0]), 3)
+        self.assertEqual(len(suggester.suggest("halloween")), 3)
+
+
+class MetricsTestCase(TestCase):
+    """Test cases for the Prometheus metrics."""
+
+    def setUp(self):
+        """Set up today's puzzle and an empty cache."""
+        cache.clear()
+        self.puzzle = create_puzzle(daily.today())
+
+    def sample(self, name, **labels):
+        """Return a metric's current value in this process."""
+        from prometheus_client import REGISTRY
+
+        return REGISTRY.get_sample_value(name, labels) or 0.0
+
+    def test_request_metrics(self):
+        """Test that requests are timed and their queries counted per view."""
+        labels = {"view": "quizzes:daily-puzzle", "method": "GET", "status": "200"}
+        before = self.sample(
+            "popcornguess_http_request_duration_seconds_count", **labels
+        )
+        queries_before = self.sample(
+            "popcornguess_http_request_db_queries_sum", view="quizzes:daily-puzzle"
+        )
+        self.client.get(reverse("quizzes:daily-puzzle"))
+        self.assertEqual(
+            self.sample("popcornguess_http_request_duration_seconds_count", **labels),
+            before + 1,
+        )
+        # The first request reads the puzzle from the database
+        self.assertGreater(
+            self.sample(
+                "popcornguess_http_request_db_queries_sum", view="quizzes:daily-puzzle"
+            ),
+            queries_before,
+        )
+        self.assertEqual(self.sample("popcornguess_http_requests_in_flight"), 0)
+
+    def test_unmatched_paths_share_a_label(self):
+        """Test that unknown paths don't each get their own label."""
+        labels = {"view": "<unmatched>", "method": "other", "status": "404"}
+        before = self.sample(
+            "popcornguess_http_request_duration_seconds_count", **labels
+        )
+        self.client.generic("BREW", "/no/such/path/")
+        self.assertEqual(
+            self.sample("popcornguess_http_request_duration_seconds_count", **labels),
+            before + 1,
+        )
+
+    def test_cache_lookups(self):
+        """Test that daily puzzle cache hits and misses are counted."""
+        hits = self.sample(
+            "popcornguess_cache_lookups_total", cache="daily_puzzle", result="hit"
+        )
+        misses = self.sample(
+            "popcornguess_cache_lookups_total", cache="daily_puzzle", result="miss"
+        )
+        daily.get_materialized(self.puzzle.puzzle_date)
+        daily.get_materialized(self.puzzle.puzzle_date)
+        self.assertEqual(
+            self.sample(
+                "popcornguess_cache_lookups_total", cache="daily_puzzle", result="hit"
+            ),
+            hits + 1,
+        )
+        self.assertEqual(
+            self.sample(
+                "popcornguess_cache_lookups_total", cache="daily_puzzle", result="miss"
+            ),
+            misses + 1,
+        )
+
+    def test_gameplay_counters(self):
+        """Test that guesses and solves are counted."""
+        from quizzes import matching
+        from quizzes.attempts import complete_attempt
+        from quizzes.models import Attempt, Title
+
+        matching.reset_index()
+        self.addCleanup(matching.reset_index)
+        Title.objects.create(name="The Matrix", year=1999, popularity=10)
+        matched = self.sample("popcornguess_guesses_total", result="matched")
+        unmatched = self.sample("popcornguess_guesses_total", result="unmatched")
+        solved = self.sample("popcornguess_puzzle_completions_total", solved="true")
+
+        matching.match("the matrix")
+        matching.match("casablanca")
+        attempt = Attempt.objects.create(puzzle=self.puzzle, guess_count=1)
+        complete_attempt(attempt, solved=True)
+        complete_attempt(attempt, solved=True)
+
+        self.assertEqual(
+            self.sample("popcornguess_guesses_total", result="matched"), matched + 1
+        )
+        self.assertEqual(
+            self.sample("popcornguess_guesses_total", result="unmatched"),
+            unmatched + 1,
+        )
+        # Finishing an attempt twice counts once
+        self.assertEqual(
+            self.sample("popcornguess_puzzle_completions_total", solved="true"),
+            solved + 1,
+        )
+
+    def test_metrics_endpoint(self):
+        """Test that /metrics serves the text format."""
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        self.assertIn(b"popcornguess_http_requests_in_flight", response.content)
+
+    def test_metrics_token(self):
+        """Test that a configured token is required to scrape."""
+        url = reverse("metrics")
+        with self.settings(METRICS_TOKEN="s3cret"):
+            self.assertEqual(self.client.get(url).status_code, 403)
+            response = self.client.get(url, headers={"Authorization": "Bearer wrong"})
+            self.assertEqual(response.status_code, 403)
+            response = self.client.get(url, headers={"Authorization": "Bearer s3cret"})
+            self.assertEqual(response.status_code, 200)
+
+    def test_multiprocess_registry(self):
+        """Test that workers' files are aggregated when configured."""
+        import os
+        import tempfile
+        from unittest import mock
+
+        from popcornguess import metrics
+
+        self.assertIs(metrics.get_registry(), metrics.REGISTRY)
+        with tempfile.TemporaryDirectory() as directory:
+            with mock.patch.dict(os.environ, {"PROMETHEUS_MULTIPROC_DIR": directory}):
+                registry = metrics.get_registry()
+            self.assertIsNot(registry, metrics.REGISTRY)
+            self.assertEqual(list(registry.collect()), [])
+
+
+def statements(stats):
+    """
+    Return the statements that ran besides transaction control.
+    """
+    return [
+        sql
+        for sql in stats.statements.elements()
+        if not sql.lstrip().startswith(("BEGIN", "SAVEPOINT", "RELEASE", "COMMIT"))
+    ]
+
+
+def written(stats):
+    """
+    Return how many statements ran besides transaction control, checking
+    that they are all upserts.
+    """
+    upserts = statements(stats)
+    assert all("ON CONFLICT" in sql for sql in upserts), upserts
+    return len(upserts)
+
+
+class GuessAPITestCase(TestCase):
+    """Test cases for guess submission."""
+
+    def setUp(self):
+        """Set up today's puzzle, a catalogue and a signed-in player."""
+        from rest_framework.test import APIClient
+
+        from quizzes import matching
+        from quizzes.models import Title
+        from users.models import User
+
+        cache.clear()
+        matching.reset_index()
+        self.addCleanup(matching.reset_index)
+        self.puzzle = create_puzzle(daily.today(), max_guesses=3)
+        self.matrix = Title.objects.create(name="The Matrix", popularity=90)
+        Title.objects.create(name="Heat", popularity=50)
+        self.user = User.objects.create_user(
+            email="player@example.com", username="player"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("quizzes:guess")
+
+    def guess(self, text, key=None, client=None):
+        """Submit a guess with an idempotency key."""
+        return (client or self.client).post(
+            self.url,
+            {"guess": text},
+            format="json",
+            headers={"Idempotency-Key": str(key or uuid.uuid4())},
+        )
+
+    def test_guesses_until_solved(self):
+        """Test that guesses are counted and a correct one completes the attempt."""
+        from analytics.models import PuzzleStats
+        from quizzes.models import Attempt
+
+        response = self.guess("heat")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["title"]["name"], "Heat")
+        self.assertFalse(response.data["correct"])
+        self.assertEqual((response.data["number"], response.data["remaining"]), (1, 2))
+
+        response = self.guess("matrix")
+        self.assertTrue(response.data["correct"])
+        self.assertTrue(response.data["solved"])
+        self.assertTrue(response.data["completed"])
+        self.assertEqual(response.data["remaining"], 0)
+
+        attempt = Attempt.objects.get(user=self.user)
+        self.assertEqual(attempt.guess_count, 2)
+        self.assertTrue(attempt.solved)
+        self.assertEqual(
+            list(attempt.guesses.order_by("number").values_list("text", "title")),
+            [("heat", self.matrix.pk + 1), ("matrix", self.matrix.pk)],
+        )
+        self.assertEqual(PuzzleStats.objects.get(puzzle_date=daily.today()).solves, 1)
+        self.assertEqual(self.guess("heat").status_code, 409)
+
+    def test_two_statements(self):
+        """Test that a guess is one upsert and one insert."""
+        from popcornguess import queries
+
+        self.guess("heat")
+        with queries.collect() as stats:
+            response = self.guess("ronin")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(written(stats), 2)
+
+    def test_solving_guess_statements(self):
+        """Test what completing an attempt adds to the two statements."""
+        from popcornguess import queries
+        from users.models import User
+
+        # Another player's solve creates the day's statistics rows
+        other = User.objects.create_user(email="other@example.com", username="other")
+        self.client.force_authenticate(user=other)
+        self.guess("matrix")
+        self.client.force_authenticate(user=self.user)
+        with queries.collect() as stats:
+            response = self.guess("matrix")
+        self.assertTrue(response.data["solved"])
+        # The two upserts, then the completion, three statistics counters and
+        # the streak
+        self.assertEqual(
+            sorted(sql.split()[0] for sql in statements(stats)),
+            ["INSERT"] * 2 + ["UPDATE"] * 5,
+        )
+
+    def test_anonymous_first_guess_statements(self):
+        """Test that a new device's first guess costs three more statements."""
+        from rest_framework.test import APIClient
+
+        from popcornguess import queries
+
+        # Loads the catalogue
+        self.guess("heat")
+        with queries.collect() as stats:
+            response = self.guess("heat", client=APIClient())
+        self.assertEqual(response.status_code, 201)
+        # The upsert finds no device, which is looked up and created before
+        # both upserts run
+        self.assertEqual(
+            sorted(sql.split()[0] for sql in statements(stats)),
+            ["INSERT"] * 4 + ["SELECT"],
+        )
+
+    def test_retry_returns_first_outcome(self):
+        """Test that a repeated idempotency key isn't counted again."""
+        from quizzes.models import Attempt
+
+        key = uuid.uuid4()
+        first = self.guess("heat", key)
+        retry = self.guess("heat", key)
+        self.assertEqual((first.status_code, retry.status_code), (201, 200))
+        self.assertEqual(first.data, retry.data)
+        self.assertEqual(Attempt.objects.get(user=self.user).guess_count, 1)
+        self.assertEqual(self.guess("ronin").data["number"], 2)
+
+    def test_out_of_guesses(self):
+        """Test that the last guess fails the attempt and later ones conflict."""
+        from quizzes.models import Attempt
+
+        for text in ("heat", "ronin"):
+            self.guess(text)
+        key = uuid.uuid4()
+        response = self.guess("alien", key)
+        self.assertTrue(response.data["completed"])
+        self.assertFalse(response.data["solved"])
+        attempt = Attempt.objects.get(user=self.user)
+        self.assertIsNotNone(attempt.completed_at)
+        self.assertFalse(attempt.solved)
+        # The final guess can still be retried
+        self.assertEqual(self.guess("alien", key).status_code, 200)
+        self.assertEqual(self.guess("the matrix").status_code, 409)
+
+    def test_anonymous_device(self):
+        """Test that anonymous players guess as their device."""
+        from rest_framework.test import APIClient
+
+        from popcornguess import queries
+        from quizzes.models import Attempt
+
+        client = APIClient()
+        response = self.guess("heat", client=client)
+        self.assertEqual(response.status_code, 201)
+        self.assertIn("pg_device", response.cookies)
+        attempt = Attempt.objects.get()
+        self.assertIsNone(attempt.user_id)
+        self.assertIsNotNone(attempt.device_id)
+        with queries.collect() as stats:
+            response = self.guess("ronin", client=client)
+        self.assertEqual(response.data["number"], 2)
+        self.assertEqual(written(stats), 2)
+
+    def test_invalid_requests(self):
+        """Test that bad input and unknown puzzles are rejected."""
+        self.assertEqual(self.guess("").status_code, 400)
+        self.assertEqual(self.guess("x" * 256).status_code, 400)
+        response = self.client.post(
+            self.url, {"guess": "heat"}, format="json", headers={"Idempotency-Key": "1"}
+        )
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(self.url, {"guess": "heat"}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Idempotency-Key", response.data)
+        tomorrow = daily.today() + datetime.timedelta(days=1)
+        create_puzzle(tomorrow)
+        url = reverse("quizzes:guess-by-date", kwargs={"puzzle_date": tomorrow})
+        response = self.client.post(url, {"guess": "heat"}, format="json")
+        self.assertEqual(response.status_code, 404)
+
+
+class GuessConcurrencyTestCase(TransactionTestCase):
+    """Test guess submissions racing each other."""
+
+    def setUp(self):
+        """Set up today's puzzle and a player."""
+        from users.models import User
+
+        cache.clear()
+        self.puzzle = create_puzzle(daily.today(), max_guesses=6)
+        self.answer_key = daily.get_answer_key(daily.today())
+        self.user = User.objects.create_user(
+            email="player@example.com", username="player"
+        )
+
+    def run_concurrently(self, target, count):
+        """Run ``target(i)`` in ``count`` threads released at the same time."""
+        barrier = threading.Barrier(count)
+        results = []
+        errors = []
+
+        def worker(index):
+            try:
+                barrier.wait()
+                while True:
+                    try:
+                        results.append(target(index))
+                        break
+                    except OperationalError as exc:
+                        # SQLite's shared in-memory cache reports a lock
+                        # conflict instead of waiting for it like PostgreSQL
+                        if "locked" not in str(exc):
+                            raise
+                        time.sleep(0.001)
+            except Exception as exc:  # pragma: no cover - reported below
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        return results
+
+    def submit(self, text, key):
+        """Submit a guess as the player."""
+        from quizzes import guesses
+
+        return guesses.submit_guess(
+            self.answer_key,
+            daily.today(),
+            guesses.Player(user_id=self.user.pk),
+            text,
+            key,
+        )
+
+    def test_duplicate_submissions_count_once(self):
+        """Test that simultaneous retries of one guess count it once."""
+        from quizzes.models import Attempt, Guess
+
+        key = uuid.uuid4()
+        results = self.run_concurrently(lambda i: self.submit("heat", key), 4)
+        self.assertEqual(
+            sorted(r.created for r in results), [False, False, False, True]
+        )
+        self.assertEqual({r.number for r in results}, {1})
+        self.assertEqual(Attempt.objects.get().guess_count, 1)
+        self.assertEqual(Guess.objects.count(), 1)
+
+    def test_distinct_guesses_numbered(self):
+        """Test that simultaneous different guesses each get their own number."""
+        from quizzes.models import Attempt
+
+        results = self.run_concurrently(
+            lambda i: self.submit(f"guess {i}", uuid.uuid4()), 4
+        )
+        self.assertEqual(sorted(r.number for r in results), [1, 2, 3, 4])
+        self.assertEqual(Attempt.objects.get().guess_count, 4)
+
+
+class PuzzleBundleTestCase(TestCase):
+    """Test cases for the puzzle bundle and its day keys."""
+
+    def setUp(self):
+        """Set up puzzles for yesterday, today and the coming days."""
+        cache.clear()
+        self.today = daily.today()
+        for offset in (-1, 0, 1, 2, 10):
+            create_puzzle(
+                self.today + datetime.timedelta(days=offset),
+                clues=[{"type": "emoji", "value": str(offset)}],
+            )
+
+    def fetch(self, **headers):
+        """Follow the bundle redirect and return the versioned response."""
+        response = self.client.get(reverse("quizzes:bundle"))
+        self.assertEqual(response.status_code, 302)
+        return self.client.get(response["Location"], headers=headers)
+
+    def test_bundle_covers_coming_days(self):
+        """Test that the bundle holds today's and upcoming puzzles."""
+        response = self.fetch()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("immutable", response["Cache-Control"])
+        body = response.json()
+        self.assertEqual(body["start"], self.today.isoformat())
+        self.assertEqual(
+            [day["date"] for day in body["days"]],
+            [(self.today + datetime.timedelta(days=i)).isoformat() for i in range(3)],
+        )
+        self.assertNotIn("The Matrix", response.content.decode())
+
+    def test_days_unlock_with_their_key(self):
+        """Test that a day decrypts with its released key only."""
+        from cryptography.exceptions import InvalidTag
+
+        from quizzes import bundles
+
+        today, tomorrow = self.fetch().json()["days"][:2]
+        key = self.client.get(reverse("quizzes:puzzle-key")).json()["key"]
+        payload = json.loads(bundles.unseal(today, key))
+        self.assertEqual(payload["clues"], [{"type": "emoji", "value": "0"}])
+        with self.assertRaises(InvalidTag):
+            bundles.unseal(tomorrow, key)
+        # The day's content can't be passed off as another day's
+        with self.assertRaises(InvalidTag):
+            bundles.unseal({**today, "date": tomorrow["date"]}, key)
+
+        url = reverse(
+            "quizzes:puzzle-key-by-date",
+            kwargs={"puzzle_date": datetime.date.fromisoformat(tomorrow["date"])},
+        )
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_gzip(self):
+        """Test that clients accepting gzip get the compressed body."""
+        plain = self.fetch()
+        response = self.fetch(accept_encoding="gzip, br")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        response = self.client.get(
+            response.wsgi_request.path, headers={"If-None-Match": response["ETag"]}
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_edit_changes_version(self):
+        """Test that editing a bundled puzzle moves the bundle to a new URL."""
+        from quizzes.models import DailyPuzzle
+
+        first = self.client.get(reverse("quizzes:bundle"))["Location"]
+        with self.captureOnCommitCallbacks(execute=True):
+            puzzle = DailyPuzzle.objects.get(puzzle_date=self.today)
+            puzzle.max_guesses = 3
+            puzzle.save()
+        second = self.client.get(reverse("quizzes:bundle"))["Location"]
+        self.assertNotEqual(first, second)
+        # Content-addressed: an unchanged window keeps its version
+        self.assertEqual(self.client.get(reverse("quizzes:bundle"))["Location"], second)
+        self.assertEqual(self.client.get(first).status_code, 200)
+        url = reverse("quizzes:bundle-version", kwargs={"version": "0" * 32})
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_version_survives_cache_miss(self):
+        """Test that the current version is rebuilt once evicted."""
+        from quizzes.models import DailyPuzzle
+
+        location = self.client.get(reverse("quizzes:bundle"))["Location"]
+        body = self.client.get(location).content
+        cache.clear()
+        response = self.client.get(location)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, body)
+
+        # A version that is no longer current is gone with the cache
+        with self.captureOnCommitCallbacks(execute=True):
+            puzzle = DailyPuzzle.objects.get(puzzle_date=self.today)
+            puzzle.max_guesses = 3
+            puzzle.save()
+        cache.clear()
+        self.assertEqual(self.client.get(location).status_code, 404)
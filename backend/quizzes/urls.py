@@ -0,0 +1,40 @@
+"""
+URL configuration for quizzes app.
+"""
+
+from django.urls import path, register_converter
+
+from . import views
+from .converters import IsoDateConverter
+
+app_name = "quizzes"
+
+register_converter(IsoDateConverter, "isodate")
+
+urlpatterns = [
+    path("daily/", views.daily_puzzle, name="daily-puzzle"),
+    path(
+        "daily/<isodate:puzzle_date>/",
+        views.daily_puzzle,
+        name="daily-puzzle-by-date",
+    ),
+    path("daily/key/", views.puzzle_key, name="puzzle-key"),
+    path(
+        "daily/<isodate:puzzle_date>/key/",
+        views.puzzle_key,
+        name="puzzle-key-by-date",
+    ),
+    path("bundle/", views.puzzle_bundle, name="bundle"),
+    path(
+        "bundle/<slug:version>/",
+        views.puzzle_bundle_version,
+        name="bundle-version",
+    ),
+    path("daily/guesses/", views.GuessView.as_view(), name="guess"),
+    path(
+        "daily/<isodate:puzzle_date>/guesses/",
+        views.GuessView.as_view(),
+        name="guess-by-date",
+    ),
+    path("titles/suggest/", views.title_suggestions, name="title-suggest"),
+]
@@ -1 +1,258 @@
-# Create your views here.
+"""
+API views for the quizzes app.
+
+The daily puzzle and the puzzle bundle are served pre-serialized, so these
+views are plain Django views rather than DRF views: there is nothing to
+render and no authentication to run on the hot path.
+
+They are also async views: under an ASGI server a slow client waiting on
+its response holds an event loop task rather than a worker thread (see
+docs/DEPLOYMENT.md).
+
+Guess submission is the exception, a sync DRF view. It needs DRF's token
+and session authentication, which has no async path. Async would not free
+a thread either: every guess is a database transaction, which Django 4.2
+runs on a thread from async code too. Under ASGI the request body is read
+and the response sent on the event loop, so a slow client doesn't hold
+that thread; only the transaction does.
+"""
+
+import datetime
+import re
+import uuid
+
+from django.http import HttpRequest, HttpResponse, HttpResponseRedirect, JsonResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from asgiref.sync import sync_to_async
+from rest_framework import status
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from popcornguess.decorators import require_safe_async
+from popcornguess.throttling import DeviceThrottle, IPThrottle, UserThrottle, throttle
+from users import devices
+
+from . import bundles, daily, guesses
+from .suggest import get_suggester, peek_suggester
+
+# Past puzzles never change once played, so they can be cached longer
+ARCHIVE_MAX_AGE = 60 * 60 * 24
+
+SUGGEST_DEFAULT_LIMIT = 10
+SUGGEST_MAX_LIMIT = 20
+GUESS_MAX_LENGTH = 255
+
+# A versioned bundle never changes
+BUNDLE_MAX_AGE = 60 * 60 * 24 * 365
+# How long the current bundle's version may be cached before clients check
+# for a new one (an edited puzzle)
+BUNDLE_REDIRECT_MAX_AGE = 60 * 5
+
+accepts_gzip = re.compile(r"\bgzip\b")
+
+# Suggestions only change when the catalogue does; let clients and CDNs
+# absorb repeated keystrokes
+SUGGEST_MAX_AGE = 60 * 5
+
+
+@require_safe_async
+async def daily_puzzle(
+    request: HttpRequest, puzzle_date: datetime.date | None = None
+) -> HttpResponse:
+    """
+    Return the puzzle for a date (today when omitted).
+    Supports conditional requests through ETag and Last-Modified.
+    """
+    current_date = daily.today()
+    if puzzle_date is None:
+        puzzle_date = current_date
+
+    entry = None
+    if puzzle_date <= current_date:
+        entry = await daily.aget_materialized(puzzle_date)
+    if entry is None:
+        return JsonResponse({"detail": "No puzzle for this date."}, status=404)
+
+    response = HttpResponse(entry.payload, content_type="application/json")
+    response["ETag"] = entry.etag
+    response["Last-Modified"] = http_date(entry.last_modified)
+    if puzzle_date == current_date:
+        max_age = daily.seconds_until_rollover()
+    else:
+        max_age = ARCHIVE_MAX_AGE
+    patch_cache_control(response, public=True, max_age=max_age)
+
+    return get_conditional_response(
+        request,
+        etag=entry.etag,
+        last_modified=entry.last_modified,
+        response=response,
+    )
+
+
+@require_safe_async
+async def puzzle_key(
+    request: HttpRequest, puzzle_date: datetime.date | None = None
+) -> HttpResponse:
+    """
+    Return the key unlocking a date's puzzle in the bundle (today's when
+    omitted), once the date has come. Needs neither database nor cache.
+    """
+    if puzzle_date is None:
+        puzzle_date = daily.today()
+    key = bundles.release_key(puzzle_date)
+    if key is None:
+        return JsonResponse({"detail": "This puzzle is still locked."}, status=404)
+    response = JsonResponse({"date": puzzle_date.isoformat(), "key": key})
+    # A date's key never changes
+    patch_cache_control(response, public=True, max_age=ARCHIVE_MAX_AGE)
+    return response
+
+
+@require_safe_async
+async def puzzle_bundle(request: HttpRequest) -> HttpResponse:
+    """
+    Redirect to the current bundle's versioned URL.
+    """
+    bundle = await bundles.aget_current()
+    response = HttpResponseRedirect(
+        reverse("quizzes:bundle-version", kwargs={"version": bundle.version})
+    )
+    patch_cache_control(
+        response,
+        public=True,
+        max_age=min(BUNDLE_REDIRECT_MAX_AGE, daily.seconds_until_rollover()),
+    )
+    return response
+
+
+@require_safe_async
+async def puzzle_bundle_version(request: HttpRequest, version: str) -> HttpResponse:
+    """
+    Return a bundle by version, gzipped for clients that accept it.
+    """
+    bundle = await bundles.aget_version(version)
+    if bundle is None:
+        return JsonResponse({"detail": "Unknown bundle version."}, status=404)
+
+    if accepts_gzip.search(request.headers.get("Accept-Encoding", "")):
+        response = HttpResponse(bundle.gzipped, content_type="application/json")
+        response["Content-Encoding"] = "gzip"
+    else:
+        response = HttpResponse(bundle.body, content_type="application/json")
+    etag = f'"{bundle.version}"'
+    response["ETag"] = etag
+    response["Vary"] = "Accept-Encoding"
+    patch_cache_control(response, public=True, max_age=BUNDLE_MAX_AGE, immutable=True)
+    return get_conditional_response(request, etag=etag, response=response)
+
+
+@require_safe_async
+@throttle("suggest", [IPThrottle, DeviceThrottle])
+async def title_suggestions(request: HttpRequest) -> HttpResponse:
+    """
+    Return catalogue titles matching the prefix in ``q``, most popular first.
+    Served from the in-process suggester; no database query is made.
+    """
+    query = request.GET.get("q", "")
+    try:
+        limit = int(request.GET.get("limit", SUGGEST_DEFAULT_LIMIT))
+    except ValueError:
+        return JsonResponse({"limit": ["A valid integer is required."]}, status=400)
+    limit = max(1, min(limit, SUGGEST_MAX_LIMIT))
+
+    suggester = peek_suggester()
+    if suggester is None:
+        # First request in this process: loading the catalogue hits the
+        # database, which must not happen on the event loop
+        suggester = await sync_to_async(get_suggester)()
+    suggestions = suggester.suggest(query, limit)
+    response = JsonResponse(
+        {
+            "results": [
+                {"id": item.title_id, "name": item.name, "year": item.year}
+                for item in suggestions
+            ]
+        }
+    )
+    patch_cache_control(response, public=True, max_age=SUGGEST_MAX_AGE)
+    return response
+
+
+class GuessView(APIView):
+    """
+    Submit a guess for a puzzle (today's when no date is given), as the
+    signed-in user or else the anonymous device.
+
+    Send a fresh UUID in the required ``Idempotency-Key`` header with each
+    guess and reuse it when retrying: a repeated key returns the first outcome with
+    200 instead of 201, and isn't counted again.
+    """
+
+    permission_classes = [AllowAny]
+    throttle_classes = [IPThrottle, DeviceThrottle, UserThrottle]
+    throttle_scope = "guess"
+
+    def post(self, request, puzzle_date=None):  # type: ignore[no-untyped-def]
+        current_date = daily.today()
+        if puzzle_date is None:
+            puzzle_date = current_date
+        answer_key = None
+        if puzzle_date <= current_date:
+            answer_key = daily.get_answer_key(puzzle_date)
+        if answer_key is None:
+            raise NotFound("No puzzle for this date.")
+
+        text = request.data.get("guess")
+        if not isinstance(text, str) or not text.strip():
+            raise ValidationError({"guess": ["This field is required."]})
+        if len(text) > GUESS_MAX_LENGTH:
+            raise ValidationError(
+                {
+                    "guess": [
+                        f"Ensure this field has at most {GUESS_MAX_LENGTH} characters."
+                    ]
+                }
+            )
+        header = request.headers.get("Idempotency-Key")
+        if not header:
+            raise ValidationError({"Idempotency-Key": ["This header is required."]})
+        try:
+            key = uuid.UUID(header)
+        except ValueError:
+            raise ValidationError({"Idempotency-Key": ["Must be a UUID."]})
+
+        if request.user.is_authenticated:
+            player = guesses.Player(user_id=request.user.pk)
+        else:
+            player = guesses.Player(device_id=devices.get_device_id(request))
+        try:
+            result = guesses.submit_guess(
+                answer_key, puzzle_date, player, text.strip(), key
+            )
+        except guesses.PuzzleFinished:
+            return Response(
+                {"detail": "This puzzle is already finished."},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response(
+            {
+                "guess": result.text,
+                "title": (
+                    {"id": result.title_id, "name": result.title_name}
+                    if result.title_id is not None
+                    else None
+                ),
+                "correct": result.correct,
+                "number": result.number,
+                "remaining": result.remaining,
+                "completed": result.completed,
+                "solved": result.solved,
+            },
+            status=status.HTTP_201_CREATED if result.created else status.HTTP_200_OK,
+        )
@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.translation import gettext_lazy as _
 
-from .models import User
+from .models import AnonymousDevice, User
 
 
 @admin.register(User)
@@ -42,6 +42,10 @@ class UserAdmin(BaseUserAdmin):
             },
         ),
         (_("Important dates"), {"fields": ("last_login", "date_joined")}),
+        (
+            _("Streaks"),
+            {"fields": ("current_streak", "best_streak", "last_played_date")},
+        ),
     )
 
     # Fieldsets for adding a new user
@@ -64,4 +68,28 @@ class UserAdmin(BaseUserAdmin):
         ),
     )
 
-    readonly_fields = ("last_login", "date_joined")
+    readonly_fields = (
+        "last_login",
+        "date_joined",
+        "current_streak",
+        "best_streak",
+        "last_played_date",
+    )
+
+
+@admin.register(AnonymousDevice)
+class AnonymousDeviceAdmin(admin.ModelAdmin):
+    """
+    Read-only admin for anonymous devices.
+    """
+
+    list_display = ("device_id", "created_at", "last_seen", "user", "merged_at")
+    search_fields = ("device_id",)
+    raw_id_fields = ("user",)
+    ordering = ("-last_seen",)
+
+    def has_add_permission(self, request):  # type: ignore[no-untyped-def]
+        return False
+
+    def has_change_permission(self, request, obj=None):  # type: ignore[no-untyped-def]
+        return False
@@ -0,0 +1,43 @@
+"""
+Authentication classes for the users API.
+"""
+
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+
+from . import tokens
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """
+    Authenticate ``Authorization: Bearer <access token>`` headers.
+
+    The user comes from the token claims and the authentication cache, so
+    a warm request costs no database query (session authentication reads
+    ``django_session`` and then ``users``).
+    """
+
+    keyword = "Bearer"
+
+    def authenticate(self, request):  # type: ignore[no-untyped-def]
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed(
+                _("Invalid token header. Expected 'Bearer <token>'.")
+            )
+        try:
+            token = auth[1].decode()
+            claims = tokens.verify_token(token, tokens.ACCESS)
+            user = tokens.get_user(claims)
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed(_("Invalid token header."))
+        except tokens.InvalidToken as exc:
+            raise exceptions.AuthenticationFailed(str(exc))
+        return (user, claims)
+
+    def authenticate_header(self, request):  # type: ignore[no-untyped-def]
+        return self.keyword
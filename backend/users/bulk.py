@@ -0,0 +1,231 @@
+"""
+Streaming bulk import and export of users (see the ``import_users`` and
+``export_users`` commands).
+
+Records are read, validated, hashed and inserted one batch at a time, and
+exported through a database iterator, so memory use depends on the batch
+size rather than on the number of users.
+"""
+
+import csv
+import datetime
+import itertools
+import json
+import resource
+import sys
+from collections.abc import Iterable, Iterator
+from typing import IO, Any, NamedTuple
+
+from django.contrib.auth import hashers
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from . import passwords
+from .models import User
+
+CSV = "csv"
+JSONL = "jsonl"
+FORMATS = (CSV, JSONL)
+
+IMPORT_FIELDS = ["email", "username", "first_name", "last_name", "is_active"]
+EXPORT_FIELDS = [
+    "id",
+    "email",
+    "username",
+    "first_name",
+    "last_name",
+    "is_active",
+    "date_joined",
+]
+
+
+class ImportResult(NamedTuple):
+    """The outcome of importing one batch."""
+
+    created: int
+    # Valid records whose email or username was already taken
+    skipped: int
+    # (line number, message) for invalid records
+    errors: list[tuple[int, str]]
+
+
+def detect_format(path: str, fmt: str | None) -> str:
+    """
+    Return ``fmt``, or the format implied by the file extension.
+    """
+    if fmt:
+        return fmt
+    return JSONL if path.endswith((".jsonl", ".ndjson")) else CSV
+
+
+def read_records(stream: IO[str], fmt: str) -> Iterator[tuple[int, Any]]:
+    """
+    Yield (line number, record) pairs from a CSV or JSON Lines stream.
+    """
+    if fmt == CSV:
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_number, line in enumerate(stream, start=1):
+        if line.strip():
+            yield line_number, json.loads(line)
+
+
+def chunked(iterable: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    """
+    Yield successive lists of up to ``size`` items.
+    """
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def build_user(record: Any) -> tuple[User, str | None]:
+    """
+    Validate a record and return an unsaved user and the raw password to
+    hash (None when the record has a hash already or no password).
+    Raises ValidationError.
+    """
+    if not isinstance(record, dict):
+        raise ValidationError("Record is not an object.")
+    values = {}
+    for name in IMPORT_FIELDS:
+        field: Any = User._meta.get_field(name)
+        raw = record.get(name)
+        if raw in (None, "") and name not in ("email", "username"):
+            continue
+        values[name] = field.clean(raw, None)
+    values["email"] = User.objects.normalize_email(values["email"])
+    if record.get("date_joined"):
+        date_joined: Any = User._meta.get_field("date_joined")
+        joined = date_joined.to_python(record["date_joined"])
+        if timezone.is_naive(joined):
+            joined = timezone.make_aware(joined, datetime.timezone.utc)
+        values["date_joined"] = joined
+    user = User(**values)
+
+    raw_password = record.get("password") or None
+    if record.get("password_hash"):
+        try:
+            hashers.identify_hasher(record["password_hash"])
+        except ValueError:
+            raise ValidationError("Unknown password hash format.")
+        user.password = record["password_hash"]
+        raw_password = None
+    return user, raw_password
+
+
+def untaken(pending: list[tuple[User, str | None]]) -> list[tuple[User, str | None]]:
+    """
+    Return the pending users whose email and username are free (ignoring
+    case, as the unique indexes on LOWER() enforce), in the database and
+    earlier in the list.
+    """
+    users = [user for user, _ in pending]
+    taken_emails = {
+        email.lower()
+        for email in User.objects.iexact_in(
+            "email", [u.email for u in users]
+        ).values_list("email", flat=True)
+    }
+    taken_usernames = {
+        username.lower()
+        for username in User.objects.iexact_in(
+            "username", [u.username for u in users]
+        ).values_list("username", flat=True)
+    }
+    free = []
+    for user, raw_password in pending:
+        email, username = user.email.lower(), user.username.lower()
+        if email in taken_emails or username in taken_usernames:
+            continue
+        taken_emails.add(email)
+        taken_usernames.add(username)
+        free.append((user, raw_password))
+    return free
+
+
+def import_batch(records: list[tuple[int, Any]]) -> ImportResult:
+    """
+    Validate, hash and insert one batch of records. Users whose email or
+    username is already taken (ignoring case), in the database or earlier
+    in the batch, are skipped before their passwords are hashed.
+    """
+    errors = []
+    pending: list[tuple[User, str | None]] = []
+    for line_number, record in records:
+        try:
+            pending.append(build_user(record))
+        except ValidationError as exc:
+            errors.append((line_number, "; ".join(exc.messages)))
+    valid = len(pending)
+
+    new = untaken(pending)
+    # Hashing dominates the import; it runs on the hashing pool's threads
+    hashes = passwords.make_passwords([raw_password for _, raw_password in new])
+    for (user, raw_password), encoded in zip(new, hashes):
+        if raw_password is not None or not user.password:
+            user.password = encoded
+
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create(
+                    [user for user, _ in new], batch_size=len(new) or 1
+                )
+        except IntegrityError:
+            # A concurrent sign-up took one of the names; check again
+            if attempt:
+                raise
+            new = untaken(new)
+            continue
+        break
+    return ImportResult(len(new), valid - len(new), errors)
+
+
+def export_records(
+    queryset: QuerySet, *, chunk_size: int, include_password_hashes: bool = False
+) -> Iterator[dict[str, Any]]:
+    """
+    Yield users as export records, streamed from the database in chunks.
+    """
+    fields = EXPORT_FIELDS + (["password"] if include_password_hashes else [])
+    rows = queryset.order_by("pk").values_list(*fields).iterator(chunk_size=chunk_size)
+    for row in rows:
+        record = dict(zip(fields, row))
+        record["date_joined"] = record["date_joined"].isoformat()
+        if include_password_hashes:
+            record["password_hash"] = record.pop("password")
+        yield record
+
+
+def write_records(
+    stream: Any, fmt: str, records: Iterable[dict[str, Any]], fields: list[str]
+) -> int:
+    """
+    Write records to a stream as CSV or JSON Lines; return how many.
+    """
+    count = 0
+    if fmt == CSV:
+        writer = csv.DictWriter(stream, fieldnames=fields, lineterminator="\n")
+        writer.writeheader()
+        for record in records:
+            writer.writerow(record)
+            count += 1
+        return count
+    for record in records:
+        stream.write(json.dumps(record) + "\n")
+        count += 1
+    return count
+
+
+def peak_rss_mb() -> float:
+    """
+    Return the peak resident set size of this process, in MiB.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
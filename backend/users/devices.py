@@ -0,0 +1,220 @@
+"""
+Anonymous device identity.
+
+Players can play without an account; their device is identified by a
+signed cookie holding a random device id and the day it was last seen.
+Keeping that state in the cookie means a repeat request costs no database
+access at all:
+
+* the cookie is issued when a view first asks for the device id, without
+  writing anything; the `AnonymousDevice` row is only created once the
+  device has state worth storing (`get_device`);
+* ``last_seen`` is refreshed at most once a day per device, through an
+  in-process buffer flushed as a single UPDATE every
+  ``DEVICE_LAST_SEEN_FLUSH_INTERVAL`` seconds;
+* on sign-up, `merge_into` moves the device's attempts to the new account
+  in one UPDATE.
+"""
+
+import atexit
+import datetime
+import logging
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpRequest
+from django.utils import timezone
+
+from rest_framework.request import Request
+
+from popcornguess import caching
+
+from .models import AnonymousDevice, User
+
+logger = logging.getLogger(__name__)
+
+COOKIE_SALT = "users.device"
+
+
+class DeviceCookie(NamedTuple):
+    """The contents of a device cookie."""
+
+    device_id: uuid.UUID
+    seen_on: datetime.date
+
+
+def get_cookie_name() -> str:
+    return str(getattr(settings, "DEVICE_COOKIE_NAME", "pg_device"))
+
+
+def read_cookie(request: HttpRequest) -> DeviceCookie | None:
+    """
+    Return the verified device cookie of a request, or None.
+    """
+    value = request.get_signed_cookie(get_cookie_name(), None, salt=COOKIE_SALT)
+    if not value:
+        return None
+    try:
+        device_id, seen_on = value.split(":")
+        return DeviceCookie(uuid.UUID(device_id), datetime.date.fromisoformat(seen_on))
+    except ValueError:
+        return None
+
+
+def get_device_id(request: HttpRequest | Request) -> uuid.UUID:
+    """
+    Return the request's device id, assigning a new one (and a cookie on
+    the response) if it has none. Takes a DRF request too.
+    """
+    if isinstance(request, Request):
+        # The middleware issuing the cookie sees the wrapped request
+        request = request._request
+    device_id = getattr(request, "device_id", None)
+    if device_id is None:
+        device_id = uuid.uuid4()
+        request.device_id = device_id  # type: ignore[attr-defined]
+        request.device_cookie_outdated = True  # type: ignore[attr-defined]
+    return device_id  # type: ignore[no-any-return]
+
+
+def get_device(request: HttpRequest) -> AnonymousDevice:
+    """
+    Return the request's device row, creating it on first use.
+    """
+    device = getattr(request, "_device", None)
+    if device is None:
+        device, _ = AnonymousDevice.objects.get_or_create(
+            device_id=get_device_id(request)
+        )
+        request._device = device  # type: ignore[attr-defined]
+    return device
+
+
+class LastSeenBuffer:
+    """
+    Collects devices seen since the last flush and stamps them together.
+    """
+
+    def __init__(
+        self,
+        *,
+        flush_interval: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self._pending: set[uuid.UUID] = set()
+        self._lock = threading.Lock()
+        self._last_flush = clock()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def touch(self, device_id: uuid.UUID) -> None:
+        """
+        Record that a device was seen, flushing if the interval has passed.
+        """
+        with self._lock:
+            self._pending.add(device_id)
+            due = self.clock() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Write ``last_seen`` for every pending device; return how many.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, set()
+            self._last_flush = self.clock()
+        if not pending:
+            return 0
+        try:
+            # Devices that never stored anything have no row; that's fine
+            AnonymousDevice.objects.filter(device_id__in=pending).update(
+                last_seen=timezone.now()
+            )
+        except Exception:
+            logger.exception("Failed to update last_seen of %d devices", len(pending))
+            return 0
+        return len(pending)
+
+
+_seen_buffer: LastSeenBuffer | None = None
+_seen_buffer_lock = threading.Lock()
+
+
+def get_seen_buffer() -> LastSeenBuffer:
+    """
+    Return the process-wide last-seen buffer.
+    """
+    global _seen_buffer
+    if _seen_buffer is None:
+        with _seen_buffer_lock:
+            if _seen_buffer is None:
+                buffer = LastSeenBuffer(
+                    flush_interval=getattr(
+                        settings, "DEVICE_LAST_SEEN_FLUSH_INTERVAL", 60.0
+                    )
+                )
+                atexit.register(buffer.flush)
+                _seen_buffer = buffer
+    return _seen_buffer
+
+
+def reset_seen_buffer() -> None:
+    """
+    Flush and forget the process-wide last-seen buffer.
+    """
+    global _seen_buffer
+    with _seen_buffer_lock:
+        if _seen_buffer is not None:
+            atexit.unregister(_seen_buffer.flush)
+            _seen_buffer.flush()
+            _seen_buffer = None
+
+
+def merge_into(device_id: uuid.UUID, user: User) -> int:
+    """
+    Move a device's attempts to a user account and return how many moved.
+    Attempts at puzzles the user has already played stay with the device.
+    """
+    from quizzes.models import Attempt
+
+    from . import leaderboard, streaks, tokens
+
+    with transaction.atomic():
+        device = (
+            AnonymousDevice.objects.select_for_update()
+            .filter(device_id=device_id, user__isnull=True)
+            .first()
+        )
+        if device is None:
+            return 0
+        moved = (
+            Attempt.objects.filter(device=device)
+            .exclude(puzzle__attempts__user=user)
+            .update(user=user, device=None)
+        )
+        device.user = user
+        device.merged_at = timezone.now()
+        device.save(update_fields=["user", "merged_at"])
+        if moved:
+            completions = (
+                Attempt.objects.filter(user=user, completed_at__isnull=False)
+                .order_by("completed_at", "id")
+                .values_list("puzzle__puzzle_date", "solved")
+            )
+            current, best, last = streaks.compute_streaks(completions)
+            User.objects.filter(pk=user.pk).update(
+                current_streak=current, best_streak=best, last_played_date=last
+            )
+            tokens.forget_user(user.pk)
+            caching.invalidate(User, user.pk)
+            transaction.on_commit(lambda: leaderboard.sync_user(user.pk))
+    return moved
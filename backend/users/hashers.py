@@ -0,0 +1,49 @@
+"""
+Password hashers whose cost is read from settings.
+
+Django's hashers fix their work factor in class attributes; these read it
+from settings on every use, so raising a cost is a settings change rather
+than a code change. Stored hashes made with an older cost are upgraded the
+next time their owner logs in, since Django re-hashes whenever
+`must_update` reports different parameters (see users.passwords).
+"""
+
+from typing import Any
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+def _setting(name: str, default: int) -> Any:
+    return property(lambda self: int(getattr(settings, name, default)))
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """
+    Argon2id with ``PASSWORD_ARGON2_TIME_COST``, ``PASSWORD_ARGON2_MEMORY_COST``
+    (KiB) and ``PASSWORD_ARGON2_PARALLELISM``.
+    """
+
+    time_cost = _setting("PASSWORD_ARGON2_TIME_COST", 2)  # type: ignore[assignment]
+    memory_cost = _setting(  # type: ignore[assignment]
+        "PASSWORD_ARGON2_MEMORY_COST", 102400
+    )
+    parallelism = _setting("PASSWORD_ARGON2_PARALLELISM", 1)  # type: ignore[assignment]
+
+
+class BCryptSHA256PasswordHasher(hashers.BCryptSHA256PasswordHasher):
+    """
+    bcrypt (of the password's SHA-256) with ``PASSWORD_BCRYPT_ROUNDS``.
+    """
+
+    rounds = _setting("PASSWORD_BCRYPT_ROUNDS", 12)  # type: ignore[assignment]
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 with ``PASSWORD_PBKDF2_ITERATIONS``.
+    """
+
+    iterations = _setting(  # type: ignore[assignment]
+        "PASSWORD_PBKDF2_ITERATIONS", 600000
+    )
@@ -0,0 +1,336 @@
+"""
+Streak leaderboards.
+
+Ranking players with ``ORDER BY ... LIMIT`` and answering "your rank" with
+``COUNT(*) WHERE score > mine`` costs O(players) per request. Leaderboards
+are instead kept in a sorted structure answering top-N, rank and
+neighbourhood queries in O(log N + K):
+
+* `RedisLeaderboard` stores each board in a Redis sorted set, shared by all
+  processes (production);
+* `MemoryLeaderboard` keeps a sorted list in the process, loaded from the
+  database on first use. It only sees updates made by its own process, so
+  it suits tests and single-process deploys.
+
+The backend is chosen with ``LEADERBOARD_BACKEND``. Boards are updated by
+`sync_user()` whenever a completion changes a player's streak, and lapsed
+streaks are dropped by ``manage.py expire_streaks`` after each rollover.
+Shared boards are filled by ``manage.py load_leaderboards``.
+Ties are ordered consistently within a backend but otherwise arbitrarily.
+"""
+
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Iterable, Mapping
+from typing import Any, NamedTuple
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from sortedcontainers import SortedList
+
+STREAK = "streak"
+BEST_STREAK = "best_streak"
+
+# Board name -> User field it ranks by
+BOARDS = {
+    STREAK: "current_streak",
+    BEST_STREAK: "best_streak",
+}
+
+
+class Entry(NamedTuple):
+    """A player's position on a leaderboard (rank 1 is the top)."""
+
+    rank: int
+    user_id: int
+    score: int
+
+
+class BaseLeaderboard(ABC):
+    """
+    Interface of leaderboard backends. Only players with a positive score
+    are kept on a board.
+    """
+
+    # Whether the backend starts empty and must be loaded from the database
+    needs_warmup = False
+
+    @abstractmethod
+    def set_score(self, board: str, user_id: int, score: int) -> None: ...
+
+    def set_scores(self, board: str, scores: Mapping[int, int]) -> None:
+        for user_id, score in scores.items():
+            self.set_score(board, user_id, score)
+
+    @abstractmethod
+    def remove(self, board: str, user_ids: Iterable[int]) -> None: ...
+
+    @abstractmethod
+    def top(self, board: str, count: int) -> list[Entry]: ...
+
+    @abstractmethod
+    def rank(self, board: str, user_id: int) -> Entry | None: ...
+
+    @abstractmethod
+    def around(self, board: str, user_id: int, radius: int) -> list[Entry]:
+        """
+        Return the player's entry with up to ``radius`` neighbours on each
+        side, or an empty list if the player isn't on the board.
+        """
+
+    @abstractmethod
+    def size(self, board: str) -> int: ...
+
+    @abstractmethod
+    def clear(self, board: str) -> None: ...
+
+
+class MemoryLeaderboard(BaseLeaderboard):
+    """
+    Per-process leaderboard backed by a sorted list of (-score, user id).
+    """
+
+    needs_warmup = True
+
+    def __init__(self, **options: Any) -> None:
+        self._lock = threading.Lock()
+        self._boards: dict[str, tuple[SortedList, dict[int, int]]] = {}
+
+    def _board(self, board: str) -> tuple[SortedList, dict[int, int]]:
+        if board not in self._boards:
+            self._boards[board] = (SortedList(), {})
+        return self._boards[board]
+
+    def set_score(self, board: str, user_id: int, score: int) -> None:
+        with self._lock:
+            ordered, scores = self._board(board)
+            previous = scores.pop(user_id, None)
+            if previous is not None:
+                ordered.remove((-previous, user_id))
+            if score > 0:
+                scores[user_id] = score
+                ordered.add((-score, user_id))
+
+    def remove(self, board: str, user_ids: Iterable[int]) -> None:
+        with self._lock:
+            ordered, scores = self._board(board)
+            for user_id in user_ids:
+                previous = scores.pop(user_id, None)
+                if previous is not None:
+                    ordered.remove((-previous, user_id))
+
+    def _slice(self, board: str, start: int, stop: int) -> list[Entry]:
+        ordered, _ = self._board(board)
+        return [
+            Entry(start + offset + 1, user_id, -negative)
+            for offset, (negative, user_id) in enumerate(ordered[start:stop])
+        ]
+
+    def top(self, board: str, count: int) -> list[Entry]:
+        with self._lock:
+            return self._slice(board, 0, max(count, 0))
+
+    def rank(self, board: str, user_id: int) -> Entry | None:
+        with self._lock:
+            ordered, scores = self._board(board)
+            score = scores.get(user_id)
+            if score is None:
+                return None
+            return Entry(ordered.index((-score, user_id)) + 1, user_id, score)
+
+    def around(self, board: str, user_id: int, radius: int) -> list[Entry]:
+        with self._lock:
+            ordered, scores = self._board(board)
+            score = scores.get(user_id)
+            if score is None:
+                return []
+            position = ordered.index((-score, user_id))
+            return self._slice(board, max(position - radius, 0), position + radius + 1)
+
+    def size(self, board: str) -> int:
+        return len(self._board(board)[1])
+
+    def clear(self, board: str) -> None:
+        with self._lock:
+            self._boards.pop(board, None)
+
+
+class RedisLeaderboard(BaseLeaderboard):
+    """
+    Leaderboard stored in Redis sorted sets (one key per board).
+    Requires the ``redis`` package.
+    """
+
+    def __init__(
+        self, url: str | None = None, key_prefix: str = "leaderboard:", **options: Any
+    ) -> None:
+        import redis
+
+        # redis-py types replies as possibly awaitable; this client is sync
+        self.client: Any = redis.Redis.from_url(
+            url
+            or getattr(settings, "LEADERBOARD_REDIS_URL", "redis://localhost:6379/0")
+        )
+        self.key_prefix = key_prefix
+
+    def _key(self, board: str) -> str:
+        return f"{self.key_prefix}{board}"
+
+    @staticmethod
+    def _entries(start: int, rows: list[tuple[bytes, float]]) -> list[Entry]:
+        return [
+            Entry(start + offset + 1, int(member), int(score))
+            for offset, (member, score) in enumerate(rows)
+        ]
+
+    def set_score(self, board: str, user_id: int, score: int) -> None:
+        if score > 0:
+            self.client.zadd(self._key(board), {user_id: score})
+        else:
+            self.client.zrem(self._key(board), user_id)
+
+    def set_scores(self, board: str, scores: Mapping[int, int]) -> None:
+        positive = {user_id: score for user_id, score in scores.items() if score > 0}
+        with self.client.pipeline(transaction=False) as pipe:
+            if positive:
+                pipe.zadd(self._key(board), positive)
+            removed = [user_id for user_id, score in scores.items() if score <= 0]
+            if removed:
+                pipe.zrem(self._key(board), *removed)
+            pipe.execute()
+
+    def remove(self, board: str, user_ids: Iterable[int]) -> None:
+        user_ids = list(user_ids)
+        if user_ids:
+            self.client.zrem(self._key(board), *user_ids)
+
+    def top(self, board: str, count: int) -> list[Entry]:
+        if count < 1:
+            return []
+        rows = self.client.zrevrange(self._key(board), 0, count - 1, withscores=True)
+        return self._entries(0, rows)
+
+    def rank(self, board: str, user_id: int) -> Entry | None:
+        with self.client.pipeline(transaction=False) as pipe:
+            pipe.zrevrank(self._key(board), user_id)
+            pipe.zscore(self._key(board), user_id)
+            position, score = pipe.execute()
+        if position is None:
+            return None
+        return Entry(position + 1, user_id, int(score))
+
+    def around(self, board: str, user_id: int, radius: int) -> list[Entry]:
+        position = self.client.zrevrank(self._key(board), user_id)
+        if position is None:
+            return []
+        start = max(position - radius, 0)
+        rows = self.client.zrevrange(
+            self._key(board), start, position + radius, withscores=True
+        )
+        return self._entries(start, rows)
+
+    def size(self, board: str) -> int:
+        return int(self.client.zcard(self._key(board)))
+
+    def clear(self, board: str) -> None:
+        self.client.delete(self._key(board))
+
+
+def load(backend: BaseLeaderboard, batch_size: int = 5000) -> None:
+    """
+    Fill every board of a backend from the users table.
+    """
+    from .models import User
+
+    for board, field in BOARDS.items():
+        backend.clear(board)
+        rows = (
+            User.objects.filter(**{f"{field}__gt": 0})
+            .order_by()
+            .values_list("pk", field)
+            .iterator(chunk_size=batch_size)
+        )
+        batch: dict[int, int] = {}
+        for user_id, score in rows:
+            batch[user_id] = score
+            if len(batch) >= batch_size:
+                backend.set_scores(board, batch)
+                batch = {}
+        if batch:
+            backend.set_scores(board, batch)
+
+
+_leaderboard: BaseLeaderboard | None = None
+_leaderboard_lock = threading.Lock()
+
+
+def _backend_class() -> type[BaseLeaderboard]:
+    return import_string(  # type: ignore[no-any-return]
+        getattr(settings, "LEADERBOARD_BACKEND", "users.leaderboard.MemoryLeaderboard")
+    )
+
+
+def get_leaderboard() -> BaseLeaderboard:
+    """
+    Return the process-wide leaderboard backend, loading it if needed.
+    """
+    global _leaderboard
+    if _leaderboard is None:
+        with _leaderboard_lock:
+            if _leaderboard is None:
+                backend_class = _backend_class()
+                backend = backend_class(**getattr(settings, "LEADERBOARD_OPTIONS", {}))
+                if backend.needs_warmup:
+                    load(backend)
+                _leaderboard = backend
+    return _leaderboard
+
+
+def peek_leaderboard() -> BaseLeaderboard | None:
+    """
+    Return the process-wide leaderboard backend if it has been created.
+    """
+    return _leaderboard
+
+
+def reset_leaderboard() -> None:
+    """
+    Forget the process-wide backend; it is recreated on next use.
+    """
+    global _leaderboard
+    with _leaderboard_lock:
+        _leaderboard = None
+
+
+def reload() -> BaseLeaderboard:
+    """
+    Refill the process-wide boards from the database, e.g. after streaks
+    were changed in bulk.
+    """
+    loaded = _leaderboard is None and _backend_class().needs_warmup
+    backend = get_leaderboard()
+    if not loaded:
+        load(backend)
+    return backend
+
+
+def sync_user(user_id: int) -> None:
+    """
+    Copy a player's current streaks from the database to the boards.
+    """
+    from .models import User
+
+    backend = _leaderboard
+    if backend is None:
+        if _backend_class().needs_warmup:
+            # The boards pick up the new values when they are first loaded
+            return
+        backend = get_leaderboard()
+    values = User.objects.filter(pk=user_id).values_list(*BOARDS.values()).first()
+    if values is None:
+        for board in BOARDS:
+            backend.remove(board, [user_id])
+        return
+    for board, score in zip(BOARDS, values):
+        backend.set_score(board, user_id, score)
@@ -0,0 +1,71 @@
+"""
+Recompute every user's streak state from their completed attempts.
+
+Streaks are updated incrementally as attempts finish; run this once after
+adding the streak columns, or to repair them, e.g.::
+
+    python manage.py backfill_streaks
+
+The leaderboards are reloaded afterwards.
+"""
+
+import itertools
+from operator import itemgetter
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+
+from quizzes.models import Attempt
+from users import leaderboard
+from users.models import User
+from users.streaks import compute_streaks
+
+STREAK_FIELDS = ["current_streak", "best_streak", "last_played_date"]
+
+
+class Command(BaseCommand):
+    help = "Recompute current and best streaks from completed attempts."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of users updated per query (default: 1000).",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        batch_size = max(options["batch_size"], 1)
+        completions = (
+            Attempt.objects.filter(user__isnull=False, completed_at__isnull=False)
+            .order_by("user_id", "completed_at", "id")
+            .values_list("user_id", "puzzle__puzzle_date", "solved")
+            .iterator(chunk_size=5000)
+        )
+        updated = 0
+        with transaction.atomic():
+            User.objects.update(current_streak=0, best_streak=0, last_played_date=None)
+            batch: list[User] = []
+            for user_id, rows in itertools.groupby(completions, key=itemgetter(0)):
+                current, best, last = compute_streaks(
+                    (puzzle_date, solved) for _, puzzle_date, solved in rows
+                )
+                batch.append(
+                    User(
+                        pk=user_id,
+                        current_streak=current,
+                        best_streak=best,
+                        last_played_date=last,
+                    )
+                )
+                if len(batch) >= batch_size:
+                    User.objects.bulk_update(batch, STREAK_FIELDS)
+                    updated += len(batch)
+                    batch = []
+            User.objects.bulk_update(batch, STREAK_FIELDS)
+            updated += len(batch)
+        leaderboard.reload()
+        self.stdout.write(
+            self.style.SUCCESS(f"Backfilled streaks for {updated} users.")
+        )
@@ -0,0 +1,24 @@
+"""
+Reset the streaks of players who missed a day and drop them from the
+streak leaderboard.
+
+Run it shortly after the 00:00 UTC rollover, e.g.::
+
+    5 0 * * * python manage.py expire_streaks
+"""
+
+from typing import Any
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from users import leaderboard, streaks
+
+
+class Command(BaseCommand):
+    help = "Reset lapsed streaks and remove them from the streak leaderboard."
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        user_ids = streaks.expire_lapsed(timezone.now().date())
+        leaderboard.get_leaderboard().remove(leaderboard.STREAK, user_ids)
+        self.stdout.write(self.style.SUCCESS(f"Expired {len(user_ids)} streaks."))
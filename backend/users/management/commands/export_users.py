@@ -0,0 +1,83 @@
+"""
+Write every user to a CSV or JSON Lines file, e.g.::
+
+    python manage.py export_users users.jsonl --database replica_1
+
+Users are streamed from the database in chunks, so the table is never
+loaded into memory. Password hashes are only included on request; the
+output can then be loaded with ``import_users``.
+"""
+
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import DEFAULT_DB_ALIAS
+
+from users import bulk
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Export users to a CSV or JSON Lines file."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "path", nargs="?", default="-", help="File to write (default: stdout)."
+        )
+        parser.add_argument(
+            "--format",
+            choices=bulk.FORMATS,
+            help="Output format (default: from the file extension, else csv).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Number of users fetched from the database at once (default: 2000).",
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database to read from, e.g. a replica (default: default).",
+        )
+        parser.add_argument(
+            "--include-password-hashes",
+            action="store_true",
+            help="Add a password_hash column, for moving accounts elsewhere.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be at least 1.")
+        path = options["path"]
+        fmt = bulk.detect_format(path, options["format"])
+        fields = list(bulk.EXPORT_FIELDS)
+        if options["include_password_hashes"]:
+            fields.append("password_hash")
+        records = bulk.export_records(
+            User.objects.using(options["database"]),
+            chunk_size=options["chunk_size"],
+            include_password_hashes=options["include_password_hashes"],
+        )
+
+        start = time.perf_counter()
+        if path == "-":
+            count = bulk.write_records(self.stdout, fmt, records, fields)
+        else:
+            try:
+                with open(path, "w", newline="") as stream:
+                    count = bulk.write_records(stream, fmt, records, fields)
+            except OSError as exc:
+                raise CommandError(f"Cannot write {path}: {exc}") from exc
+        elapsed = time.perf_counter() - start
+
+        # Keep the summary out of the data when writing to stdout
+        out = self.stderr if path == "-" else self.stdout
+        out.write(
+            self.style.SUCCESS(
+                f"Exported {count} users in {elapsed:.1f}s: "
+                f"{count / elapsed if elapsed else 0:,.0f} rows/s, "
+                f"peak RSS {bulk.peak_rss_mb():.0f} MiB."
+            )
+        )
@@ -0,0 +1,79 @@
+"""
+Create users in bulk from a CSV or JSON Lines file, e.g.::
+
+    python manage.py import_users users.csv --batch-size 2000
+
+Each record has ``email`` and ``username`` and optionally ``first_name``,
+``last_name``, ``is_active``, ``date_joined`` and either a raw
+``password`` or a ``password_hash`` produced by a Django hasher (as written
+by ``export_users --include-password-hashes``). Records whose email or
+username is taken are skipped; invalid records are reported and skipped.
+"""
+
+import sys
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from users import bulk
+
+# Invalid records reported individually before the rest are only counted
+MAX_REPORTED_ERRORS = 20
+
+
+class Command(BaseCommand):
+    help = "Import users from a CSV or JSON Lines file, in batches."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("path", help="File to read, or - for standard input.")
+        parser.add_argument(
+            "--format",
+            choices=bulk.FORMATS,
+            help="Input format (default: from the file extension, else csv).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of users hashed and inserted together (default: 1000).",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        path = options["path"]
+        fmt = bulk.detect_format(path, options["format"])
+        try:
+            stream = sys.stdin if path == "-" else open(path, newline="")
+        except OSError as exc:
+            raise CommandError(f"Cannot read {path}: {exc}") from exc
+
+        created = skipped = invalid = 0
+        start = time.perf_counter()
+        try:
+            records = bulk.read_records(stream, fmt)
+            for batch in bulk.chunked(records, options["batch_size"]):
+                result = bulk.import_batch(batch)
+                created += result.created
+                skipped += result.skipped
+                for line_number, message in result.errors:
+                    invalid += 1
+                    if invalid <= MAX_REPORTED_ERRORS:
+                        self.stderr.write(f"Line {line_number}: {message}")
+        except (ValueError, KeyError) as exc:
+            raise CommandError(f"Cannot parse {path}: {exc}") from exc
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        elapsed = time.perf_counter() - start
+        total = created + skipped + invalid
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {created} users ({skipped} already taken, "
+                f"{invalid} invalid) in {elapsed:.1f}s: "
+                f"{total / elapsed if elapsed else 0:,.0f} rows/s, "
+                f"peak RSS {bulk.peak_rss_mb():.0f} MiB."
+            )
+        )
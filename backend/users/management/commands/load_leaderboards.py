@@ -0,0 +1,28 @@
+"""
+Fill the streak leaderboards from the users table.
+
+Redis boards are shared and outlive deploys, so they are not loaded by the
+web processes. Run this once after switching ``LEADERBOARD_BACKEND`` to
+Redis, or whenever the boards need repairing::
+
+    python manage.py load_leaderboards
+
+``backfill_streaks`` reloads the boards itself.
+"""
+
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from users import leaderboard
+
+
+class Command(BaseCommand):
+    help = "Reload the streak leaderboards from the database."
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        backend = leaderboard.reload()
+        sizes = ", ".join(
+            f"{backend.size(board)} on {board}" for board in leaderboard.BOARDS
+        )
+        self.stdout.write(self.style.SUCCESS(f"Loaded leaderboards: {sizes}."))
@@ -0,0 +1,120 @@
+"""
+Middleware for the users app.
+"""
+
+import datetime
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.utils import timezone
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from . import devices, passwords
+
+
+class DeviceMiddleware:
+    """
+    Attach the anonymous device id from the signed cookie to
+    ``request.device_id`` (None until a view calls
+    `devices.get_device_id`). Repeat requests on the same day touch
+    neither the database nor the cookie.
+
+    Works in both sync and async stacks, so the async gameplay views are
+    not forced back onto a thread under ASGI.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(
+        self,
+        get_response: Callable[[HttpRequest], HttpResponse | Awaitable[HttpResponse]],
+    ) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: Any) -> Any:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        today = timezone.now().date()
+        seen = self.process_request(request, today)
+        if seen is not None:
+            devices.get_seen_buffer().touch(seen)
+        response: HttpResponse = self.get_response(request)  # type: ignore[assignment]
+        return self.process_response(request, response, today)
+
+    async def __acall__(self, request: Any) -> HttpResponse:
+        today = timezone.now().date()
+        seen = self.process_request(request, today)
+        if seen is not None:
+            # A touch may flush the buffer to the database
+            await sync_to_async(devices.get_seen_buffer().touch)(seen)
+        response = await self.get_response(request)  # type: ignore[misc]
+        return self.process_response(request, response, today)
+
+    def process_request(self, request: Any, today: datetime.date) -> Any:
+        """
+        Read the device cookie; return the device id to mark as seen, if any.
+        """
+        cookie = devices.read_cookie(request)
+        request.device_id = cookie.device_id if cookie else None
+        request.device_cookie_outdated = False
+        if cookie is not None and cookie.seen_on != today:
+            request.device_cookie_outdated = True
+            return cookie.device_id
+        return None
+
+    def process_response(
+        self, request: Any, response: HttpResponse, today: datetime.date
+    ) -> HttpResponse:
+        # Never attach a cookie to a response shared caches may store
+        cacheable = "public" in response.get("Cache-Control", "")
+        if request.device_cookie_outdated and not cacheable:
+            response.set_signed_cookie(
+                devices.get_cookie_name(),
+                f"{request.device_id.hex}:{today.isoformat()}",
+                salt=devices.COOKIE_SALT,
+                max_age=getattr(settings, "DEVICE_COOKIE_AGE", 60 * 60 * 24 * 365 * 2),
+                secure=settings.SESSION_COOKIE_SECURE,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+
+class HashingBusyMiddleware:
+    """
+    Answer `passwords.HashingBusy` with 503 and ``Retry-After`` outside DRF
+    (the admin login, for one), as DRF's exception handler does for API
+    views. Anything else is left to Django.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(
+        self,
+        get_response: Callable[[HttpRequest], HttpResponse | Awaitable[HttpResponse]],
+    ) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> Any:
+        # A coroutine when the stack is async; Django awaits it
+        return self.get_response(request)
+
+    def process_exception(
+        self, request: HttpRequest, exception: Exception
+    ) -> HttpResponse | None:
+        if not isinstance(exception, passwords.HashingBusy):
+            return None
+        response = JsonResponse(
+            {"detail": str(exception.detail)}, status=exception.status_code
+        )
+        response["Retry-After"] = str(exception.wait)
+        return response
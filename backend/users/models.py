@@ -1,14 +1,48 @@
+import datetime
+
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
+from django.db.models import Value
+from django.db.models.functions import Lower
+from django.db.models.lookups import Exact
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from . import passwords
+
 
-class UserManager(BaseUserManager):
+class UserQuerySet(models.QuerySet):
+    def iexact(self, **values: str) -> "UserQuerySet":
+        """
+        Filter on fields case-insensitively, e.g. ``iexact(email=email)``.
+        Unlike ``email__iexact``, this compares ``LOWER(column)``, which the
+        case-insensitive unique indexes on email and username cover.
+        """
+        return self.filter(
+            *(Exact(Lower(name), Lower(Value(value))) for name, value in values.items())
+        )
+
+    def iexact_in(self, name: str, values: list[str]) -> "UserQuerySet":
+        """
+        Filter on a field matching any of ``values``, case-insensitively.
+        """
+        return self.alias(**{f"{name}_lower": Lower(name)}).filter(
+            **{f"{name}_lower__in": [Lower(Value(value)) for value in values]}
+        )
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):  # type: ignore[misc]
     """
     Custom user manager where email is the unique identifier
     for authentication instead of username.
     """
 
+    def get_by_natural_key(self, username: str) -> "User":
+        """
+        Look the user up by email, ignoring case (used when logging in).
+        """
+        return self.iexact(**{self.model.USERNAME_FIELD: username}).get()
+
     def create_user(  # type: ignore[no-untyped-def,override]
         self, email: str, password: str | None = None, **extra_fields
     ):
@@ -64,6 +98,22 @@ class User(AbstractUser):
         },
     )
 
+    # Daily puzzle streaks, maintained by users.streaks on each completion
+    current_streak: models.PositiveIntegerField = models.PositiveIntegerField(
+        _("current streak"), default=0
+    )
+    best_streak: models.PositiveIntegerField = models.PositiveIntegerField(
+        _("best streak"), default=0
+    )
+    last_played_date: models.DateField = models.DateField(
+        _("last played date"), null=True, blank=True
+    )
+
+    # Bumped to revoke every API token issued so far (see users.tokens)
+    token_generation: models.PositiveIntegerField = models.PositiveIntegerField(
+        _("token generation"), default=0, editable=False
+    )
+
     # Placeholder fields for future implementation
     # These demonstrate structure but don't define specific requirements yet
     # TODO: Add specific user fields as needed (e.g., avatar, bio, stats, etc.)
@@ -80,10 +130,85 @@ class User(AbstractUser):
         verbose_name_plural = _("users")
         db_table = "users"
         ordering = ["-date_joined"]
+        indexes = [
+            # Keyset pagination of the users list
+            models.Index(fields=["-date_joined", "-id"], name="users_joined_id_idx"),
+        ]
+        constraints = [
+            # Emails and usernames are unique regardless of case; these also
+            # index the lookups made through UserQuerySet.iexact(). On a
+            # large table, build them with AddConstraintConcurrently (see
+            # popcornguess.operations).
+            models.UniqueConstraint(
+                Lower("email"),
+                name="users_email_lower_uniq",
+                violation_error_message=_("A user with that email already exists."),
+            ),
+            models.UniqueConstraint(
+                Lower("username"),
+                name="users_username_lower_uniq",
+                violation_error_message=_("A user with that username already exists."),
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.username} ({self.email})"
 
+    def streak_on(self, date: datetime.date) -> int:
+        """
+        Return the streak as shown on ``date``: a streak survives until the
+        day after the last puzzle played, then lapses to 0.
+        """
+        return self.shown_streak(self.current_streak, self.last_played_date, date)
+
+    @staticmethod
+    def shown_streak(
+        current_streak: int,
+        last_played_date: datetime.date | None,
+        date: datetime.date,
+    ) -> int:
+        """
+        `streak_on` for a user's column values, for rows read without
+        building a User.
+        """
+        if last_played_date is None:
+            return 0
+        if (date - last_played_date).days > 1:
+            return 0
+        return int(current_streak)
+
+    def set_password(self, raw_password: str | None) -> None:
+        """
+        Hash and set the password on the hashing pool (see users.passwords).
+        """
+        self.password = passwords.make_password(raw_password)
+        self._password = raw_password
+
+    def save(self, *args, **kwargs) -> None:  # type: ignore[no-untyped-def]
+        """
+        Save the user. Saving a new password (`set_password`, not a hash
+        upgrade) revokes every token issued under the old one.
+        """
+        from . import tokens
+
+        password_changed = self._password is not None and not self._state.adding
+        super().save(*args, **kwargs)
+        if password_changed:
+            tokens.revoke_tokens(self)
+
+    def check_password(self, raw_password: str) -> bool:
+        """
+        Check the password on the hashing pool, upgrading an outdated hash.
+        """
+
+        def setter(raw_password: str) -> None:
+            self.set_password(raw_password)
+            # Upgrading the hash is not a password change
+            self._password = None
+            self.save(update_fields=["password"])
+
+        return passwords.check_password(raw_password, self.password, setter)
+
     def get_full_name(self) -> str:
         """
         Return the first_name plus the last_name, with a space in between.
@@ -97,3 +222,38 @@ class User(AbstractUser):
         For gaming, this returns the username/gamertag.
         """
         return str(self.username)
+
+
+class AnonymousDevice(models.Model):
+    """
+    A browser or app install playing without an account, identified by a
+    signed cookie (see users.devices). Rows are only written once the device
+    has something worth storing, not on every request.
+    """
+
+    device_id: models.UUIDField = models.UUIDField(
+        _("device ID"), unique=True, editable=False
+    )
+    created_at: models.DateTimeField = models.DateTimeField(auto_now_add=True)
+    last_seen: models.DateTimeField = models.DateTimeField(
+        _("last seen"), default=timezone.now
+    )
+    user: models.ForeignKey[User | None, User | None] = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="devices",
+        verbose_name=_("merged into"),
+    )
+    merged_at: models.DateTimeField = models.DateTimeField(
+        _("merged at"), null=True, blank=True
+    )
+
+    class Meta:
+        verbose_name = _("anonymous device")
+        verbose_name_plural = _("anonymous devices")
+        db_table = "anonymous_devices"
+
+    def __str__(self) -> str:
+        return str(self.device_id)
@@ -0,0 +1,13 @@
+"""
+Pagination classes for the users API.
+"""
+
+from popcornguess.pagination import KeysetPagination
+
+
+class UserCursorPagination(KeysetPagination):
+    """
+    Newest users first, served by the (date_joined, id) index.
+    """
+
+    ordering = ("-date_joined", "-id")
@@ -0,0 +1,178 @@
+"""
+Password hashing off the request path.
+
+Hashing is deliberately slow, and a sign-up or login storm turns it into
+the busiest thing a worker does. Every hash and check made through the
+`User` model runs on a small per-process thread pool instead (the hashing
+libraries release the GIL, so the pool uses as many cores as it has
+threads):
+
+* the pool has ``PASSWORD_HASHING_WORKERS`` threads, which also caps the
+  memory Argon2 can claim at once;
+* at most ``PASSWORD_HASHING_MAX_PENDING`` hashes may be running or queued;
+  past that, requests fail fast with `HashingBusy` (503 + ``Retry-After``)
+  rather than piling up behind the pool;
+* hashes made with outdated parameters are upgraded on a successful check,
+  on the caller's thread and database connection.
+
+The functions wait for the pool on the calling thread. Every view that
+hashes (sign-up, login, tokens, password change) is a sync view, which
+under ASGI runs on a thread of its own, so the event loop is never held.
+Outside DRF views, `users.middleware.HashingBusyMiddleware` turns
+`HashingBusy` into the same 503.
+"""
+
+import os
+import threading
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, TypeVar
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+T = TypeVar("T")
+
+
+class HashingBusy(APIException):
+    """Raised when too many passwords are waiting to be hashed."""
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _("Too many sign-ins right now, please retry shortly.")
+    default_code = "hashing_busy"
+    # Sent as Retry-After by DRF's exception handler
+    wait = 1
+
+
+class HashingPool:
+    """
+    A thread pool that refuses work once ``max_pending`` jobs are running
+    or queued.
+    """
+
+    def __init__(self, *, workers: int, max_pending: int) -> None:
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="password-hashing"
+        )
+        self._slots = threading.BoundedSemaphore(max(max_pending, workers))
+
+    def submit(
+        self, func: Callable[..., T], *args: Any, block: bool = False
+    ) -> "Future[T]":
+        """
+        Schedule ``func(*args)``. Raises HashingBusy when the pool is full,
+        unless ``block`` is set (for batch jobs, which wait their turn).
+        """
+        if not self._slots.acquire(blocking=block):
+            raise HashingBusy()
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, func: Callable[..., T], *args: Any) -> T:
+        """
+        Run ``func(*args)`` on the pool and return its result, blocking the
+        calling thread until then.
+        """
+        return self.submit(func, *args).result()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+_pool: HashingPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> HashingPool:
+    """
+    Return the process-wide hashing pool, creating it on first use.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                workers = int(
+                    getattr(settings, "PASSWORD_HASHING_WORKERS", None)
+                    or os.cpu_count()
+                    or 1
+                )
+                _pool = HashingPool(
+                    workers=workers,
+                    max_pending=int(
+                        getattr(settings, "PASSWORD_HASHING_MAX_PENDING", 4 * workers)
+                    ),
+                )
+    return _pool
+
+
+def reset_pool() -> None:
+    """
+    Shut down the process-wide hashing pool; a new one is made on next use.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+
+def make_password(password: str | None) -> str:
+    """
+    Hash a password with the preferred hasher, on the hashing pool.
+    """
+    if password is None:
+        # Unusable password; nothing to hash
+        return hashers.make_password(None)
+    return get_pool().run(hashers.make_password, password)
+
+
+def make_passwords(passwords: Iterable[str | None]) -> list[str]:
+    """
+    Hash many passwords in parallel, e.g. for bulk account creation.
+    Waits for room in the pool instead of raising HashingBusy.
+    """
+    pool = get_pool()
+    futures = [
+        pool.submit(hashers.make_password, password, block=True)
+        for password in passwords
+    ]
+    return [future.result() for future in futures]
+
+
+def must_update(encoded: str) -> bool:
+    """
+    Return whether a stored hash uses another hasher or other parameters
+    than the preferred hasher's current ones.
+    """
+    preferred = hashers.get_hasher()
+    try:
+        hasher = hashers.identify_hasher(encoded)
+    except ValueError:
+        return False
+    return hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
+
+
+def check_password(
+    password: str | None,
+    encoded: str,
+    setter: Callable[[str], None] | None = None,
+) -> bool:
+    """
+    Check a password against a stored hash on the hashing pool. When it
+    matches and the hash is outdated, ``setter(password)`` is called here,
+    on the caller's thread, to store a fresh hash.
+    """
+    is_correct = get_pool().run(hashers.check_password, password, encoded)
+    if setter is not None and is_correct and must_update(encoded):
+        setter(password)  # type: ignore[arg-type]
+    return is_correct
@@ -2,18 +2,60 @@
 Serializers for the User model.
 """
 
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.db.models import QuerySet
+from django.utils import timezone
+
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
 
 from .models import User
 
 
-class UserSerializer(serializers.ModelSerializer):
+class CaseInsensitiveUniqueValidator(UniqueValidator):
+    """
+    UniqueValidator that ignores case, through UserQuerySet.iexact() and so
+    the case-insensitive unique indexes.
+    """
+
+    def filter_queryset(self, value, queryset, field_name):  # type: ignore[no-untyped-def]
+        return queryset.iexact(**{field_name: value})
+
+
+class CaseInsensitiveUniqueMixin:
+    """
+    ModelSerializer mixin: check email and username uniqueness the way the
+    database enforces it, ignoring case.
+    """
+
+    def build_standard_field(self, field_name, model_field):  # type: ignore[no-untyped-def]
+        field_class, field_kwargs = super().build_standard_field(  # type: ignore[misc]
+            field_name, model_field
+        )
+        if field_name in ("email", "username"):
+            field_kwargs["validators"] = [
+                (
+                    CaseInsensitiveUniqueValidator(
+                        queryset=validator.queryset, message=validator.message
+                    )
+                    if isinstance(validator, UniqueValidator)
+                    else validator
+                )
+                for validator in field_kwargs.get("validators", [])
+            ]
+        return field_class, field_kwargs
+
+
+class UserSerializer(CaseInsensitiveUniqueMixin, serializers.ModelSerializer):
     """
     Basic User serializer for API responses.
     This is a skeleton serializer - additional fields and validation
     will be added as needed during development.
     """
 
+    current_streak = serializers.SerializerMethodField()
+
     class Meta:
         model = User
         fields = [
@@ -25,11 +67,96 @@ class UserSerializer(serializers.ModelSerializer):
             "is_active",
             "date_joined",
             "last_login",
+            "current_streak",
+            "best_streak",
+            "last_played_date",
         ]
-        read_only_fields = ["id", "date_joined", "last_login"]
+        read_only_fields = [
+            "id",
+            "date_joined",
+            "last_login",
+            "best_streak",
+            "last_played_date",
+        ]
+
+    def get_current_streak(self, obj: User) -> int:
+        """
+        Return the streak as of today (UTC), 0 if it has lapsed.
+        """
+        return obj.streak_on(timezone.now().date())
+
+
+class UserReadSerializer(serializers.BaseSerializer):
+    """
+    Read-only `UserSerializer` for hot list endpoints: renders the same
+    representation from plain rows of `values` (no User instances) with a
+    handful of plain function calls per row, instead of one serializer field
+    object per column.
+    """
+
+    # The columns the representation is built from
+    columns = [
+        "id",
+        "email",
+        "username",
+        "first_name",
+        "last_name",
+        "is_active",
+        "date_joined",
+        "last_login",
+        "current_streak",
+        "best_streak",
+        "last_played_date",
+    ]
+    date_field = serializers.DateField()
+
+    @classmethod
+    def values(cls, queryset: QuerySet) -> QuerySet:
+        """
+        Narrow a User queryset to dict rows of the columns needed.
+        """
+        return queryset.values(*cls.columns)
+
+    def __init__(self, *args, **kwargs):  # type: ignore[no-untyped-def]
+        super().__init__(*args, **kwargs)
+        self.today = timezone.now().date()
+        # Renders datetimes as UserSerializer does; with the timezone
+        # resolved once here rather than on every call
+        self.datetime_field = serializers.DateTimeField(
+            default_timezone=(
+                timezone.get_current_timezone() if settings.USE_TZ else None
+            )
+        )
 
+    def to_representation(self, row):  # type: ignore[no-untyped-def]
+        last_login = row["last_login"]
+        last_played_date = row["last_played_date"]
+        return {
+            "id": row["id"],
+            "email": row["email"],
+            "username": row["username"],
+            "first_name": row["first_name"],
+            "last_name": row["last_name"],
+            "is_active": row["is_active"],
+            "date_joined": self.datetime_field.to_representation(row["date_joined"]),
+            "last_login": (
+                self.datetime_field.to_representation(last_login)
+                if last_login
+                else None
+            ),
+            "current_streak": User.shown_streak(
+                row["current_streak"], last_played_date, self.today
+            ),
+            "best_streak": row["best_streak"],
+            "last_played_date": (
+                self.date_field.to_representation(last_played_date)
+                if last_played_date
+                else None
+            ),
+        }
 
-class UserCreateSerializer(serializers.ModelSerializer):
+
+class UserCreateSerializer(CaseInsensitiveUniqueMixin, serializers.ModelSerializer):
     """
     Serializer for user registration/creation.
     Includes password handling and validation.
@@ -69,7 +196,7 @@ class UserCreateSerializer(serializers.ModelSerializer):
         return user
 
 
-class UserUpdateSerializer(serializers.ModelSerializer):
+class UserUpdateSerializer(CaseInsensitiveUniqueMixin, serializers.ModelSerializer):
     """
     Serializer for updating user information.
     Excludes sensitive fields like password (use separate endpoint for that).
@@ -83,6 +210,16 @@ class UserUpdateSerializer(serializers.ModelSerializer):
             "last_name",
         ]
 
+    def update(self, instance, validated_data):  # type: ignore[no-untyped-def]
+        """
+        Save only the fields sent: the instance may be the request's user,
+        whose other fields are not loaded.
+        """
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        instance.save(update_fields=list(validated_data))
+        return instance
+
 
 class PasswordChangeSerializer(serializers.Serializer):
     """
@@ -111,3 +248,36 @@ class PasswordChangeSerializer(serializers.Serializer):
         if not user.check_password(value):
             raise serializers.ValidationError("Old password is incorrect.")
         return value
+
+
+class TokenObtainSerializer(serializers.Serializer):
+    """
+    Serializer exchanging credentials for an API token pair.
+    """
+
+    email = serializers.EmailField()
+    password = serializers.CharField(write_only=True)
+
+    def validate(self, attrs):  # type: ignore[no-untyped-def,override]
+        """
+        Check the credentials and attach the user.
+        """
+        user = authenticate(
+            self.context.get("request"),
+            email=attrs["email"],
+            password=attrs["password"],
+        )
+        if user is None:
+            raise serializers.ValidationError(
+                "Unable to log in with provided credentials."
+            )
+        attrs["user"] = user
+        return attrs
+
+
+class TokenRefreshSerializer(serializers.Serializer):
+    """
+    Serializer for exchanging a refresh token for a new token pair.
+    """
+
+    refresh = serializers.CharField()
@@ -0,0 +1,21 @@
+"""
+Signal handlers keeping the authentication and response caches in sync
+with users.
+"""
+
+from typing import Any
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from popcornguess import caching
+
+from .models import User
+from .tokens import forget_user
+
+
+@receiver(post_save, sender=User, dispatch_uid="users_user_saved")
+@receiver(post_delete, sender=User, dispatch_uid="users_user_deleted")
+def user_changed(sender: type[User], instance: User, **kwargs: Any) -> None:
+    forget_user(instance.pk)
+    caching.invalidate(User, instance.pk)
@@ -0,0 +1,100 @@
+"""
+Daily puzzle streaks.
+
+Streak state lives on the user row (``current_streak``, ``best_streak``,
+``last_played_date``) so reading it is O(1). Each completion updates it with
+a single conditional UPDATE computed by the database from the row's current
+values, so concurrent completions can't lose or double count a day:
+
+* solving puzzle D right after D - 1 extends the streak, solving it after a
+  gap restarts it at 1, failing it resets it to 0;
+* completions of puzzles on or before ``last_played_date`` (archive plays,
+  retries) leave the streak alone.
+
+Stored streaks of players who stop playing are reset by `expire_lapsed()`,
+run daily by ``manage.py expire_streaks``.
+"""
+
+import datetime
+from collections.abc import Iterable
+
+from django.db.models import Case, Expression, F, Q, Value, When
+from django.db.models.functions import Greatest
+
+from popcornguess import caching
+
+from . import tokens
+from .models import User
+
+
+def record_completion(user_id: int, puzzle_date: datetime.date, solved: bool) -> bool:
+    """
+    Update a user's streak for a finished puzzle.
+    Returns whether the streak state changed.
+    """
+    streak: Expression
+    if solved:
+        streak = Case(
+            When(
+                last_played_date=puzzle_date - datetime.timedelta(days=1),
+                then=F("current_streak") + 1,
+            ),
+            default=Value(1),
+        )
+    else:
+        streak = Value(0)
+    updated = (
+        User.objects.filter(pk=user_id)
+        .filter(Q(last_played_date__isnull=True) | Q(last_played_date__lt=puzzle_date))
+        .update(
+            current_streak=streak,
+            best_streak=Greatest(F("best_streak"), streak),
+            last_played_date=puzzle_date,
+        )
+    )
+    if updated:
+        tokens.forget_user(user_id)
+        caching.invalidate(User, user_id)
+    return bool(updated)
+
+
+def compute_streaks(
+    completions: Iterable[tuple[datetime.date, bool]],
+) -> tuple[int, int, datetime.date | None]:
+    """
+    Replay (puzzle date, solved) completions in the order they were finished
+    and return (current streak, best streak, last played date), exactly as
+    `record_completion` would have left them. Used for backfills.
+    """
+    current = best = 0
+    last: datetime.date | None = None
+    for puzzle_date, solved in completions:
+        if last is not None and puzzle_date <= last:
+            continue
+        if not solved:
+            current = 0
+        elif last is not None and (puzzle_date - last).days == 1:
+            current += 1
+        else:
+            current = 1
+        best = max(best, current)
+        last = puzzle_date
+    return current, best, last
+
+
+def expire_lapsed(today: datetime.date, batch_size: int = 500) -> list[int]:
+    """
+    Reset the current streak of players who missed yesterday's puzzle and
+    return their ids.
+    """
+    cutoff = today - datetime.timedelta(days=1)
+    lapsed = User.objects.filter(current_streak__gt=0, last_played_date__lt=cutoff)
+    user_ids = list(lapsed.values_list("pk", flat=True))
+    for start in range(0, len(user_ids), batch_size):
+        # Re-check the date so a completion racing with the reset wins
+        lapsed.filter(pk__in=user_ids[start : start + batch_size]).update(
+            current_streak=0
+        )
+    tokens.forget_user(*user_ids)
+    caching.invalidate(User, *user_ids)
+    return user_ids
@@ -1,11 +1,40 @@
 """Tests for users app."""
 
+import datetime
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from io import StringIO
+
+from django.apps import apps
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.contrib.auth.hashers import check_password, is_password_usable
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
 
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+from analytics.models import PuzzleStats
+from popcornguess import routers
+from popcornguess.middleware import ReplicaRoutingMiddleware
+from popcornguess.queries import assert_query_budget
+from quizzes.attempts import complete_attempt
+from quizzes.models import Attempt, DailyPuzzle
+from users import devices, leaderboard, passwords, streaks, tokens
+from users.middleware import DeviceMiddleware
+from users.models import AnonymousDevice
 
 User = get_user_model()
 
@@ -285,7 +314,8 @@ class UserAPITestCase(APITestCase):
             "password": "newpass123",
             "password_confirm": "newpass123",
         }
-        response = self.client.post(self.list_url, data, format="json")
+        with assert_query_budget(3):
+            response = self.client.post(self.list_url, data, format="json")
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(User.objects.count(), 2)
 
@@ -293,14 +323,16 @@ class UserAPITestCase(APITestCase):
         """Test /me endpoint for authenticated user."""
         self.client.force_authenticate(user=self.user)
         url = reverse("users:user-me")
-        response = self.client.get(url)
+        with assert_query_budget(0):
+            response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["email"], "test@example.com")
 
     def test_user_me_unauthenticated(self):
         """Test /me endpoint for unauthenticated user."""
         url = reverse("users:user-me")
-        response = self.client.get(url)
+        with assert_query_budget(0):
+            response = self.client.get(url)
         self.assertIn(
             response.status_code,
             [status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN],
@@ -311,7 +343,8 @@ class UserAPITestCase(APITestCase):
         self.client.force_authenticate(user=self.user)
         url = reverse("users:user-update-profile")
         data = {"username": "updateduser", "first_name": "Updated"}
-        response = self.client.patch(url, data, format="json")
+        with assert_query_budget(2):
+            response = self.client.patch(url, data, format="json")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.user.refresh_from_db()
         self.assertEqual(self.user.username, "updateduser")
@@ -325,14 +358,17 @@ class UserAPITestCase(APITestCase):
             "new_password": "newpass456",
             "new_password_confirm": "newpass456",
         }
-        response = self.client.post(url, data, format="json")
+        # The password, then revoking the old tokens
+        with assert_query_budget(3):
+            response = self.client.post(url, data, format="json")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.user.refresh_from_db()
         self.assertTrue(self.user.check_password("newpass456"))
 
     def test_list_users_requires_auth(self):
         """Test that listing users requires authentication."""
-        response = self.client.get(self.list_url)
+        with assert_query_budget(0):
+            response = self.client.get(self.list_url)
         self.assertIn(
             response.status_code,
             [status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN],
@@ -343,7 +379,2063 @@ class UserAPITestCase(APITestCase):
         self.client.force_authenticate(user=self.user)
         url = reverse("users:user-detail", kwargs={"pk": self.user.pk})
         data = {"first_name": "PartialUpdate"}
-        response = self.client.patch(url, data, format="json")
+        with assert_query_budget(2):
+            response = self.client.patch(url, data, format="json")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.user.refresh_from_db()
         self.assertEqual(self.user.first_name, "PartialUpdate")
+
+    def test_list_users_budget(self):
+        """Test that listing users costs the same queries for any page size."""
+        for n in range(30):
+            User.objects.create_user(email=f"user{n}@example.com", username=f"user{n}")
+        self.client.force_authenticate(user=self.user)
+        with assert_query_budget(1, max_repeats=1):
+            response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data["results"])
+
+
+D1 = datetime.date(2025, 1, 1)
+D2 = datetime.date(2025, 1, 2)
+D3 = datetime.date(2025, 1, 3)
+D5 = datetime.date(2025, 1, 5)
+
+
+class StreakTestCase(TestCase):
+    """Test cases for daily puzzle streaks."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            email="test@example.com", username="testuser", password="testpass123"
+        )
+
+    def record(self, puzzle_date, solved=True):
+        """Record a completion and return the refreshed streak state."""
+        changed = streaks.record_completion(self.user.pk, puzzle_date, solved)
+        self.user.refresh_from_db()
+        return changed, (self.user.current_streak, self.user.best_streak)
+
+    def test_consecutive_days_extend_streak(self):
+        """Test that solving consecutive puzzles extends the streak."""
+        self.assertEqual(self.record(D1), (True, (1, 1)))
+        self.assertEqual(self.record(D2), (True, (2, 2)))
+        self.assertEqual(self.record(D3), (True, (3, 3)))
+        self.assertEqual(self.user.last_played_date, D3)
+
+    def test_gap_and_failure_restart_streak(self):
+        """Test that a gap restarts the streak and a failure resets it."""
+        self.record(D1)
+        self.record(D2)
+        self.assertEqual(self.record(D5), (True, (1, 2)))
+        self.assertEqual(self.record(D5 + datetime.timedelta(days=1), False)[1], (0, 2))
+
+    def test_past_puzzles_leave_streak_alone(self):
+        """Test that replaying or archive plays don't change the streak."""
+        self.record(D2)
+        self.assertEqual(self.record(D2), (False, (1, 1)))
+        self.assertEqual(self.record(D1), (False, (1, 1)))
+
+    def test_update_is_single_query(self):
+        """Test that a completion updates the streak in one statement."""
+        with self.assertNumQueries(1):
+            streaks.record_completion(self.user.pk, D1, True)
+
+    def test_streak_lapses_on_read(self):
+        """Test that a streak shows as 0 once a day has been missed."""
+        self.record(D1)
+        self.record(D2)
+        self.assertEqual(self.user.streak_on(D2), 2)
+        self.assertEqual(self.user.streak_on(D3), 2)
+        self.assertEqual(self.user.streak_on(D5), 0)
+        self.assertEqual(User().streak_on(D1), 0)
+
+    def test_compute_streaks_matches_incremental_updates(self):
+        """Test that replaying completions gives the incremental result."""
+        completions = [(D1, True), (D2, True), (D1, True), (D3, False), (D5, True)]
+        for puzzle_date, solved in completions:
+            self.record(puzzle_date, solved)
+        self.assertEqual(
+            streaks.compute_streaks(completions),
+            (self.user.current_streak, self.user.best_streak, D5),
+        )
+
+    def test_backfill_command(self):
+        """Test that the backfill recomputes streaks from attempts."""
+        for puzzle_date, solved in ((D1, True), (D2, True), (D3, True)):
+            puzzle = DailyPuzzle.objects.create(
+                puzzle_date=puzzle_date,
+                category=DailyPuzzle.Category.MOVIE,
+                clues=["Clue"],
+                answer="Answer",
+            )
+            Attempt.objects.create(
+                puzzle=puzzle,
+                user=self.user,
+                guess_count=2,
+                solved=solved,
+                completed_at=timezone.now(),
+            )
+        other = User.objects.create_user(
+            email="other@example.com",
+            username="other",
+            password="testpass123",
+        )
+        User.objects.filter(pk=other.pk).update(current_streak=7, best_streak=7)
+
+        out = StringIO()
+        call_command("backfill_streaks", batch_size=1, stdout=out)
+        self.assertIn("1 users", out.getvalue())
+        self.user.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.user.current_streak, self.user.best_streak), (3, 3))
+        self.assertEqual(self.user.last_played_date, D3)
+        self.assertEqual((other.current_streak, other.best_streak), (0, 0))
+
+    def test_serializer_exposes_streak(self):
+        """Test that the profile includes the streak as of today."""
+        from users.serializers import UserSerializer
+
+        today = timezone.now().date()
+        streaks.record_completion(self.user.pk, today, True)
+        self.user.refresh_from_db()
+        data = UserSerializer(instance=self.user).data
+        self.assertEqual(data["current_streak"], 1)
+        self.assertEqual(data["best_streak"], 1)
+
+
+class StreakConcurrencyTestCase(TransactionTestCase):
+    """Test streak updates from concurrent completions."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            email="test@example.com", username="testuser", password="testpass123"
+        )
+        User.objects.filter(pk=self.user.pk).update(
+            current_streak=3, best_streak=3, last_played_date=D1
+        )
+        self.puzzle = DailyPuzzle.objects.create(
+            puzzle_date=D2,
+            category=DailyPuzzle.Category.MOVIE,
+            clues=["Clue"],
+            answer="Answer",
+        )
+
+    def run_concurrently(self, target, count=2):
+        """Run ``target`` in ``count`` threads released at the same time."""
+        barrier = threading.Barrier(count)
+        results = []
+        errors = []
+
+        def worker():
+            try:
+                barrier.wait()
+                while True:
+                    try:
+                        results.append(target())
+                        break
+                    except OperationalError as exc:
+                        # SQLite's shared in-memory cache reports a lock
+                        # conflict instead of waiting for it like PostgreSQL
+                        if "locked" not in str(exc):
+                            raise
+                        time.sleep(0.001)
+            except Exception as exc:  # pragma: no cover - reported below
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        return results
+
+    def test_simultaneous_completions_count_once(self):
+        """Test that two completions of the same puzzle extend the streak once."""
+        results = self.run_concurrently(
+            lambda: streaks.record_completion(self.user.pk, D2, True)
+        )
+        self.assertEqual(sorted(results), [False, True])
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.current_streak, self.user.best_streak), (4, 4))
+
+    def test_simultaneous_attempt_completions(self):
+        """Test that completing one attempt twice at once counts it once."""
+        attempt = Attempt.objects.create(
+            puzzle=self.puzzle, user=self.user, guess_count=3
+        )
+
+        def complete():
+            return complete_attempt(
+                Attempt.objects.select_related("puzzle").get(pk=attempt.pk),
+                solved=True,
+            )
+
+        self.assertEqual(sorted(self.run_concurrently(complete)), [False, True])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.current_streak, 4)
+        self.assertEqual(PuzzleStats.objects.get(puzzle_date=D2).players, 1)
+
+
+class MemoryLeaderboardTestCase(TestCase):
+    """Test cases for the in-memory leaderboard backend."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.board = leaderboard.MemoryLeaderboard()
+        self.board.set_scores("b", {1: 5, 2: 9, 3: 7, 4: 1, 5: 7})
+
+    def test_top(self):
+        """Test that the top entries are ordered by score, ties by id."""
+        self.assertEqual(
+            self.board.top("b", 3),
+            [
+                leaderboard.Entry(1, 2, 9),
+                leaderboard.Entry(2, 3, 7),
+                leaderboard.Entry(3, 5, 7),
+            ],
+        )
+        self.assertEqual(self.board.top("b", 0), [])
+        self.assertEqual(self.board.top("other", 5), [])
+
+    def test_rank_and_around(self):
+        """Test rank lookups and neighbourhoods."""
+        self.assertEqual(self.board.rank("b", 1), leaderboard.Entry(4, 1, 5))
+        self.assertIsNone(self.board.rank("b", 99))
+        self.assertEqual([e.user_id for e in self.board.around("b", 1, 1)], [5, 1, 4])
+        self.assertEqual([e.user_id for e in self.board.around("b", 2, 1)], [2, 3])
+        self.assertEqual(self.board.around("b", 99, 1), [])
+
+    def test_updates_and_removal(self):
+        """Test that score changes move players and zero scores drop them."""
+        self.board.set_score("b", 4, 10)
+        self.assertEqual(self.board.rank("b", 4).rank, 1)
+        self.board.set_score("b", 2, 0)
+        self.board.remove("b", [3, 99])
+        self.assertEqual(self.board.size("b"), 3)
+        self.assertEqual([e.user_id for e in self.board.top("b", 10)], [4, 5, 1])
+        self.board.clear("b")
+        self.assertEqual(self.board.size("b"), 0)
+
+
+class LeaderboardSyncTestCase(TestCase):
+    """Test cases for keeping leaderboards in sync with streaks."""
+
+    def setUp(self):
+        """Set up test data."""
+        leaderboard.reset_leaderboard()
+        self.addCleanup(leaderboard.reset_leaderboard)
+        self.user = User.objects.create_user(
+            email="test@example.com", username="testuser", password="testpass123"
+        )
+        User.objects.filter(pk=self.user.pk).update(
+            current_streak=2, best_streak=5, last_played_date=D1
+        )
+        self.puzzle = DailyPuzzle.objects.create(
+            puzzle_date=D2,
+            category=DailyPuzzle.Category.MOVIE,
+            clues=["Clue"],
+            answer="Answer",
+        )
+
+    def test_boards_load_from_database(self):
+        """Test that the in-memory boards are loaded on first use."""
+        backend = leaderboard.get_leaderboard()
+        self.assertIsInstance(backend, leaderboard.MemoryLeaderboard)
+        self.assertEqual(backend.rank(leaderboard.STREAK, self.user.pk).score, 2)
+        self.assertEqual(backend.rank(leaderboard.BEST_STREAK, self.user.pk).score, 5)
+
+    def test_completion_updates_boards(self):
+        """Test that a completion moves the player on the boards."""
+        backend = leaderboard.get_leaderboard()
+        attempt = Attempt.objects.create(
+            puzzle=self.puzzle, user=self.user, guess_count=1
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            complete_attempt(attempt, solved=True)
+        self.assertEqual(backend.rank(leaderboard.STREAK, self.user.pk).score, 3)
+
+    def test_failure_drops_player_from_streak_board(self):
+        """Test that a failed puzzle removes the player from the streak board."""
+        backend = leaderboard.get_leaderboard()
+        attempt = Attempt.objects.create(
+            puzzle=self.puzzle, user=self.user, guess_count=6
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            complete_attempt(attempt, solved=False)
+        self.assertIsNone(backend.rank(leaderboard.STREAK, self.user.pk))
+        self.assertEqual(backend.rank(leaderboard.BEST_STREAK, self.user.pk).score, 5)
+
+    def test_sync_skips_unloaded_memory_board(self):
+        """Test that syncing doesn't build the in-memory boards."""
+        leaderboard.sync_user(self.user.pk)
+        self.assertIsNone(leaderboard.peek_leaderboard())
+
+    def test_sync_deleted_user(self):
+        """Test that a deleted user is removed from the boards."""
+        backend = leaderboard.get_leaderboard()
+        user_id = self.user.pk
+        self.user.delete()
+        leaderboard.sync_user(user_id)
+        self.assertEqual(backend.size(leaderboard.BEST_STREAK), 0)
+
+    def test_expire_streaks_command(self):
+        """Test that lapsed streaks are reset and dropped from the board."""
+        backend = leaderboard.get_leaderboard()
+        out = StringIO()
+        call_command("expire_streaks", stdout=out)
+        self.assertIn("Expired 1 streaks", out.getvalue())
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.current_streak, self.user.best_streak), (0, 5))
+        self.assertIsNone(backend.rank(leaderboard.STREAK, self.user.pk))
+
+    def test_load_leaderboards_command(self):
+        """Test that the boards are refilled from the database."""
+        backend = leaderboard.get_leaderboard()
+        backend.clear(leaderboard.STREAK)
+        out = StringIO()
+        call_command("load_leaderboards", stdout=out)
+        self.assertIn("1 on streak, 1 on best_streak", out.getvalue())
+        self.assertIs(leaderboard.get_leaderboard(), backend)
+        self.assertEqual(backend.rank(leaderboard.STREAK, self.user.pk).score, 2)
+
+    def test_backfill_reloads_boards(self):
+        """Test that backfilling streaks refreshes the boards."""
+        backend = leaderboard.get_leaderboard()
+        call_command("backfill_streaks", stdout=StringIO())
+        # The user has no completed attempts
+        self.assertIsNone(backend.rank(leaderboard.STREAK, self.user.pk))
+        self.assertEqual(backend.size(leaderboard.BEST_STREAK), 0)
+
+
+class LeaderboardAPITestCase(APITestCase):
+    """Test cases for the leaderboard endpoints."""
+
+    def setUp(self):
+        """Set up test data."""
+        leaderboard.reset_leaderboard()
+        self.addCleanup(leaderboard.reset_leaderboard)
+        self.users = []
+        for i, streak in enumerate((4, 8, 6)):
+            user = User.objects.create_user(
+                email=f"p{i}@example.com", username=f"p{i}", password="testpass123"
+            )
+            User.objects.filter(pk=user.pk).update(
+                current_streak=streak, best_streak=streak
+            )
+            self.users.append(user)
+
+    def test_top(self):
+        """Test listing the top of a board."""
+        url = reverse("users:leaderboard", args=["streak"])
+        response = self.client.get(url, {"limit": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [
+                (row["rank"], row["username"], row["score"])
+                for row in response.data["results"]
+            ],
+            [(1, "p1", 8), (2, "p2", 6)],
+        )
+
+    def test_unknown_board_and_bad_limit(self):
+        """Test validation of the board and the limit."""
+        response = self.client.get(reverse("users:leaderboard", args=["nope"]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(
+            reverse("users:leaderboard", args=["streak"]), {"limit": "x"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_my_rank(self):
+        """Test the current user's rank and neighbours."""
+        url = reverse("users:leaderboard-rank", args=["best_streak"])
+        self.assertIn(
+            self.client.get(url).status_code,
+            [status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN],
+        )
+        self.client.force_authenticate(user=self.users[2])
+        response = self.client.get(url, {"radius": 1})
+        self.assertEqual(response.data["rank"]["rank"], 2)
+        self.assertEqual(
+            [row["username"] for row in response.data["neighbours"]],
+            ["p1", "p2", "p0"],
+        )
+
+
+class UserPaginationTestCase(APITestCase):
+    """Test cases for keyset pagination of the users list."""
+
+    def setUp(self):
+        """Set up test data."""
+        joined = timezone.now()
+        self.users = []
+        for i in range(25):
+            user = User.objects.create_user(
+                email=f"p{i}@example.com", username=f"p{i}", password="testpass123"
+            )
+            # Groups of five share a join time to exercise the id tie-break
+            User.objects.filter(pk=user.pk).update(
+                date_joined=joined + datetime.timedelta(seconds=i // 5)
+            )
+            self.users.append(user)
+        self.expected = list(
+            User.objects.order_by("-date_joined", "-id").values_list("id", flat=True)
+        )
+        self.client.force_authenticate(user=self.users[0])
+        self.url = reverse("users:user-list")
+
+    def walk(self, url, direction):
+        """Follow ``direction`` links from ``url``, returning each page's ids."""
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append([row["id"] for row in response.data["results"]])
+            url = response.data[direction]
+        return pages, response
+
+    def test_walk_forward(self):
+        """Test that following next links visits every user once, in order."""
+        pages, last = self.walk(f"{self.url}?page_size=7", "next")
+        self.assertEqual([len(page) for page in pages], [7, 7, 7, 4])
+        self.assertEqual(sum(pages, []), self.expected)
+        self.assertNotIn("count", last.data)
+
+    def test_walk_backward(self):
+        """Test that previous links lead back through the same pages."""
+        forward, last = self.walk(f"{self.url}?page_size=7", "next")
+        backward, first = self.walk(last.data["previous"], "previous")
+        self.assertEqual(backward, forward[-2::-1])
+        self.assertIsNotNone(first.data["next"])
+        self.assertIsNone(first.data["previous"])
+
+    def test_page_is_single_query(self):
+        """Test that a deep page costs one query and no COUNT(*)."""
+        response = self.client.get(self.url, {"page_size": 10})
+        with self.assertNumQueries(1):
+            response = self.client.get(response.data["next"])
+        self.assertEqual(
+            [row["id"] for row in response.data["results"]], self.expected[10:20]
+        )
+
+    def test_invalid_cursor(self):
+        """Test that a malformed cursor is rejected."""
+        for cursor in ("nope", "WzEsIFsieCJdXQ"):
+            response = self.client.get(self.url, {"cursor": cursor})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TokenAuthenticationTestCase(APITestCase):
+    """Test cases for signed-token authentication."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="test@example.com", username="testuser", password="testpass123"
+        )
+        self.me_url = reverse("users:user-me")
+
+    def obtain(self):
+        """Log in with credentials and return the token pair."""
+        response = self.client.post(
+            reverse("users:token-obtain"),
+            {"email": "test@example.com", "password": "testpass123"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def me(self, access):
+        """Fetch the profile with a bearer token."""
+        return self.client.get(self.me_url, HTTP_AUTHORIZATION=f"Bearer {access}")
+
+    def test_obtain_and_use_token(self):
+        """Test that an access token authenticates API requests."""
+        pair = self.obtain()
+        self.assertEqual(pair["expires_in"], 15 * 60)
+        response = self.me(pair["access"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["email"], "test@example.com")
+
+    def test_wrong_credentials(self):
+        """Test that wrong credentials don't get tokens."""
+        response = self.client.post(
+            reverse("users:token-obtain"),
+            {"email": "test@example.com", "password": "wrong"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_queries_per_request(self):
+        """Test that token auth skips the session and user queries."""
+        self.client.login(email="test@example.com", password="testpass123")
+        # Session authentication: django_session, then users
+        with self.assertNumQueries(2):
+            self.client.get(self.me_url)
+        self.client.logout()
+
+        access = self.obtain()["access"]
+        self.me(access)
+        # Warm token authentication: claims + cache, no database access
+        with self.assertNumQueries(0):
+            response = self.me(access)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_invalid_tokens(self):
+        """Test that tampered, wrong-kind and malformed tokens are rejected."""
+        pair = self.obtain()
+        for header in (
+            f"Bearer {pair['access']}x",
+            f"Bearer {pair['refresh']}",
+            "Bearer",
+            "Bearer a b",
+        ):
+            response = self.client.get(self.me_url, HTTP_AUTHORIZATION=header)
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+            self.assertEqual(response["WWW-Authenticate"], "Bearer")
+
+    @override_settings(ACCESS_TOKEN_LIFETIME=-1)
+    def test_expired_token(self):
+        """Test that expired access tokens are rejected."""
+        response = self.me(self.obtain()["access"])
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn("expired", str(response.data["detail"]))
+
+    def test_revoke(self):
+        """Test that revoking invalidates all earlier tokens."""
+        pair = self.obtain()
+        self.me(pair["access"])
+        response = self.client.post(
+            reverse("users:token-revoke"), HTTP_AUTHORIZATION=f"Bearer {pair['access']}"
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(
+            self.me(pair["access"]).status_code, status.HTTP_401_UNAUTHORIZED
+        )
+        response = self.client.post(
+            reverse("users:token-refresh"), {"refresh": pair["refresh"]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.me(self.obtain()["access"]).status_code, 200)
+
+    def test_password_change_revokes(self):
+        """Test that a new password invalidates tokens issued before it."""
+        pair = self.obtain()
+        response = self.client.post(
+            reverse("users:user-change-password"),
+            {
+                "old_password": "testpass123",
+                "new_password": "newpass456",
+                "new_password_confirm": "newpass456",
+            },
+            format="json",
+            HTTP_AUTHORIZATION=f"Bearer {pair['access']}",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.me(response.data["access"]).status_code, 200)
+        self.assertEqual(
+            self.me(pair["access"]).status_code, status.HTTP_401_UNAUTHORIZED
+        )
+        response = self.client.post(
+            reverse("users:token-refresh"), {"refresh": pair["refresh"]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        # Outside the API too, e.g. the admin
+        user = User.objects.get(pk=self.user.pk)
+        generation = user.token_generation
+        user.set_password("newpass789")
+        user.save()
+        self.assertEqual(user.token_generation, generation + 1)
+
+    def test_refresh(self):
+        """Test exchanging a refresh token for a new pair."""
+        pair = self.obtain()
+        response = self.client.post(
+            reverse("users:token-refresh"), {"refresh": pair["refresh"]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.me(response.data["access"]).status_code, 200)
+        response = self.client.post(
+            reverse("users:token-refresh"), {"refresh": pair["access"]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_inactive_and_deleted_users(self):
+        """Test that tokens stop working when the user is deactivated or deleted."""
+        access = self.obtain()["access"]
+        self.me(access)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.me(access).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.user.delete()
+        self.assertEqual(self.me(access).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_profile_update_refreshes_cache(self):
+        """Test that a saved profile isn't served stale from the cache."""
+        access = self.obtain()["access"]
+        self.me(access)
+        self.client.patch(
+            reverse("users:user-update-profile"),
+            {"first_name": "Renamed"},
+            format="json",
+            HTTP_AUTHORIZATION=f"Bearer {access}",
+        )
+        self.assertEqual(self.me(access).data["first_name"], "Renamed")
+
+    def test_password_hash_not_cached(self):
+        """Test that only the authentication fields are cached."""
+        access = self.obtain()["access"]
+        self.me(access)
+        cached = cache.get(tokens.cache_key(self.user.pk))
+        self.assertEqual(cached["email"], "test@example.com")
+        self.assertNotIn("password", cached)
+        self.assertNotIn(self.user.password, cached.values())
+
+    def test_writes_keep_unsaved_changes(self):
+        """Test that a cached user never writes back stale streaks."""
+        access = self.obtain()["access"]
+        self.me(access)
+        streaks.record_completion(self.user.pk, D1, solved=True)
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {access}"}
+        response = self.client.patch(
+            reverse("users:user-update-profile"),
+            {"first_name": "Renamed"},
+            format="json",
+            **headers,
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.post(
+            reverse("users:user-change-password"),
+            {
+                "old_password": "testpass123",
+                "new_password": "newpass12345",
+                "new_password_confirm": "newpass12345",
+            },
+            format="json",
+            **headers,
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(
+            (self.user.current_streak, self.user.last_played_date), (1, D1)
+        )
+        self.assertEqual(self.user.first_name, "Renamed")
+        self.assertTrue(self.user.check_password("newpass12345"))
+
+
+def device_cookie(device_id, seen_on):
+    """Return a signed device cookie value as DeviceMiddleware sets it."""
+    from django.core.signing import get_cookie_signer
+
+    signer = get_cookie_signer(salt=devices.get_cookie_name() + devices.COOKIE_SALT)
+    return signer.sign(f"{device_id.hex}:{seen_on.isoformat()}")
+
+
+class DeviceMiddlewareTestCase(TestCase):
+    """Test cases for anonymous device identification."""
+
+    def setUp(self):
+        """Set up test data."""
+        devices.reset_seen_buffer()
+        self.addCleanup(devices.reset_seen_buffer)
+        self.factory = RequestFactory()
+        self.today = timezone.now().date()
+        self.device_id = uuid.uuid4()
+
+    def run_middleware(self, cookie=None, view=None, cache_control=None):
+        """Pass a request through DeviceMiddleware and return (request, response)."""
+        request = self.factory.get("/")
+        if cookie is not None:
+            request.COOKIES[devices.get_cookie_name()] = cookie
+
+        def get_response(request):
+            if view is not None:
+                view(request)
+            response = HttpResponse()
+            if cache_control:
+                response["Cache-Control"] = cache_control
+            return response
+
+        response = DeviceMiddleware(get_response)(request)
+        return request, response
+
+    def test_repeat_reads_make_no_writes(self):
+        """Test that a known device seen today costs no query and no cookie."""
+        cookie = device_cookie(self.device_id, self.today)
+        with self.assertNumQueries(0):
+            request, response = self.run_middleware(cookie, view=devices.get_device_id)
+        self.assertEqual(request.device_id, self.device_id)
+        self.assertNotIn(devices.get_cookie_name(), response.cookies)
+        self.assertEqual(len(devices.get_seen_buffer()), 0)
+
+    def test_new_device_gets_cookie_without_write(self):
+        """Test that a device id is issued lazily and without a query."""
+        with self.assertNumQueries(0):
+            request, response = self.run_middleware()
+        self.assertIsNone(request.device_id)
+        self.assertNotIn(devices.get_cookie_name(), response.cookies)
+
+        with self.assertNumQueries(0):
+            request, response = self.run_middleware(view=devices.get_device_id)
+        cookie = response.cookies[devices.get_cookie_name()].value
+        request, _ = self.run_middleware(cookie)
+        self.assertIsNotNone(request.device_id)
+        self.assertEqual(request.device_id, devices.get_device_id(request))
+
+    def test_new_day_touches_last_seen(self):
+        """Test that the first request of a day is batched and refreshes the cookie."""
+        yesterday = self.today - datetime.timedelta(days=1)
+        _, response = self.run_middleware(
+            device_cookie(self.device_id, yesterday), cache_control="public, max-age=60"
+        )
+        self.assertNotIn(devices.get_cookie_name(), response.cookies)
+        _, response = self.run_middleware(device_cookie(self.device_id, yesterday))
+        self.assertIn(devices.get_cookie_name(), response.cookies)
+        self.assertEqual(len(devices.get_seen_buffer()), 1)
+
+    def test_tampered_cookie_is_ignored(self):
+        """Test that a forged or malformed cookie isn't trusted."""
+        cookie = device_cookie(self.device_id, self.today)
+        request, _ = self.run_middleware(cookie[:-1] + "x")
+        self.assertIsNone(request.device_id)
+        from django.core.signing import get_cookie_signer
+
+        signer = get_cookie_signer(salt=devices.get_cookie_name() + devices.COOKIE_SALT)
+        request, _ = self.run_middleware(signer.sign("garbage"))
+        self.assertIsNone(request.device_id)
+
+    def test_get_device_creates_row_once(self):
+        """Test that the device row is written on first use only."""
+        request, _ = self.run_middleware(device_cookie(self.device_id, self.today))
+        with self.assertNumQueries(4):
+            # get_or_create: SELECT, then INSERT wrapped in a savepoint
+            device = devices.get_device(request)
+        self.assertEqual(device.device_id, self.device_id)
+        with self.assertNumQueries(0):
+            devices.get_device(request)
+
+    async def test_async_stack(self):
+        """Test that the middleware stays async in front of an async view."""
+        from asgiref.sync import iscoroutinefunction
+
+        async def get_response(request):
+            devices.get_device_id(request)
+            return HttpResponse()
+
+        middleware = DeviceMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        yesterday = self.today - datetime.timedelta(days=1)
+        request = self.factory.get("/")
+        request.COOKIES[devices.get_cookie_name()] = device_cookie(
+            self.device_id, yesterday
+        )
+        response = await middleware(request)
+        self.assertEqual(request.device_id, self.device_id)
+        self.assertIn(devices.get_cookie_name(), response.cookies)
+        self.assertEqual(len(devices.get_seen_buffer()), 1)
+
+
+class LastSeenBufferTestCase(TestCase):
+    """Test cases for batched last_seen updates."""
+
+    def test_flush_on_interval(self):
+        """Test that devices seen within an interval are stamped together."""
+        clock = FakeClock()
+        buffer = devices.LastSeenBuffer(flush_interval=60, clock=clock)
+        seen = [
+            AnonymousDevice.objects.create(
+                device_id=uuid.uuid4(),
+                last_seen=timezone.now() - datetime.timedelta(days=3),
+            )
+            for _ in range(3)
+        ]
+        with self.assertNumQueries(0):
+            for device in seen:
+                buffer.touch(device.device_id)
+        self.assertEqual(len(buffer), 3)
+        clock.now = 61
+        with self.assertNumQueries(1):
+            buffer.touch(uuid.uuid4())
+        self.assertEqual(len(buffer), 0)
+        for device in seen:
+            device.refresh_from_db()
+            self.assertEqual(device.last_seen.date(), timezone.now().date())
+        self.assertEqual(buffer.flush(), 0)
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class DeviceMergeTestCase(APITestCase):
+    """Test cases for merging anonymous history into an account."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.device = AnonymousDevice.objects.create(device_id=uuid.uuid4())
+        self.puzzles = []
+        for day in (D1, D2, D3):
+            puzzle = DailyPuzzle.objects.create(
+                puzzle_date=day,
+                category=DailyPuzzle.Category.MOVIE,
+                clues=["Clue"],
+                answer="Answer",
+            )
+            Attempt.objects.create(
+                puzzle=puzzle,
+                device=self.device,
+                guess_count=2,
+                solved=True,
+                completed_at=timezone.now(),
+            )
+            self.puzzles.append(puzzle)
+
+    def test_sign_up_merges_device(self):
+        """Test that registering moves the device's attempts and streak."""
+        self.client.cookies[devices.get_cookie_name()] = device_cookie(
+            self.device.device_id, timezone.now().date()
+        )
+        response = self.client.post(
+            reverse("users:user-list"),
+            {
+                "email": "new@example.com",
+                "username": "newplayer",
+                "password": "newpass123",
+                "password_confirm": "newpass123",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        user = User.objects.get(email="new@example.com")
+        self.assertEqual(Attempt.objects.filter(user=user).count(), 3)
+        self.assertEqual((user.current_streak, user.best_streak), (3, 3))
+        self.device.refresh_from_db()
+        self.assertEqual(self.device.user, user)
+        self.assertIsNotNone(self.device.merged_at)
+
+    def test_merge_skips_puzzles_already_played(self):
+        """Test that attempts conflicting with the account stay with the device."""
+        user = User.objects.create_user(
+            email="test@example.com", username="testuser", password="testpass123"
+        )
+        Attempt.objects.create(puzzle=self.puzzles[0], user=user)
+        with self.assertNumQueries(7):
+            # Lock device, bulk UPDATE attempts, save device, replay, streak,
+            # inside a savepoint under TestCase
+            moved = devices.merge_into(self.device.device_id, user)
+        self.assertEqual(moved, 2)
+        self.assertEqual(self.device.attempts.count(), 1)
+        self.assertEqual(devices.merge_into(self.device.device_id, user), 0)
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRoutingTestCase(APITransactionTestCase):
+    """
+    Test cases for primary/replica routing. ``default`` and ``replica`` are
+    two separate SQLite databases, so each test can see which one answered.
+    """
+
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        """Set up a user on the primary and a different one on the replica."""
+        self.user = User.objects.create_user(
+            email="primary@example.com", username="primary", password="testpass123"
+        )
+        User.objects.db_manager("replica").create_user(
+            email="replica@example.com", username="replica", password="testpass123"
+        )
+        self.list_url = reverse("users:user-list")
+
+    def usernames(self, response):
+        """Return the usernames of a users list response."""
+        return [item["username"] for item in response.json()["results"]]
+
+    def test_opted_in_reads_use_replica(self):
+        """Test that safe requests to opted-in views read from the replica."""
+        self.client.force_authenticate(self.user)
+        response = self.client.get(self.list_url)
+        self.assertEqual(self.usernames(response), ["replica"])
+        self.assertNotIn(routers.STICKY_COOKIE_NAME, response.cookies)
+
+        PuzzleStats.objects.using("replica").create(
+            puzzle_date=datetime.date(2025, 1, 1), players=3, solves=2
+        )
+        response = self.client.get(
+            reverse("analytics:puzzle-stats", args=[datetime.date(2025, 1, 1)])
+        )
+        self.assertEqual(response.json()["players"], 3)
+
+    def test_write_pins_client_to_primary(self):
+        """Test that a client reads its own writes after writing."""
+        response = self.client.post(
+            self.list_url,
+            {
+                "email": "new@example.com",
+                "username": "newplayer",
+                "password": "Sup3r-secret!",
+                "password_confirm": "Sup3r-secret!",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        cookie = response.cookies[routers.STICKY_COOKIE_NAME]
+        self.assertEqual(cookie["max-age"], 5)
+
+        self.client.force_authenticate(self.user)
+        response = self.client.get(self.list_url)
+        self.assertEqual(self.usernames(response), ["newplayer", "primary"])
+
+    def test_other_reads_use_primary(self):
+        """Test that views and code outside requests that didn't opt in read the primary."""
+        router = routers.PrimaryReplicaRouter()
+        self.assertIsNone(router.db_for_read(User))
+        self.assertEqual(router.db_for_write(User), "default")
+
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse("users:user-me"))
+        self.assertEqual(response.json()["username"], "primary")
+
+    async def test_async_stack(self):
+        """Test that routing state is tracked through the async middleware path."""
+        from asgiref.sync import iscoroutinefunction
+
+        seen = []
+
+        async def get_response(request):
+            routers.allow_replica_reads()
+            seen.append(routers.PrimaryReplicaRouter().db_for_read(User))
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        await middleware(RequestFactory().get("/"))
+        self.assertEqual(seen, ["replica"])
+
+
+class PasswordHashingTestCase(APITestCase):
+    """Test cases for pooled password hashing and rehash-on-login."""
+
+    def setUp(self):
+        """Set up a user with a cheap PBKDF2 hash."""
+        passwords.reset_pool()
+        self.addCleanup(passwords.reset_pool)
+        with self.settings(
+            PASSWORD_HASHERS=["users.hashers.PBKDF2PasswordHasher"],
+            PASSWORD_PBKDF2_ITERATIONS=1000,
+        ):
+            self.user = User.objects.create_user(
+                email="test@example.com", username="testuser", password="testpass123"
+            )
+
+    def login(self, password="testpass123"):
+        """Request a token pair and return the response."""
+        return self.client.post(
+            reverse("users:token-obtain"),
+            {"email": "test@example.com", "password": password},
+            format="json",
+        )
+
+    def test_cost_read_from_settings(self):
+        """Test that the work factor comes from settings."""
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$1000$"))
+
+    @override_settings(
+        PASSWORD_HASHERS=["users.hashers.PBKDF2PasswordHasher"],
+        PASSWORD_PBKDF2_ITERATIONS=2000,
+    )
+    def test_rehash_on_login_when_cost_changes(self):
+        """Test that logging in upgrades a hash made with an older cost."""
+        self.assertEqual(self.login("wrong").status_code, status.HTTP_400_BAD_REQUEST)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$1000$"))
+
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$2000$"))
+        self.assertTrue(self.user.check_password("testpass123"))
+        # An upgrade isn't a password change, so tokens stay valid
+        self.assertEqual(self.user.token_generation, 0)
+
+    @override_settings(
+        PASSWORD_HASHERS=[
+            "django.contrib.auth.hashers.MD5PasswordHasher",
+            "users.hashers.PBKDF2PasswordHasher",
+        ]
+    )
+    def test_rehash_on_login_when_hasher_changes(self):
+        """Test that logging in moves a hash to the preferred hasher."""
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("md5$"))
+
+    def test_bulk_hashing(self):
+        """Test that many passwords are hashed in parallel, in order."""
+        hashes = passwords.make_passwords(["one", "two", None])
+        self.assertTrue(check_password("one", hashes[0]))
+        self.assertTrue(check_password("two", hashes[1]))
+        self.assertFalse(is_password_usable(hashes[2]))
+
+    def test_pool_is_bounded(self):
+        """Test that a full pool refuses work instead of queueing it."""
+        pool = passwords.HashingPool(workers=1, max_pending=1)
+        self.addCleanup(pool.shutdown)
+        release = threading.Event()
+        running = pool.submit(release.wait)
+        with self.assertRaises(passwords.HashingBusy):
+            pool.submit(len, "x")
+        release.set()
+        running.result()
+        self.assertEqual(pool.run(len, "x"), 1)
+
+    def test_busy_pool_returns_503(self):
+        """Test that a login storm past the pool's bound is shed with 503."""
+        from unittest import mock
+
+        with mock.patch.object(
+            passwords.HashingPool, "submit", side_effect=passwords.HashingBusy
+        ):
+            response = self.login()
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response["Retry-After"], "1")
+
+    def test_busy_pool_outside_drf(self):
+        """Test that the admin login is shed with 503 too, not a 500."""
+        from unittest import mock
+
+        with mock.patch.object(
+            passwords.HashingPool, "submit", side_effect=passwords.HashingBusy
+        ):
+            response = self.client.post(
+                reverse("admin:login"),
+                {"username": "test@example.com", "password": "testpass123"},
+            )
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response["Retry-After"], "1")
+
+
+class BulkUserCommandsTestCase(TestCase):
+    """Test cases for the import_users and export_users commands."""
+
+    def setUp(self):
+        """Set up a scratch directory and an existing user."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        passwords.reset_pool()
+        self.addCleanup(passwords.reset_pool)
+        User.objects.create_user(
+            email="taken@example.com", username="taken", password="testpass123"
+        )
+
+    def write(self, name, content):
+        """Write a file in the scratch directory and return its path."""
+        path = os.path.join(self.directory, name)
+        with open(path, "w", newline="") as stream:
+            stream.write(content)
+        return path
+
+    def run_import(self, path, **options):
+        """Run import_users and return (stdout, stderr)."""
+        out, err = StringIO(), StringIO()
+        call_command("import_users", path, stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def test_import_csv_in_batches(self):
+        """Test that a CSV file is imported in batches with hashed passwords."""
+        path = self.write(
+            "users.csv",
+            "email,username,first_name,password,is_active\n"
+            "one@Example.COM,one,One,secret-1,True\n"
+            "two@example.com,two,,secret-2,False\n"
+            "three@example.com,three,,,\n",
+        )
+        out, err = self.run_import(path, batch_size=2)
+        self.assertIn("Imported 3 users (0 already taken, 0 invalid)", out)
+        self.assertEqual(err, "")
+
+        one = User.objects.get(username="one")
+        self.assertEqual(one.email, "one@example.com")
+        self.assertEqual(one.first_name, "One")
+        self.assertTrue(one.check_password("secret-1"))
+        self.assertFalse(User.objects.get(username="two").is_active)
+        self.assertFalse(User.objects.get(username="three").has_usable_password())
+
+    def test_import_skips_taken_and_invalid_records(self):
+        """Test that duplicates are skipped and invalid records reported."""
+        from unittest import mock
+
+        path = self.write(
+            "users.jsonl",
+            "\n".join(
+                json.dumps(record)
+                for record in [
+                    {"email": "Taken@example.com", "username": "new", "password": "1"},
+                    {"email": "new@example.com", "username": "TAKEN", "password": "2"},
+                    {"email": "new@example.com", "username": "new", "password": "3"},
+                    {"email": "new@example.com", "username": "again", "password": "4"},
+                    {"email": "not-an-email", "username": "bad"},
+                    {
+                        "email": "hash@example.com",
+                        "username": "h",
+                        "password_hash": "x",
+                    },
+                    ["list@example.com", "list"],
+                ]
+            ),
+        )
+        with mock.patch.object(
+            passwords, "make_passwords", wraps=passwords.make_passwords
+        ) as make_passwords:
+            out, err = self.run_import(path)
+        self.assertIn("Imported 1 users (3 already taken, 3 invalid)", out)
+        self.assertIn("Line 5: Enter a valid email address.", err)
+        self.assertIn("Line 6: Unknown password hash format.", err)
+        self.assertIn("Line 7: Record is not an object.", err)
+        self.assertEqual(User.objects.count(), 2)
+        # Taken records are dropped before hashing
+        make_passwords.assert_called_once_with(["3"])
+
+    def test_import_errors(self):
+        """Test that unreadable input fails the command."""
+        with self.assertRaises(CommandError):
+            self.run_import(os.path.join(self.directory, "missing.csv"))
+        with self.assertRaises(CommandError):
+            self.run_import(self.write("bad.jsonl", "{not json\n"))
+
+    def test_export_import_round_trip(self):
+        """Test that exported users, with hashes, import elsewhere intact."""
+        User.objects.create_user(
+            email="two@example.com", username="two", password="secret-2"
+        )
+        for fmt in ("csv", "jsonl"):
+            with self.subTest(fmt=fmt):
+                path = os.path.join(self.directory, f"users.{fmt}")
+                out = StringIO()
+                call_command(
+                    "export_users",
+                    path,
+                    chunk_size=1,
+                    include_password_hashes=True,
+                    stdout=out,
+                )
+                self.assertIn("Exported 2 users", out.getvalue())
+                expected = list(
+                    User.objects.order_by("pk").values_list(
+                        "email", "username", "password", "date_joined"
+                    )
+                )
+
+                User.objects.all().delete()
+                self.run_import(path)
+                self.assertEqual(
+                    list(
+                        User.objects.order_by("pk").values_list(
+                            "email", "username", "password", "date_joined"
+                        )
+                    ),
+                    expected,
+                )
+        self.assertTrue(User.objects.get(username="two").check_password("secret-2"))
+
+    def test_export_to_stdout(self):
+        """Test that exporting to stdout writes only data there."""
+        out, err = StringIO(), StringIO()
+        call_command("export_users", format="jsonl", stdout=out, stderr=err)
+        record = json.loads(out.getvalue())
+        self.assertEqual(record["username"], "taken")
+        self.assertNotIn("password_hash", record)
+        self.assertIn("Exported 1 users", err.getvalue())
+
+
+class CaseInsensitiveUniquenessTestCase(APITestCase):
+    """Test cases for case-insensitive email and username uniqueness."""
+
+    def setUp(self):
+        """Set up a user with mixed-case email and username."""
+        self.user = User.objects.create_user(
+            email="Test.User@Example.com", username="TestUser", password="testpass123"
+        )
+
+    def test_duplicates_rejected_by_database(self):
+        """Test that the unique indexes ignore case."""
+        for email, username in (
+            ("test.user@example.com", "other"),
+            ("other@example.com", "testuser"),
+        ):
+            with self.subTest(email=email), self.assertRaises(IntegrityError):
+                with transaction.atomic():
+                    User.objects.create_user(email=email, username=username)
+
+    def test_lookups(self):
+        """Test that iexact() and natural key lookups ignore case."""
+        self.assertEqual(
+            User.objects.iexact(email="TEST.USER@example.COM").get(), self.user
+        )
+        self.assertEqual(User.objects.iexact(username="testuser").get(), self.user)
+        self.assertEqual(
+            list(User.objects.iexact_in("username", ["TESTUSER", "nobody"])),
+            [self.user],
+        )
+        self.assertEqual(
+            User.objects.get_by_natural_key("test.user@EXAMPLE.com"), self.user
+        )
+
+    def test_login_ignores_email_case(self):
+        """Test that logging in works with the email in another case."""
+        response = self.client.post(
+            reverse("users:token-obtain"),
+            {"email": "TEST.USER@example.com", "password": "testpass123"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_registration_rejects_case_variants(self):
+        """Test that registration reports case-variant duplicates as taken."""
+        response = self.client.post(
+            reverse("users:user-list"),
+            {
+                "email": "TEST.user@example.com",
+                "username": "TESTUSER",
+                "password": "testpass123",
+                "password_confirm": "testpass123",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data["email"], ["user with this email address already exists."]
+        )
+        self.assertEqual(
+            response.data["username"], ["A user with that username already exists."]
+        )
+
+    def test_update_keeps_own_username(self):
+        """Test that changing the case of one's own username is allowed."""
+        from users.serializers import UserUpdateSerializer
+
+        serializer = UserUpdateSerializer(
+            instance=self.user, data={"username": "TESTUSER"}, partial=True
+        )
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+    def test_lookups_use_index(self):
+        """Test that the query plans use the LOWER() unique indexes."""
+        for queryset, index in (
+            (
+                User.objects.iexact(email="test.user@example.com"),
+                "users_email_lower_uniq",
+            ),
+            (User.objects.iexact(username="testuser"), "users_username_lower_uniq"),
+            (
+                User.objects.iexact_in("email", ["a@b.com", "c@d.com"]),
+                "users_email_lower_uniq",
+            ),
+        ):
+            with self.subTest(index=index):
+                self.assertIn(index, queryset.explain())
+        # The built-in lookup can't use them
+        self.assertNotIn(
+            "users_email_lower_uniq",
+            User.objects.filter(email__iexact="test.user@example.com").explain(),
+        )
+
+    def test_add_constraint_concurrently(self):
+        """Test the SQL of the concurrent migration operation on PostgreSQL."""
+        from django.db.backends.postgresql.base import DatabaseWrapper
+        from django.db.migrations.state import ProjectState
+
+        from popcornguess.operations import AddConstraintConcurrently
+
+        constraint = User._meta.constraints[0]
+        operation = AddConstraintConcurrently("user", constraint)
+        self.assertFalse(operation.atomic)
+        self.assertEqual(
+            operation.describe(),
+            "Concurrently create constraint users_email_lower_uniq on model user",
+        )
+        state = ProjectState.from_apps(apps)
+        postgres = DatabaseWrapper({**connection.settings_dict, "NAME": "unused"})
+        with postgres.schema_editor(collect_sql=True, atomic=False) as editor:
+            operation.database_forwards("users", editor, state, state)
+            operation.database_backwards("users", editor, state, state)
+        self.assertEqual(
+            editor.collected_sql,
+            [
+                'CREATE UNIQUE INDEX CONCURRENTLY "users_email_lower_uniq" '
+                'ON "users" ((LOWER("email")));',
+                'DROP INDEX CONCURRENTLY IF EXISTS "users_email_lower_uniq";',
+            ],
+        )
+
+
+class QueryBudgetTestCase(TestCase):
+    """Test cases for per-request query counting and budgets."""
+
+    def setUp(self):
+        """Set up a logged-in user."""
+        self.user = User.objects.create_user(
+            email="test@example.com", username="testuser", password="testpass123"
+        )
+        self.client.force_login(self.user)
+        self.url = reverse("users:user-me")
+
+    def test_assertion_reports_statements(self):
+        """Test that the budget assertion fails with the statements run."""
+        with self.assertRaisesRegex(AssertionError, r"2 queries run, budget is 1"):
+            with assert_query_budget(1):
+                User.objects.count()
+                User.objects.count()
+        with self.assertRaisesRegex(AssertionError, r"ran 3 times, at most 2"):
+            with assert_query_budget(10, max_repeats=2):
+                for user_id in range(3):
+                    User.objects.filter(pk=user_id).exists()
+
+    def test_nested_collectors(self):
+        """Test that nested blocks each count the queries within them."""
+        from popcornguess import queries
+
+        with queries.collect() as outer:
+            User.objects.count()
+            with queries.collect() as inner:
+                User.objects.count()
+        self.assertEqual((outer.count, inner.count), (2, 1))
+        self.assertEqual(outer.most_repeated()[1], 2)
+        self.assertIsNone(queries.QueryStats().most_repeated())
+
+    @override_settings(QUERY_SERVER_TIMING=True)
+    def test_server_timing_header(self):
+        """Test that responses report the query count when enabled."""
+        response = self.client.get(self.url)
+        self.assertRegex(
+            response["Server-Timing"], r'^db;dur=\d+\.\d;desc="\d+ queries"$'
+        )
+
+    @override_settings(QUERY_SERVER_TIMING=False)
+    def test_server_timing_off(self):
+        """Test that the header can be turned off (as in production)."""
+        self.assertNotIn("Server-Timing", self.client.get(self.url))
+
+    @override_settings(QUERY_BUDGETS={"users:user-me": 1})
+    def test_over_budget_logged(self):
+        """Test that a request over its view's budget is logged."""
+        with self.assertLogs("popcornguess.middleware", "WARNING") as logs:
+            self.client.get(self.url)
+        self.assertIn("GET /api/v1/users/me/ (users:user-me) ran", logs.output[0])
+        self.assertIn("budget is 1", logs.output[0])
+
+    @override_settings(QUERY_SERVER_TIMING=True, QUERY_BUDGET=0)
+    async def test_async_stack(self):
+        """Test that queries made for async views are counted."""
+        url = reverse("quizzes:daily-puzzle")
+        with self.assertLogs("popcornguess.middleware", "WARNING"):
+            response = await self.async_client.get(url)
+        self.assertNotIn('desc="0 queries"', response["Server-Timing"])
+
+
+class ConnectionPoolTestCase(TestCase):
+    """Test cases for the pooled PostgreSQL backend."""
+
+    class FakeConnection:
+        """A psycopg2 connection as far as the pool looks at it."""
+
+        def __init__(self, in_transaction=False):
+            from types import SimpleNamespace
+
+            from psycopg2 import extensions
+
+            self.closed = 0
+            status = extensions.TRANSACTION_STATUS_INTRANS
+            if not in_transaction:
+                status = extensions.TRANSACTION_STATUS_IDLE
+            self.info = SimpleNamespace(transaction_status=status)
+            self.rolled_back = False
+
+        def rollback(self):
+            from psycopg2 import extensions
+
+            self.rolled_back = True
+            self.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+        def close(self):
+            self.closed = 1
+
+    def setUp(self):
+        """Set up a wrapper around a database of its own."""
+        from popcornguess.postgresql_pool import base
+
+        self.base = base
+        self.wrapper = base.DatabaseWrapper(
+            {**connection.settings_dict, "CONN_MAX_AGE": 0}, "pool_test"
+        )
+        self.addCleanup(base._pools.pop, "pool_test", None)
+
+    def test_reuses_newest_first(self):
+        """Test that the most recently returned connection is taken first."""
+        pool = self.base.ConnectionPool(size=2)
+        first, second = self.FakeConnection(), self.FakeConnection()
+        now = time.monotonic()
+        self.assertTrue(pool.put(first, now))
+        self.assertTrue(pool.put(second, now))
+        self.assertFalse(pool.put(self.FakeConnection(), now))
+        self.assertEqual(pool.get(), (second, now))
+        self.assertEqual(pool.get(), (first, now))
+        self.assertIsNone(pool.get())
+
+    def test_discards_closed_and_expired(self):
+        """Test that dropped or too old connections are never handed out."""
+        from unittest import mock
+
+        pool = self.base.ConnectionPool(size=3, max_age=60)
+        old, dropped = self.FakeConnection(), self.FakeConnection()
+        self.assertFalse(pool.put(self.FakeConnection(), time.monotonic() - 61))
+        pool.put(old, time.monotonic())
+        pool.put(dropped, time.monotonic())
+        dropped.closed = 2
+        later = time.monotonic() + 61
+        with mock.patch.object(self.base.time, "monotonic", return_value=later):
+            self.assertIsNone(pool.get())
+        self.assertTrue(old.closed)
+        self.assertEqual(len(pool), 0)
+
+    def test_clear_closes_idle(self):
+        """Test that clearing the pool closes what it held."""
+        pool = self.base.ConnectionPool(size=1)
+        idle = self.FakeConnection()
+        pool.put(idle, time.monotonic())
+        pool.clear()
+        self.assertTrue(idle.closed)
+        self.assertIsNone(pool.get())
+
+    def test_close_hands_back(self):
+        """Test that closing rolls back and pools the connection."""
+        conn = self.FakeConnection(in_transaction=True)
+        self.wrapper.connection = conn
+        self.wrapper.opened_at = time.monotonic()
+        self.wrapper.close()
+        self.assertIsNone(self.wrapper.connection)
+        self.assertTrue(conn.rolled_back)
+        self.assertFalse(conn.closed)
+        self.assertEqual(len(self.base.get_pool("pool_test")), 1)
+
+        # The next connect takes it from the pool, to be health-checked
+        self.assertIs(self.wrapper.get_new_connection({}), conn)
+        self.assertFalse(self.wrapper.health_check_done)
+
+    def test_close_after_errors(self):
+        """Test that a connection that had errors is closed, not pooled."""
+        conn = self.FakeConnection()
+        self.wrapper.connection = conn
+        self.wrapper.errors_occurred = True
+        self.wrapper.close()
+        self.assertTrue(conn.closed)
+        self.assertEqual(len(self.base.get_pool("pool_test")), 0)
+
+
+class QueuedLoggingTestCase(TestCase):
+    """Test cases for the queue-based logging setup."""
+
+    def configure(self, path, **overrides):
+        """Configure a test logger writing to ``path``; restore afterwards."""
+        from django.conf import settings
+        from django.utils.log import configure_logging
+
+        from popcornguess import logs
+
+        self.addCleanup(configure_logging, settings.LOGGING_CONFIG, settings.LOGGING)
+        with override_settings(**overrides):
+            logs.configure(
+                {
+                    "version": 1,
+                    "disable_existing_loggers": False,
+                    "formatters": {
+                        "plain": {"format": "{levelname} {message}", "style": "{"},
+                    },
+                    "handlers": {
+                        "file": {
+                            "class": "popcornguess.logs.RotatingFileHandler",
+                            "filename": path,
+                            "delay": True,
+                            "formatter": "plain",
+                        },
+                    },
+                    "loggers": {
+                        "popcornguess.tests": {
+                            "handlers": ["file"],
+                            "level": "DEBUG",
+                            "propagate": False,
+                        },
+                    },
+                }
+            )
+        return logging.getLogger("popcornguess.tests")
+
+    def tempdir(self):
+        """Return a temporary directory, removed after the test."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        return directory.name
+
+    def test_listener_writes_records(self):
+        """Test that queued records are formatted and written by the listener."""
+        from popcornguess import logs
+
+        path = os.path.join(self.tempdir(), "nested", "app.log")
+        logger = self.configure(path, LOG_QUEUE=True)
+        self.assertIsInstance(logger.handlers[0], logs.QueueHandler)
+        # Nothing touches the disk until a record is written
+        self.assertFalse(os.path.exists(os.path.dirname(path)))
+
+        guesses = ["heat"]
+        logger.info("guesses: %s", guesses)
+        # Arguments are captured when the call is made, not when formatted
+        guesses.append("ronin")
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            logger.exception("failed")
+        logs.stop_listener()
+
+        with open(path) as log_file:
+            output = log_file.read()
+        self.assertIn("INFO guesses: ['heat']\n", output)
+        self.assertIn("ERROR failed\nTraceback", output)
+        self.assertIn("ZeroDivisionError", output)
+
+    def test_listener_without_sched_yield(self):
+        """Test that the listener works where the platform can't yield."""
+        from unittest import mock
+
+        from popcornguess import logs
+
+        path = os.path.join(self.tempdir(), "app.log")
+        logger = self.configure(path, LOG_QUEUE=True)
+        with mock.patch.object(logs, "os", mock.Mock(spec=[])):
+            logger.info("yielded")
+            logs.stop_listener()
+        with open(path) as log_file:
+            self.assertIn("INFO yielded\n", log_file.read())
+
+    def test_queue_off(self):
+        """Test that without LOG_QUEUE loggers keep their own handlers."""
+        from popcornguess import logs
+
+        path = os.path.join(self.tempdir(), "app.log")
+        logger = self.configure(path, LOG_QUEUE=False)
+        self.assertIsInstance(logger.handlers[0], logs.RotatingFileHandler)
+        logger.warning("direct")
+        with open(path) as log_file:
+            self.assertEqual(log_file.read(), "WARNING direct\n")
+
+    def test_debug_sampling(self):
+        """Test that only a fraction of DEBUG records reach the handlers."""
+        from popcornguess import logs
+
+        path = os.path.join(self.tempdir(), "app.log")
+        logger = self.configure(path, LOG_QUEUE=True, LOG_DEBUG_SAMPLE_RATE=0.1)
+        random.seed(0)
+        for number in range(1000):
+            logger.debug("debug %d", number)
+        logger.info("kept")
+        logs.stop_listener()
+
+        with open(path) as log_file:
+            lines = log_file.read().splitlines()
+        self.assertEqual(lines[-1], "INFO kept")
+        self.assertTrue(50 < len(lines) - 1 < 150, len(lines))
+
+    def test_json_formatter(self):
+        """Test that records are formatted as JSON, with their extra fields."""
+        from popcornguess.logs import JSONFormatter
+
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            exc_info = sys.exc_info()
+        record = logging.getLogger("popcornguess.tests").makeRecord(
+            "popcornguess.tests",
+            logging.ERROR,
+            __file__,
+            1,
+            "guess %s failed",
+            ("heat",),
+            exc_info,
+            extra={"user_id": 7},
+        )
+        entry = json.loads(JSONFormatter().format(record))
+        self.assertEqual(entry["level"], "ERROR")
+        self.assertEqual(entry["logger"], "popcornguess.tests")
+        self.assertEqual(entry["message"], "guess heat failed")
+        self.assertEqual(entry["user_id"], 7)
+        self.assertIn("ZeroDivisionError", entry["exception"])
+        self.assertTrue(entry["time"].endswith("+00:00"))
+
+
+class ResponseCacheTestCase(APITestCase):
+    """Test cases for cached user responses."""
+
+    def setUp(self):
+        """Set up a logged-in user."""
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="test@example.com", username="testuser"
+        )
+        self.other = User.objects.create_user(
+            email="other@example.com", username="other"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("users:user-detail", kwargs={"pk": self.other.pk})
+
+    def test_retrieve_cached(self):
+        """Test that a repeated retrieve is served without queries."""
+        from popcornguess.metrics import CACHE_LOOKUPS
+
+        hits = CACHE_LOOKUPS.labels("response:users.user", "hit")
+        before = hits._value.get()
+        with assert_query_budget(1):
+            first = self.client.get(self.url)
+        with assert_query_budget(0):
+            second = self.client.get(self.url)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(hits._value.get(), before + 1)
+
+    def test_keyed_by_user_and_query(self):
+        """Test that users and query strings have separate entries."""
+        self.client.get(self.url)
+        with assert_query_budget(1):
+            self.client.get(self.url, {"fields": "username"})
+        self.client.force_authenticate(user=self.other)
+        with assert_query_budget(1):
+            self.client.get(self.url)
+
+    def test_save_invalidates(self):
+        """Test that saving a user drops their cached responses."""
+        self.client.get(self.url)
+        self.other.first_name = "Renamed"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["first_name"], "Renamed")
+
+    def test_streak_update_invalidates(self):
+        """Test that streak updates, which send no signals, invalidate too."""
+        self.client.get(self.url)
+        streaks.record_completion(self.other.pk, D1, solved=True)
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["last_played_date"], D1.isoformat())
+
+    def test_me_cached(self):
+        """Test that /me is cached per user and dropped on update."""
+        url = reverse("users:user-me")
+        self.client.get(url)
+        User.objects.filter(pk=self.user.pk).update(first_name="Stale")
+        self.assertEqual(self.client.get(url).data["first_name"], "")
+        self.client.patch(
+            reverse("users:user-update-profile"), {"last_name": "New"}, format="json"
+        )
+        self.assertEqual(self.client.get(url).data["last_name"], "New")
+
+    def test_errors_not_cached(self):
+        """Test that only successful responses are cached."""
+        url = reverse("users:user-detail", kwargs={"pk": 999})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        with assert_query_budget(1):
+            self.client.get(url)
+
+
+def throttle_rates(**rates):
+    """Override the throttle rates, by scope ("login_ip" for "login:ip")."""
+    from django.conf import settings
+
+    return override_settings(
+        REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": {
+                name.replace("_", ":"): rate for name, rate in rates.items()
+            },
+        }
+    )
+
+
+class ThrottleTestCase(APITestCase):
+    """Test cases for token bucket rate limiting."""
+
+    def setUp(self):
+        """Start every test with empty buckets."""
+        from popcornguess import throttling
+
+        throttling.reset_store()
+        self.addCleanup(throttling.reset_store)
+
+    def test_memory_bucket(self):
+        """Test that a bucket allows a burst, then refills at its rate."""
+        from unittest import mock
+
+        from popcornguess import throttling
+
+        store = throttling.MemoryBucketStore()
+        with mock.patch.object(throttling.time, "monotonic", return_value=100.0):
+            decisions = [store.take("k", 3, 0.5) for _ in range(4)]
+        self.assertEqual([d.allowed for d in decisions], [True, True, True, False])
+        self.assertAlmostEqual(decisions[-1].wait, 2.0)
+        with mock.patch.object(throttling.time, "monotonic", return_value=102.0):
+            self.assertTrue(store.take("k", 3, 0.5).allowed)
+            self.assertFalse(store.take("k", 3, 0.5).allowed)
+        self.assertTrue(store.take("other", 3, 0.5).allowed)
+
+    def test_memory_bucket_bounded(self):
+        """Test that the least recently used buckets are dropped."""
+        from popcornguess import throttling
+
+        store = throttling.MemoryBucketStore(max_buckets=2)
+        for key in ("a", "b", "a", "c"):
+            store.take(key, 5, 1.0)
+        self.assertEqual(list(store._buckets), ["a", "c"])
+        store.clear()
+        self.assertFalse(store._buckets)
+
+    @throttle_rates(login_ip="2/min")
+    def test_login_throttled_per_ip(self):
+        """Test that logins beyond the IP's rate get 429 with Retry-After."""
+        url = reverse("users:token-obtain")
+        data = {"email": "nobody@example.com", "password": "wrong"}
+        for _ in range(2):
+            response = self.client.post(url, data, format="json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response["Retry-After"], "30")
+        # Another address has its own bucket
+        response = self.client.post(url, data, format="json", REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @throttle_rates(password_user="1/min", register_ip="100/min")
+    def test_scopes_by_action(self):
+        """Test that only the password hashing actions are throttled."""
+        user = User.objects.create_user(
+            email="test@example.com", username="testuser", password="testpass123"
+        )
+        self.client.force_authenticate(user=user)
+        url = reverse("users:user-change-password")
+        data = {
+            "old_password": "wrong",
+            "new_password": "newpass456",
+            "new_password_confirm": "newpass456",
+        }
+        self.assertEqual(self.client.post(url, data, format="json").status_code, 400)
+        self.assertEqual(self.client.post(url, data, format="json").status_code, 429)
+        for _ in range(3):
+            response = self.client.get(reverse("users:user-me"))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @throttle_rates(guess_device="1/min")
+    def test_device_throttle(self):
+        """Test that devices are limited, and requests without one pass."""
+        from popcornguess.throttling import DeviceThrottle
+
+        request = RequestFactory().get("/")
+        request.device_id = uuid.uuid4()
+        self.assertTrue(DeviceThrottle().check(request, "guess"))
+        throttle = DeviceThrottle()
+        self.assertFalse(throttle.check(request, "guess"))
+        self.assertGreater(throttle.wait(), 59)
+        request.device_id = None
+        self.assertTrue(DeviceThrottle().check(request, "guess"))
+        # Scopes without a rate aren't limited
+        request.device_id = uuid.uuid4()
+        for _ in range(3):
+            self.assertTrue(DeviceThrottle().check(request, "login"))
+
+    @throttle_rates(suggest_ip="1/min")
+    async def test_async_view_throttled(self):
+        """Test that plain async views are throttled with the decorator."""
+        url = reverse("quizzes:title-suggest")
+        response = await self.async_client.get(url, {"q": "hea"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = await self.async_client.get(url, {"q": "hea"})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response["Retry-After"], "60")
+        self.assertNotIn("public", response.get("Cache-Control", ""))
+
+    @throttle_rates(login_ip="1/min")
+    @override_settings(THROTTLE_REDIS_URL="redis://127.0.0.1:1/0")
+    def test_redis_down(self):
+        """Test that an unreachable Redis degrades to per-process limits."""
+        from popcornguess import throttling
+
+        request = RequestFactory().post("/")
+        with self.assertLogs("popcornguess.throttling", "WARNING"):
+            self.assertTrue(throttling.IPThrottle().check(request, "login"))
+        store = throttling.get_store()
+        self.assertIsInstance(store, throttling.RedisBucketStore)
+        self.assertGreater(store.down_until, 0)
+        # Redis isn't retried until the interval has passed
+        self.assertFalse(throttling.IPThrottle().check(request, "login"))
+
+
+class FastJSONTestCase(APITestCase):
+    """Test cases for the orjson renderer and parser."""
+
+    def test_renders_like_json_renderer(self):
+        """Test that the orjson renderer produces JSONRenderer's bytes."""
+        import decimal
+
+        from django.utils.translation import gettext_lazy
+
+        from rest_framework.renderers import JSONRenderer
+
+        from popcornguess.renderers import ORJSONRenderer
+
+        data = {
+            "text": "Amélie     \U0001f37f",
+            "lazy": gettext_lazy("name"),
+            "when": datetime.datetime(
+                2025, 12, 3, 8, 30, 15, 123456, tzinfo=datetime.timezone.utc
+            ),
+            "day": datetime.date(2025, 12, 3),
+            "at": datetime.time(8, 30, 15, 123456),
+            "price": decimal.Decimal("1.50"),
+            "id": uuid.UUID(int=7),
+            "keys": {1: True, None: [1.5, None]},
+            "rows": ({"set": {3}}, [b"bytes"]),
+            "big": 2**70,
+        }
+        for value in [*data.values(), data, None]:
+            with self.subTest(value=value):
+                self.assertEqual(
+                    ORJSONRenderer().render(value), JSONRenderer().render(value)
+                )
+        self.assertEqual(
+            ORJSONRenderer().render(data, "application/json; indent=2"),
+            JSONRenderer().render(data, "application/json; indent=2"),
+        )
+        with self.assertRaises(TypeError):
+            ORJSONRenderer().render({"object": object()})
+
+    def test_parses_like_json_parser(self):
+        """Test that the orjson parser accepts and refuses what JSONParser does."""
+        from io import BytesIO
+
+        from rest_framework.exceptions import ParseError
+        from rest_framework.parsers import JSONParser
+
+        from popcornguess.parsers import ORJSONParser
+
+        for body in [b'{"a": [1, 2.5, "\xc3\xa9"]}', b"12345678901234567890"]:
+            with self.subTest(body=body):
+                self.assertEqual(
+                    ORJSONParser().parse(BytesIO(body)),
+                    JSONParser().parse(BytesIO(body)),
+                )
+        for body in [b"{", b'{"a": NaN}', b""]:
+            with self.subTest(body=body):
+                with self.assertRaises(ParseError) as expected:
+                    JSONParser().parse(BytesIO(body))
+                with self.assertRaises(ParseError) as raised:
+                    ORJSONParser().parse(BytesIO(body))
+                self.assertEqual(str(raised.exception), str(expected.exception))
+
+    def test_api_responses_unchanged(self):
+        """Test that switching the API to orjson leaves responses unchanged."""
+        from django.conf import settings
+
+        user = User.objects.create_user(email="fast@example.com", username="fast")
+        self.client.force_authenticate(user=user)
+        url = reverse("users:user-me")
+        expected = self.client.get(url).content
+        with override_settings(
+            REST_FRAMEWORK={
+                **settings.REST_FRAMEWORK,
+                "DEFAULT_RENDERER_CLASSES": ["popcornguess.renderers.ORJSONRenderer"],
+                "DEFAULT_PARSER_CLASSES": ["popcornguess.parsers.ORJSONParser"],
+            },
+            RESPONSE_CACHE_TIMEOUT=0,
+        ):
+            self.assertEqual(self.client.get(url).content, expected)
+            response = self.client.patch(
+                reverse("users:user-update-profile"),
+                {"first_name": "Zoë"},
+                format="json",
+            )
+        self.assertEqual(response.json()["first_name"], "Zoë")
+
+
+@override_settings(COMPRESSION_MIN_SIZE=500)
+class CompressionTestCase(TestCase):
+    """Test cases for response compression."""
+
+    def setUp(self):
+        """Set up a middleware around a large and a small response."""
+        from popcornguess.middleware import CompressionMiddleware
+
+        self.body = json.dumps([{"username": f"player{i}"} for i in range(100)])
+        self.factory = RequestFactory()
+
+        def view(request):
+            size = int(request.GET.get("size", len(self.body)))
+            response = HttpResponse(self.body[:size], content_type="application/json")
+            response["ETag"] = '"v1"'
+            return response
+
+        self.middleware = CompressionMiddleware(view)
+
+    def get(self, accept_encoding="", **params):
+        """Return the middleware's response to a GET."""
+        request = self.factory.get(
+            "/", params, headers={"Accept-Encoding": accept_encoding}
+        )
+        return self.middleware(request)
+
+    def test_brotli_preferred(self):
+        """Test that clients accepting Brotli get it."""
+        import brotli
+
+        response = self.get("gzip, deflate, br")
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(response.content).decode(), self.body)
+        self.assertEqual(response["Content-Length"], str(len(response.content)))
+        self.assertEqual(response["ETag"], 'W/"v1"')
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_brotli_padded(self):
+        """Test that Brotli output varies in length against BREACH."""
+        import brotli
+
+        from popcornguess.middleware import brotli_padding
+
+        responses = [self.get("br") for _ in range(10)]
+        self.assertGreater(len({len(r.content) for r in responses}), 1)
+        for response in responses:
+            self.assertEqual(brotli.decompress(response.content).decode(), self.body)
+        # Padding past one metadata block's 256 bytes
+        compressor = brotli.Compressor()
+        stream = compressor.process(b"x" * 1000) + compressor.flush()
+        stream += brotli_padding(300) + compressor.finish()
+        self.assertEqual(brotli.decompress(stream), b"x" * 1000)
+
+    def test_gzip(self):
+        """Test that other clients get gzip, or no compression."""
+        import gzip
+
+        response = self.get("gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content).decode(), self.body)
+        response = self.get("identity")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response.content.decode(), self.body)
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_small_responses_left_alone(self):
+        """Test that responses under the threshold aren't compressed."""
+        response = self.get("br, gzip", size=499)
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertFalse(response.has_header("Vary"))
+
+    def test_streaming(self):
+        """Test that streaming responses are gzipped as they stream."""
+        import gzip
+
+        from django.http import StreamingHttpResponse
+
+        from popcornguess.middleware import CompressionMiddleware
+
+        middleware = CompressionMiddleware(
+            lambda request: StreamingHttpResponse(iter([b"a" * 1000, b"b" * 1000]))
+        )
+        request = self.factory.get("/", headers={"Accept-Encoding": "br, gzip"})
+        response = middleware(request)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        content = gzip.decompress(b"".join(response.streaming_content))
+        self.assertEqual(content, b"a" * 1000 + b"b" * 1000)
+
+    def test_async(self):
+        """Test that async views stay async and get compressed."""
+        import asyncio
+
+        from popcornguess.middleware import CompressionMiddleware
+
+        async def view(request):
+            return HttpResponse(self.body)
+
+        middleware = CompressionMiddleware(view)
+        request = self.factory.get("/", headers={"Accept-Encoding": "br"})
+        response = asyncio.run(middleware(request))
+        self.assertEqual(response["Content-Encoding"], "br")
+
+
+class UserReadSerializerTestCase(APITestCase):
+    """Test cases for the lightweight user read path."""
+
+    def setUp(self):
+        """Create users covering null and lapsed values."""
+        today = timezone.now().date()
+        self.users = [
+            User.objects.create_user(email="plain@example.com", username="plain"),
+            User.objects.create_user(
+                email="zoe@example.com",
+                username="zoë",
+                first_name="Zoë",
+                last_name="Ünal",
+                last_login=timezone.now(),
+                current_streak=4,
+                best_streak=9,
+                last_played_date=today,
+            ),
+            User.objects.create_user(
+                email="lapsed@example.com",
+                username="lapsed",
+                is_active=False,
+                current_streak=3,
+                best_streak=3,
+                last_played_date=today - datetime.timedelta(days=2),
+            ),
+        ]
+        self.client.force_authenticate(user=self.users[0])
+
+    def test_matches_user_serializer(self):
+        """Test that rows render exactly as UserSerializer renders users."""
+        from users.serializers import UserReadSerializer, UserSerializer
+
+        rows = {row["id"]: row for row in UserReadSerializer.values(User.objects.all())}
+        for user in self.users:
+            with self.subTest(user=user.username):
+                expected = UserSerializer(user).data
+                data = UserReadSerializer(rows[user.pk]).data
+                self.assertEqual(list(data), list(expected))
+                self.assertEqual(data, expected)
+
+    def test_list_and_retrieve(self):
+        """Test that the endpoints keep their schema and read in one query."""
+        from users.serializers import UserSerializer
+
+        expected = [
+            UserSerializer(user).data
+            for user in sorted(self.users, key=lambda u: (u.date_joined, u.pk))[::-1]
+        ]
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("users:user-list"), {"page_size": 2})
+        self.assertEqual(response.json()["results"], expected[:2])
+        response = self.client.get(response.json()["next"])
+        self.assertEqual(response.json()["results"], expected[2:])
+
+        user = self.users[1]
+        url = reverse("users:user-detail", kwargs={"pk": user.pk})
+        self.assertEqual(self.client.get(url).json(), UserSerializer(user).data)
+        for pk in (0, "x"):
+            url = reverse("users:user-detail", kwargs={"pk": pk})
+            self.assertEqual(self.client.get(url).status_code, 404)
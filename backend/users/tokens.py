@@ -0,0 +1,150 @@
+"""
+Stateless signed tokens for API clients.
+
+Tokens are signed with ``SECRET_KEY`` via `django.core.signing` and carry
+the user id and the user's ``token_generation``. An access token is
+short-lived and is checked without touching the database: the user's
+fields are read from the cache, keyed by id, and only loaded from the
+database on a miss. The password hash is never cached; it is left deferred
+and read from the database when a view checks it. A refresh token is
+long-lived and is exchanged for a new pair after its generation has been
+checked against the database.
+
+Bumping ``User.token_generation`` (see `revoke_tokens`) invalidates every
+token issued before; saving a new password does it too (`User.save`). It takes effect immediately with a shared cache, and
+within ``USER_AUTH_CACHE_TIMEOUT`` seconds with a per-process one.
+"""
+
+from typing import Any, NamedTuple
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import F
+
+from popcornguess import metrics
+
+from .models import User
+
+ACCESS = "access"
+REFRESH = "refresh"
+CACHE_KEY_PREFIX = "users:auth-fields:"
+
+# Cached for authentication and for views rendering the request's user
+AUTH_FIELDS = [
+    field.attname for field in User._meta.concrete_fields if field.name != "password"
+]
+
+
+class InvalidToken(Exception):
+    """Raised when a token is malformed, tampered with, expired or revoked."""
+
+
+class TokenClaims(NamedTuple):
+    """The verified contents of a token."""
+
+    user_id: int
+    generation: int
+
+
+def get_lifetime(kind: str) -> int:
+    """
+    Return how many seconds a token of the given kind stays valid.
+    """
+    if kind == ACCESS:
+        return int(getattr(settings, "ACCESS_TOKEN_LIFETIME", 15 * 60))
+    return int(getattr(settings, "REFRESH_TOKEN_LIFETIME", 14 * 24 * 60 * 60))
+
+
+def issue_token(user: User, kind: str) -> str:
+    """
+    Return a signed token of the given kind for a user.
+    """
+    return signing.dumps(
+        {"uid": user.pk, "gen": user.token_generation}, salt=f"users.token.{kind}"
+    )
+
+
+def issue_tokens(user: User) -> dict[str, Any]:
+    """
+    Return a fresh access/refresh token pair for a user.
+    """
+    return {
+        ACCESS: issue_token(user, ACCESS),
+        REFRESH: issue_token(user, REFRESH),
+        "expires_in": get_lifetime(ACCESS),
+    }
+
+
+def verify_token(token: str, kind: str) -> TokenClaims:
+    """
+    Check a token's signature and age and return its claims.
+    Raises InvalidToken.
+    """
+    try:
+        payload = signing.loads(
+            token, salt=f"users.token.{kind}", max_age=get_lifetime(kind)
+        )
+        return TokenClaims(int(payload["uid"]), int(payload["gen"]))
+    except signing.SignatureExpired as exc:
+        raise InvalidToken("Token has expired.") from exc
+    except (signing.BadSignature, KeyError, TypeError, ValueError) as exc:
+        raise InvalidToken("Token is invalid.") from exc
+
+
+def cache_key(user_id: int) -> str:
+    return f"{CACHE_KEY_PREFIX}{user_id}"
+
+
+def get_user(claims: TokenClaims) -> User:
+    """
+    Return the active user a token was issued to, from the cache when
+    possible. Raises InvalidToken if the user is gone, inactive or has
+    revoked the token's generation.
+    """
+    key = cache_key(claims.user_id)
+    row = cache.get(key)
+    metrics.record_cache_lookup("auth_user", row is not None)
+    if row is None:
+        row = User.objects.filter(pk=claims.user_id).values(*AUTH_FIELDS).first()
+        if row is None:
+            raise InvalidToken("User not found.")
+        cache.set(key, row, getattr(settings, "USER_AUTH_CACHE_TIMEOUT", 60))
+    # Columns missing from the row (the password) are deferred
+    user = User.from_db(DEFAULT_DB_ALIAS, list(row), list(row.values()))
+    if not user.is_active:
+        raise InvalidToken("User is inactive.")
+    if user.token_generation != claims.generation:
+        raise InvalidToken("Token has been revoked.")
+    return user
+
+
+def refresh_tokens(token: str) -> dict[str, Any]:
+    """
+    Exchange a refresh token for a new token pair. The user is always read
+    from the database, so revocation is enforced immediately.
+    """
+    claims = verify_token(token, REFRESH)
+    user = User.objects.filter(pk=claims.user_id, is_active=True).first()
+    if user is None or user.token_generation != claims.generation:
+        raise InvalidToken("Token has been revoked.")
+    return issue_tokens(user)
+
+
+def revoke_tokens(user: User) -> None:
+    """
+    Invalidate every token issued to a user so far.
+    """
+    User.objects.filter(pk=user.pk).update(token_generation=F("token_generation") + 1)
+    user.refresh_from_db(fields=["token_generation"])
+    forget_user(user.pk)
+
+
+def forget_user(*user_ids: int) -> None:
+    """
+    Drop users from the authentication cache. Call it wherever user rows
+    are changed without saving them, next to `caching.invalidate`.
+    """
+    if user_ids:
+        cache.delete_many([cache_key(user_id) for user_id in user_ids])
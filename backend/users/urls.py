@@ -6,7 +6,14 @@ from django.urls import include, path
 
 from rest_framework.routers import DefaultRouter
 
-from .views import UserViewSet
+from .views import (
+    LeaderboardRankView,
+    LeaderboardView,
+    TokenObtainView,
+    TokenRefreshView,
+    TokenRevokeView,
+    UserViewSet,
+)
 
 app_name = "users"
 
@@ -15,4 +22,13 @@ router.register(r"users", UserViewSet, basename="user")
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("auth/token/", TokenObtainView.as_view(), name="token-obtain"),
+    path("auth/token/refresh/", TokenRefreshView.as_view(), name="token-refresh"),
+    path("auth/token/revoke/", TokenRevokeView.as_view(), name="token-revoke"),
+    path("leaderboards/<str:board>/", LeaderboardView.as_view(), name="leaderboard"),
+    path(
+        "leaderboards/<str:board>/me/",
+        LeaderboardRankView.as_view(),
+        name="leaderboard-rank",
+    ),
 ]
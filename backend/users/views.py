@@ -5,22 +5,41 @@ will be implemented as needed during development.
 """
 
 from django.contrib.auth import get_user_model
+
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from popcornguess.caching import cache_response
+from popcornguess.routers import ReplicaReadMixin
+from popcornguess.throttling import DeviceThrottle, IPThrottle, UserThrottle
 
+from . import devices, leaderboard, tokens
+from .authentication import SignedTokenAuthentication
+from .leaderboard import BaseLeaderboard
+from .pagination import UserCursorPagination
 from .serializers import (
     PasswordChangeSerializer,
+    TokenObtainSerializer,
+    TokenRefreshSerializer,
     UserCreateSerializer,
+    UserReadSerializer,
     UserSerializer,
     UserUpdateSerializer,
 )
 
 User = get_user_model()
 
+LEADERBOARD_DEFAULT_LIMIT = 10
+LEADERBOARD_DEFAULT_RADIUS = 2
+
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """
     ViewSet for user CRUD operations.
     This is a basic skeleton - authentication, permissions,
@@ -29,6 +48,14 @@ class UserViewSet(viewsets.ModelViewSet):
 
     queryset = User.objects.all()
     serializer_class = UserSerializer
+    pagination_class = UserCursorPagination
+    throttle_classes = [IPThrottle, DeviceThrottle, UserThrottle]
+    # Actions that hash passwords, by throttle scope
+    throttle_scopes = {"create": "register", "change_password": "password"}
+
+    @property
+    def throttle_scope(self) -> str | None:
+        return self.throttle_scopes.get(self.action)
 
     def get_serializer_class(self):  # type: ignore[no-untyped-def,override]
         """
@@ -40,6 +67,15 @@ class UserViewSet(viewsets.ModelViewSet):
             return UserUpdateSerializer
         return UserSerializer
 
+    def perform_create(self, serializer):  # type: ignore[no-untyped-def]
+        """
+        Register the user and move the anonymous device's history to them.
+        """
+        user = serializer.save()
+        device_id = getattr(self.request, "device_id", None)
+        if device_id is not None:
+            devices.merge_into(device_id, user)
+
     def get_permissions(self):  # type: ignore[no-untyped-def,override]
         """
         Return appropriate permissions based on action.
@@ -49,7 +85,37 @@ class UserViewSet(viewsets.ModelViewSet):
             return [AllowAny()]
         return [IsAuthenticated()]
 
+    def get_read_object(self) -> dict:
+        """
+        Return the URL's user as a `UserReadSerializer` row.
+        """
+        queryset = UserReadSerializer.values(self.filter_queryset(self.get_queryset()))
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(
+            queryset, **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        self.check_object_permissions(self.request, row)
+        return row  # type: ignore[no-any-return]
+
+    def list(self, request, *args, **kwargs):  # type: ignore[no-untyped-def]
+        """
+        List users, read as plain rows (see `UserReadSerializer`).
+        """
+        queryset = UserReadSerializer.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(UserReadSerializer(page, many=True).data)
+        return Response(UserReadSerializer(queryset, many=True).data)
+
+    @cache_response(User)
+    def retrieve(self, request, *args, **kwargs):  # type: ignore[no-untyped-def]
+        """
+        Get a user's profile, from the response cache when possible.
+        """
+        return Response(UserReadSerializer(self.get_read_object()).data)
+
     @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated])
+    @cache_response(User, object_id=lambda view: view.request.user.pk)
     def me(self, request):  # type: ignore[no-untyped-def]
         """
         Get current user's profile.
@@ -77,11 +143,135 @@ class UserViewSet(viewsets.ModelViewSet):
         )
         serializer.is_valid(raise_exception=True)
 
-        # Change password
+        # Change password; saving it revokes the user's tokens, so a token
+        # client gets a new pair to stay signed in with
         user = request.user
         user.set_password(serializer.validated_data["new_password"])
-        user.save()
+        user.save(update_fields=["password"])
 
         return Response(
-            {"detail": "Password changed successfully."}, status=status.HTTP_200_OK
+            {"detail": "Password changed successfully.", **tokens.issue_tokens(user)},
+            status=status.HTTP_200_OK,
         )
+
+
+def _int_param(request: Request, name: str, default: int, low: int, high: int) -> int:
+    """
+    Read an integer query parameter, clamped to [low, high].
+    """
+    try:
+        value = int(request.query_params.get(name, default))
+    except ValueError:
+        raise ValidationError({name: ["A valid integer is required."]})
+    return max(low, min(value, high))
+
+
+def _get_board(board: str) -> BaseLeaderboard:
+    if board not in leaderboard.BOARDS:
+        raise NotFound("Unknown leaderboard.")
+    return leaderboard.get_leaderboard()
+
+
+def _serialize_entries(entries: list[leaderboard.Entry]) -> list[dict]:
+    """
+    Attach usernames to leaderboard entries with a single query.
+    """
+    usernames = dict(
+        User.objects.filter(pk__in=[entry.user_id for entry in entries]).values_list(
+            "pk", "username"
+        )
+    )
+    return [
+        {
+            "rank": entry.rank,
+            "user_id": entry.user_id,
+            "username": usernames.get(entry.user_id),
+            "score": entry.score,
+        }
+        for entry in entries
+    ]
+
+
+class LeaderboardView(ReplicaReadMixin, APIView):
+    """
+    Top players of a leaderboard (``streak`` or ``best_streak``).
+    """
+
+    permission_classes = [AllowAny]
+
+    def get(self, request, board):  # type: ignore[no-untyped-def]
+        backend = _get_board(board)
+        limit = _int_param(request, "limit", LEADERBOARD_DEFAULT_LIMIT, 1, 100)
+        return Response(
+            {"board": board, "results": _serialize_entries(backend.top(board, limit))}
+        )
+
+
+class LeaderboardRankView(ReplicaReadMixin, APIView):
+    """
+    The current user's rank on a leaderboard and the players around them.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, board):  # type: ignore[no-untyped-def]
+        backend = _get_board(board)
+        radius = _int_param(request, "radius", LEADERBOARD_DEFAULT_RADIUS, 0, 25)
+        neighbours = _serialize_entries(backend.around(board, request.user.pk, radius))
+        me = next(
+            (entry for entry in neighbours if entry["user_id"] == request.user.pk),
+            None,
+        )
+        return Response({"board": board, "rank": me, "neighbours": neighbours})
+
+
+class TokenObtainView(APIView):
+    """
+    Exchange email and password for an access/refresh token pair.
+    """
+
+    permission_classes = [AllowAny]
+    authentication_classes: list = []
+    throttle_classes = [IPThrottle, DeviceThrottle]
+    throttle_scope = "login"
+
+    def post(self, request):  # type: ignore[no-untyped-def]
+        serializer = TokenObtainSerializer(
+            data=request.data, context={"request": request}
+        )
+        serializer.is_valid(raise_exception=True)
+        return Response(tokens.issue_tokens(serializer.validated_data["user"]))
+
+
+class TokenRefreshView(APIView):
+    """
+    Exchange a refresh token for a new token pair.
+    """
+
+    permission_classes = [AllowAny]
+    authentication_classes: list = []
+
+    def post(self, request):  # type: ignore[no-untyped-def]
+        serializer = TokenRefreshSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            pair = tokens.refresh_tokens(serializer.validated_data["refresh"])
+        except tokens.InvalidToken as exc:
+            return Response(
+                {"detail": str(exc)},
+                status=status.HTTP_401_UNAUTHORIZED,
+                headers={"WWW-Authenticate": SignedTokenAuthentication.keyword},
+            )
+        return Response(pair)
+
+
+class TokenRevokeView(APIView):
+    """
+    Revoke every token issued to the current user, e.g. "log out everywhere".
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):  # type: ignore[no-untyped-def]
+        tokens.revoke_tokens(request.user)
+        return Response(status=status.HTTP_204_NO_CONTENT)